@@ -0,0 +1,56 @@
+"""Add the webhook_deliveries table
+
+Revision ID: 4c7d2e9f5a1b
+Revises: 9a2b8c4d1e3f
+Create Date: 2026-10-18 14:03:27.551902
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4c7d2e9f5a1b"
+down_revision = "9a2b8c4d1e3f"
+
+
+def upgrade():
+    """Create the webhook_deliveries table."""
+    op.create_table(
+        "webhook_deliveries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("url", sa.Text(), nullable=False),
+        sa.Column("topic", sa.Text(), nullable=False),
+        sa.Column("msg_id", sa.String(64), nullable=False),
+        sa.Column("status_code", sa.Integer(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("latency", sa.Float(), nullable=True),
+        sa.Column("date_created", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["project_id"],
+            ["projects.id"],
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    for column in ("project_id", "url", "date_created"):
+        op.create_index(
+            op.f("ix_webhook_deliveries_%s" % column),
+            "webhook_deliveries",
+            [column],
+            unique=False,
+        )
+
+
+def downgrade():
+    """Drop the webhook_deliveries table."""
+    for column in ("project_id", "url", "date_created"):
+        op.drop_index(
+            op.f("ix_webhook_deliveries_%s" % column),
+            table_name="webhook_deliveries",
+        )
+    op.drop_table("webhook_deliveries")
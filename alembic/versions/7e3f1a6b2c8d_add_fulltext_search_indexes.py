@@ -0,0 +1,42 @@
+"""Add the full-text search indexes on the issues and pull-requests
+
+Revision ID: 7e3f1a6b2c8d
+Revises: 4c7d2e9f5a1b
+Create Date: 2026-10-18 22:51:09.316204
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "7e3f1a6b2c8d"
+down_revision = "4c7d2e9f5a1b"
+
+
+# The indexes are only used on PostgreSQL, see pagure.lib.search
+INDEXES = {
+    "issues_title_fts_idx": ("issues", "title"),
+    "issues_content_fts_idx": ("issues", "content"),
+    "issue_comments_comment_fts_idx": ("issue_comments", "comment"),
+    "pull_requests_title_fts_idx": ("pull_requests", "title"),
+}
+
+
+def upgrade():
+    """Create the GIN indexes on the to_tsvector of the columns searched."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for name, (table, column) in sorted(INDEXES.items()):
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS %s ON %s "
+            "USING GIN (to_tsvector('simple', %s))" % (name, table, column)
+        )
+
+
+def downgrade():
+    """Drop the full-text search indexes."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for name in sorted(INDEXES):
+        op.execute("DROP INDEX IF EXISTS %s" % name)
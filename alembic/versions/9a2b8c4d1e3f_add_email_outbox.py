@@ -0,0 +1,45 @@
+"""Add the email_outbox table
+
+Revision ID: 9a2b8c4d1e3f
+Revises: 6a8ca213d503
+Create Date: 2026-10-18 10:12:43.218734
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9a2b8c4d1e3f"
+down_revision = "6a8ca213d503"
+
+
+def upgrade():
+    """Create the email_outbox table."""
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("from_email", sa.Text(), nullable=False),
+        sa.Column("to_email", sa.Text(), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("date_created", sa.DateTime(), nullable=False),
+        sa.Column("next_attempt", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_email_outbox_next_attempt"),
+        "email_outbox",
+        ["next_attempt"],
+        unique=False,
+    )
+
+
+def downgrade():
+    """Drop the email_outbox table."""
+    op.drop_index(
+        op.f("ix_email_outbox_next_attempt"), table_name="email_outbox"
+    )
+    op.drop_table("email_outbox")
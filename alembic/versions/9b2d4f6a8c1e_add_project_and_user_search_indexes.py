@@ -0,0 +1,57 @@
+"""Add the indexes used to search the projects and users by name
+
+Revision ID: 9b2d4f6a8c1e
+Revises: 7e3f1a6b2c8d
+Create Date: 2026-10-18 23:05:41.512093
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "9b2d4f6a8c1e"
+down_revision = "7e3f1a6b2c8d"
+
+
+# Indexes on the lowercased names, used by the prefix searches everywhere
+LOWER_INDEXES = {
+    "projects_lower_name_idx": ("projects", "name"),
+    "users_lower_user_idx": ("users", "user"),
+}
+
+# Trigram indexes, used by the ILIKE/LIKE searches on PostgreSQL
+TRIGRAM_INDEXES = {
+    "projects_name_trgm_idx": ("projects", "name"),
+    "users_user_trgm_idx": ("users", "user"),
+    "users_fullname_trgm_idx": ("users", "fullname"),
+}
+
+
+def upgrade():
+    """Create the indexes, and the pg_trgm extension on PostgreSQL."""
+    dialect = op.get_bind().dialect
+    # "user" is a reserved word on PostgreSQL
+    quote = dialect.identifier_preparer.quote
+    for name, (table, column) in sorted(LOWER_INDEXES.items()):
+        op.create_index(name, table, [sa.text("lower(%s)" % quote(column))])
+
+    if dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, (table, column) in sorted(TRIGRAM_INDEXES.items()):
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS %s ON %s "
+            "USING GIN (%s gin_trgm_ops)" % (name, table, quote(column))
+        )
+
+
+def downgrade():
+    """Drop the indexes, the pg_trgm extension is left installed."""
+    if op.get_bind().dialect.name == "postgresql":
+        for name in sorted(TRIGRAM_INDEXES):
+            op.execute("DROP INDEX IF EXISTS %s" % name)
+
+    for name, (table, _) in sorted(LOWER_INDEXES.items()):
+        op.drop_index(name, table_name=table)
@@ -243,6 +243,9 @@ install -p -m 644 files/api_key_expire_mail.py $RPM_BUILD_ROOT/%{_datadir}/pagur
 # Install the mirror_project_in.py script
 install -p -m 644 files/mirror_project_in.py $RPM_BUILD_ROOT/%{_datadir}/pagure/mirror_project_in.py
 
+# Install the reschedule_update_git.py script
+install -p -m 644 files/reschedule_update_git.py $RPM_BUILD_ROOT/%{_datadir}/pagure/reschedule_update_git.py
+
 # Install the keyhelper and aclcheck scripts
 mkdir -p $RPM_BUILD_ROOT/%{_libexecdir}/pagure/
 install -p -m 755 files/aclchecker.py $RPM_BUILD_ROOT/%{_libexecdir}/pagure/aclchecker.py
@@ -268,6 +271,9 @@ install -p -m 644 files/pagure_docs_web.service \
 mkdir -p $RPM_BUILD_ROOT/%{_unitdir}
 install -p -m 644 files/pagure_worker.service \
     $RPM_BUILD_ROOT/%{_unitdir}/pagure_worker.service
+%{_unitdir}/pagure_email.service
+install -p -m 644 files/pagure_email.service \
+    $RPM_BUILD_ROOT/%{_unitdir}/pagure_email.service
 
 # Install the systemd file for the web-hook
 install -p -m 644 files/pagure_webhook.service \
@@ -362,6 +368,7 @@ done
 
 %post
 %systemd_post pagure_worker.service
+%systemd_post pagure_email.service
 %systemd_post pagure_api_key_expire_mail.timer
 %systemd_post pagure_mirror_project_in.timer
 %post web-nginx
@@ -384,6 +391,7 @@ done
 
 %preun
 %systemd_preun pagure_worker.service
+%systemd_preun pagure_email.service
 %systemd_preun pagure_api_key_expire_mail.timer
 %systemd_preun pagure_mirror_project_in.timer
 %preun web-nginx
@@ -406,6 +414,7 @@ done
 
 %postun
 %systemd_postun_with_restart pagure_worker.service
+%systemd_postun_with_restart pagure_email.service
 %systemd_postun pagure_api_key_expire_mail.timer
 %systemd_postun pagure_mirror_project_in.timer
 %postun web-nginx
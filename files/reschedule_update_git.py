@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+from __future__ import print_function, absolute_import
+import os
+import argparse
+
+import pagure.config
+import pagure.lib.git
+import pagure.lib.query
+
+if "PAGURE_CONFIG" not in os.environ and os.path.exists(
+    "/etc/pagure/pagure.cfg"
+):
+    print("Using configuration file `/etc/pagure/pagure.cfg`")
+    os.environ["PAGURE_CONFIG"] = "/etc/pagure/pagure.cfg"
+
+_config = pagure.config.reload_config()
+
+
+def main(debug=False):
+    """Schedule again the batched git updates whose task got lost"""
+
+    if not _config.get("GIT_UPDATE_COALESCE_WINDOW"):
+        if debug:
+            print("GIT_UPDATE_COALESCE_WINDOW is not set, nothing to do")
+        return
+
+    pagure.lib.query.set_redis(
+        host=_config.get("REDIS_HOST", None),
+        port=_config.get("REDIS_PORT", None),
+        socket=_config.get("REDIS_SOCKET", None),
+        dbname=_config["REDIS_DB"],
+    )
+
+    for args in pagure.lib.git.reschedule_lost_update_git_batches():
+        print("Rescheduled the git update of: %s" % (args,))
+
+    if debug:
+        print("Done")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Script to reschedule the lost batched git updates"
+    )
+    parser.add_argument(
+        "--debug",
+        dest="debug",
+        action="store_true",
+        default=False,
+        help="Print the debugging output",
+    )
+    args = parser.parse_args()
+    main(debug=args.debug)
@@ -23,9 +23,11 @@ from __future__ import unicode_literals, absolute_import
 
 import logging
 import os
+import time
 
 
 import redis
+import redis.asyncio
 import asyncio
 
 from six.moves.urllib.parse import urlparse
@@ -47,11 +49,111 @@ from pagure.exceptions import PagureException, PagureEvException  # noqa: E402
 
 SERVER = None
 SESSION = None
-POOL = redis.ConnectionPool(
-    host=pagure.config.config["REDIS_HOST"],
-    port=pagure.config.config["REDIS_PORT"],
-    db=pagure.config.config["REDIS_DB"],
-)
+SUBSCRIPTIONS = None
+# Path of the pages being watched -> (expiration time, uid, private)
+LOOKUP_CACHE = {}
+# Number of messages kept for a client not reading them fast enough, newer
+# messages are dropped for that client once it is reached
+CLIENT_QUEUE_SIZE = 100
+
+
+class Subscriptions(object):
+    """Single redis subscription shared by all the clients of the server.
+
+    Clients register a queue for the channel they are interested in, the
+    redis channel is subscribed to as long as at least one client watches it
+    and each message received is dispatched to the queues of its channel.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self.channels = {}
+        self._has_channels = asyncio.Event()
+
+    async def subscribe(self, channel):
+        """Return a queue in which the messages sent to the specified
+        channel will be put."""
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        if channel not in self.channels:
+            self.channels[channel] = set()
+            await self.pubsub.subscribe(channel)
+            self._has_channels.set()
+        self.channels[channel].add(queue)
+        return queue
+
+    async def unsubscribe(self, channel, queue):
+        """Stop putting the messages sent to the channel in the queue."""
+        queues = self.channels.get(channel, set())
+        queues.discard(queue)
+        if not queues and channel in self.channels:
+            del self.channels[channel]
+            if not self.channels:
+                self._has_channels.clear()
+            await self.pubsub.unsubscribe(channel)
+
+    def dispatch(self, message):
+        """Put the message received from redis in the queue of every client
+        watching its channel."""
+        channel = message["channel"]
+        if isinstance(channel, bytes):
+            channel = channel.decode("utf-8")
+        data = message["data"]
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        # The object was updated, its privacy may have changed
+        invalidate_lookup_cache(channel[len("pagure.") :])
+        for queue in self.channels.get(channel, ()):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                log.warning("Client too slow, dropping message on %s", channel)
+
+    async def run(self):
+        """Read the messages from redis and dispatch them, forever."""
+        while True:
+            await self._has_channels.wait()
+            if self.pubsub.connection is None:
+                # The subscription was lost and could not be restored yet
+                await asyncio.sleep(1)
+                await self._reconnect()
+                continue
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except redis.exceptions.ConnectionError:
+                log.exception("Lost connection to redis, reconnecting")
+                await asyncio.sleep(1)
+                await self._reconnect()
+                continue
+            if message is not None:
+                self.dispatch(message)
+
+    async def _reconnect(self):
+        """Re-create the redis subscription for all the watched channels."""
+        try:
+            await self.pubsub.close()
+        except redis.exceptions.ConnectionError:
+            pass
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        if self.channels:
+            try:
+                await self.pubsub.subscribe(*self.channels)
+            except redis.exceptions.ConnectionError:
+                log.warning("Could not re-subscribe to redis yet")
+
+
+def _get_subscriptions():
+    global SUBSCRIPTIONS
+    if SUBSCRIPTIONS is None:
+        client = redis.asyncio.Redis(
+            host=pagure.config.config["REDIS_HOST"],
+            port=pagure.config.config["REDIS_PORT"],
+            db=pagure.config.config["REDIS_DB"],
+        )
+        SUBSCRIPTIONS = Subscriptions(client)
+    return SUBSCRIPTIONS
 
 
 def _get_session():
@@ -65,7 +167,7 @@ def _get_session():
     return SESSION
 
 
-def _get_issue(repo, objid):
+def _get_issue(repo, objid, allow_private=False):
     """Get a Ticket (issue) instance for a given repo (Project) and
     objid (issue number).
     """
@@ -79,7 +181,7 @@ def _get_issue(repo, objid):
     if issue is None or issue.project != repo:
         raise PagureEvException("Issue '%s' not found" % objid)
 
-    if issue.private:
+    if issue.private and not allow_private:
         # TODO: find a way to do auth
         raise PagureEvException(
             "This issue is private and you are not allowed to view it"
@@ -88,7 +190,7 @@ def _get_issue(repo, objid):
     return issue
 
 
-def _get_pull_request(repo, objid):
+def _get_pull_request(repo, objid, allow_private=False):
     """Get a PullRequest instance for a given repo (Project) and objid
     (request number).
     """
@@ -114,9 +216,8 @@ def _get_pull_request(repo, objid):
 OBJECTS = {"issue": _get_issue, "pull-request": _get_pull_request}
 
 
-def get_obj_from_path(path):
-    """ Return the Ticket or Request object based on the path provided.
-    """
+def get_obj_from_path(path, allow_private=False):
+    """Return the Ticket or Request object based on the path provided."""
     (username, namespace, reponame, objtype, objid) = pagure.utils.parse_path(
         path
     )
@@ -134,7 +235,52 @@ def get_obj_from_path(path):
     except KeyError:
         raise PagureEvException("Invalid object provided: '%s'" % objtype)
 
-    return getfunc(repo, objid)
+    return getfunc(repo, objid, allow_private=allow_private)
+
+
+def get_uid_from_path(path):
+    """Return the uid of the Ticket or Request object based on the path
+    provided, relying on the lookup cache when possible.
+    """
+    now = time.time()
+    cached = LOOKUP_CACHE.get(path)
+    if cached is None or cached[0] < now:
+        session = _get_session()
+        try:
+            obj = get_obj_from_path(path, allow_private=True)
+            cached = (
+                now + pagure.config.config["EVENTSOURCE_LOOKUP_CACHE_TTL"],
+                obj.uid,
+                getattr(obj, "private", False),
+            )
+        finally:
+            # Do not keep objects (and their privacy) around between lookups
+            session.remove()
+        _prune_lookup_cache(now)
+        LOOKUP_CACHE[path] = cached
+
+    _, uid, private = cached
+    if private:
+        # TODO: find a way to do auth
+        raise PagureEvException(
+            "This issue is private and you are not allowed to view it"
+        )
+    return uid
+
+
+def _prune_lookup_cache(now):
+    """Drop the expired entries of the lookup cache."""
+    for path, cached in list(LOOKUP_CACHE.items()):
+        if cached[0] < now:
+            del LOOKUP_CACHE[path]
+
+
+def invalidate_lookup_cache(uid):
+    """Forget the paths pointing to the issue or pull-request with the
+    given uid, so its next lookup reflects its latest state."""
+    for path, cached in list(LOOKUP_CACHE.items()):
+        if cached[1] == uid:
+            del LOOKUP_CACHE[path]
 
 
 async def handle_client(client_reader, client_writer):
@@ -166,7 +312,7 @@ async def handle_client(client_reader, client_writer):
     url = urlparse(data[1])
 
     try:
-        obj = get_obj_from_path(url.path)
+        uid = get_uid_from_path(url.path)
     except PagureException as err:
         log.warning(str(err))
         return
@@ -185,29 +331,24 @@ async def handle_client(client_reader, client_writer):
         ).encode()
     )
 
-    conn = redis.Redis(connection_pool=POOL)
-    subscriber = conn.pubsub(ignore_subscribe_messages=True)
+    subscriptions = _get_subscriptions()
+    channel = "pagure.%s" % uid
+    queue = None
 
     try:
-        subscriber.subscribe("pagure.%s" % obj.uid)
+        queue = await subscriptions.subscribe(channel)
 
-        # Inside a while loop, wait for incoming events.
-        oncall = 0
+        # Wait for incoming events, sending them as soon as they arrive
         while True:
-            msg = subscriber.get_message()
-            if msg is None:
+            try:
+                data = await asyncio.wait_for(queue.get(), timeout=5.0)
+            except asyncio.TimeoutError:
                 # Send a ping to see if the client is still alive
-                if oncall >= 5:
-                    # Only send a ping once every 5 seconds
-                    client_writer.write(("event: ping\n\n").encode())
-                    oncall = 0
-                oncall += 1
-                await client_writer.drain()
-                await asyncio.sleep(1)
+                client_writer.write(("event: ping\n\n").encode())
             else:
-                log.info("Sending %s", msg["data"])
-                client_writer.write(("data: %s\n\n" % msg["data"]).encode())
-                await client_writer.drain()
+                log.info("Sending %s", data)
+                client_writer.write(("data: %s\n\n" % data).encode())
+            await client_writer.drain()
 
     except OSError:
         log.info("Client closed connection")
@@ -219,7 +360,8 @@ async def handle_client(client_reader, client_writer):
     finally:
         # Wathever happens, close the connection.
         log.info("Client left. Goodbye!")
-        subscriber.close()
+        if queue is not None:
+            await subscriptions.unsubscribe(channel, queue)
         client_writer.close()
 
 
@@ -252,6 +394,7 @@ def main():
             port=pagure.config.config["EVENTSOURCE_PORT"],
         )
         SERVER = loop.run_until_complete(coro)
+        loop.create_task(_get_subscriptions().run())
         log.info(
             "Serving server at {}".format(SERVER.sockets[0].getsockname())
         )
@@ -555,6 +555,7 @@ def api():
         project.api_get_project_webhook_token,
         project.api_project_create_api_token,
         project.api_commit_info,
+        project.api_view_file_history,
         project.api_view_file,
         project.delete_project,
     ]
@@ -314,6 +314,23 @@ def api_view_issues(repo, username=None, namespace=None):
     |               |         |              |   ``asc`` or ``desc``.    |
     |               |         |              |   Default: ``desc``       |
     +---------------+---------+--------------+---------------------------+
+    | ``order_key`` | string  | Optional     | | Set the field the issues|
+    |               |         |              |   are sorted by, for      |
+    |               |         |              |   example ``last_updated``|
+    |               |         |              |   or ``relevance`` to     |
+    |               |         |              |   sort the results of a   |
+    |               |         |              |   full-text search.       |
+    |               |         |              |   Default:                |
+    |               |         |              |   ``date_created``        |
+    +---------------+---------+--------------+---------------------------+
+    | ``search``    | string  | Optional     | | Filter the issues whose |
+    |               |         |              |   title contains this     |
+    |               |         |              |   text                    |
+    +---------------+---------+--------------+---------------------------+
+    | ``content``   | string  | Optional     | | Filter the issues whose |
+    |               |         |              |   content or comments     |
+    |               |         |              |   contain this text       |
+    +---------------+---------+--------------+---------------------------+
     | ``page``      | int      | Optional    | | Specifies which         |
     |               |          |             |   page to return          |
     |               |          |             |   (defaults to: 1)        |
@@ -396,10 +413,13 @@ def api_view_issues(repo, username=None, namespace=None):
     priority = flask.request.args.get("priority", None)
     since = flask.request.args.get("since", None)
     order = flask.request.args.get("order", None)
+    order_key = flask.request.args.get("order_key", None)
     status = flask.request.args.get("status", None)
     tags = flask.request.args.getlist("tags")
     tags = [tag.strip() for tag in tags if tag.strip()]
     search_id = flask.request.args.get("query_id", None)
+    search_pattern = flask.request.args.get("search", None)
+    search_content = flask.request.args.get("content", None)
 
     priority_key = None
     if priority:
@@ -438,8 +458,11 @@ def api_view_issues(repo, username=None, namespace=None):
         "milestones": milestone,
         "priority": priority_key,
         "order": order,
+        "order_key": order_key,
         "no_milestones": no_stones,
         "search_id": search_id,
+        "search_pattern": search_pattern or None,
+        "search_content": search_content or None,
     }
 
     if status is not None:
@@ -27,6 +27,7 @@ import pagure
 import pagure.exceptions
 import pagure.forms
 import pagure.lib.git
+import pagure.lib.model
 import pagure.lib.query
 import pagure.utils
 from pagure.api import (
@@ -1222,6 +1223,7 @@ def api_projects():
     }
 
     if not short:
+        pagure.lib.model.Project.load_json_columns(projects)
         projects = [p.to_json(api=True, public=True) for p in projects]
     else:
         projects = [
@@ -2229,6 +2231,109 @@ def api_commit_info(repo, commit_hash, username=None, namespace=None):
     return flask.jsonify(info)
 
 
+@API.route("/<repo>/git/history/<path:filename>")
+@API.route("/<namespace>/<repo>/git/history/<path:filename>")
+@API.route("/fork/<username>/<repo>/git/history/<path:filename>")
+@API.route("/fork/<username>/<namespace>/<repo>/git/history/<path:filename>")
+@api_method
+def api_view_file_history(repo, filename, username=None, namespace=None):
+    """
+    File history
+    ------------
+    Return the commits having changed the specified file or folder, the
+    most recent first.
+
+    ::
+
+        GET /api/0/<repo>/git/history/<filename>
+        GET /api/0/<namespace>/<repo>/git/history/<filename>
+
+    ::
+
+        GET /api/0/fork/<username>/<repo>/git/history/<filename>
+        GET /api/0/fork/<username>/<namespace>/<repo>/git/history/<filename>
+
+    Parameters
+    ^^^^^^^^^^
+
+    +-----------------+----------+---------------+--------------------------+
+    | Key             | Type     | Optionality   | Description              |
+    +=================+==========+===============+==========================+
+    | ``identifier``  | string   | Optional      | | The branch, tag or     |
+    |                 |          |               |   commit to look at,     |
+    |                 |          |               |   defaults to the HEAD   |
+    |                 |          |               |   of the repository      |
+    +-----------------+----------+---------------+--------------------------+
+    | ``page``        | int      | Optional      | | The page of results to |
+    |                 |          |               |   return, defaults to 1  |
+    +-----------------+----------+---------------+--------------------------+
+    | ``per_page``    | int      | Optional      | | The number of commits  |
+    |                 |          |               |   per page, defaults to  |
+    |                 |          |               |   20, at most 100        |
+    +-----------------+----------+---------------+--------------------------+
+
+    Sample response
+    ^^^^^^^^^^^^^^^
+
+    ::
+
+        {
+          "commits": [
+            "d1ce3b9e1a3a3b8d5b8d5d3c9a6f1ecb4c7b2a1e",
+            "47d3fbe9bd1a4d0b2bb5a1c2f7e5a7b5c1d9e2f3"
+          ],
+          "filename": "doc",
+          "identifier": "master",
+          "pagination": {
+            "first": "http://localhost/api/0/test/git/history/doc?...page=1",
+            "last": "http://localhost/api/0/test/git/history/doc?...page=1",
+            "next": null,
+            "page": 1,
+            "pages": 1,
+            "per_page": 20,
+            "prev": null
+          },
+          "total_commits": 2
+        }
+
+    """
+    repo = _get_repo(repo, username, namespace)
+
+    repo_obj = pygit2.Repository(pagure.utils.get_repo_path(repo))
+    if repo_obj.is_empty or repo_obj.head_is_unborn:
+        raise pagure.exceptions.APIError(404, error_code=APIERROR.EEMPTYGIT)
+
+    identifier = flask.request.args.get("identifier")
+    if not identifier:
+        identifier = repo_obj.head.shorthand
+
+    page = get_page()
+    per_page = get_per_page()
+    start = (page - 1) * per_page
+    try:
+        n_commits, commits = pagure.lib.git.get_file_history(
+            repo_obj, filename, identifier, start, start + per_page - 1
+        )
+    except pagure.exceptions.PagureException:
+        n_commits, commits = 0, []
+    if not n_commits:
+        raise pagure.exceptions.APIError(
+            404, error_code=APIERROR.EFILENOTFOUND
+        )
+
+    return flask.jsonify(
+        {
+            "commits": [commit.hex for commit in commits],
+            "filename": filename,
+            "identifier": identifier,
+            "pagination": pagure.lib.query.get_pagination_metadata(
+                flask.request, page, per_page, n_commits
+            ),
+            "total_commits": n_commits,
+        }
+    )
+
+
 @API.route("/<repo>/c/<commit_hash>/flag", methods=["POST"])
 @API.route("/<namespace>/<repo>/c/<commit_hash>/flag", methods=["POST"])
 @API.route("/fork/<username>/<repo>/c/<commit_hash>/flag", methods=["POST"])
@@ -2734,6 +2839,7 @@ def api_modify_acls(repo, namespace=None, username=None):
 
         try:
             flask.g.session.commit()
+            pagure.utils.invalidate_access_cache(project)
         except pagure.exceptions.PagureException as msg:
             flask.g.session.rollback()
             _log.debug(msg)
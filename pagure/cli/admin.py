@@ -31,7 +31,9 @@ import pagure.exceptions  # noqa: E402
 import pagure.lib.git  # noqa: E402
 import pagure.lib.model  # noqa: E402
 import pagure.lib.model_base  # noqa: E402
+import pagure.lib.notify  # noqa: E402
 import pagure.lib.query  # noqa: E402
+import pagure.lib.search  # noqa: E402
 import pagure.lib.tasks_utils  # noqa: E402
 from pagure.utils import get_repo_path  # noqa: E402
 
@@ -437,6 +439,35 @@ def _parser_set_default_branch(subparser):
     local_parser.set_defaults(func=do_set_default_branch)
 
 
+def _parser_email_outbox(subparser):
+    """Set up the CLI argument parser for the email-outbox action.
+
+    :arg subparser: an argparse subparser allowing to have action's specific
+        arguments
+
+    """
+    local_parser = subparser.add_parser(
+        "email-outbox",
+        help="Show the state of the outbox of the emails to send",
+    )
+    local_parser.set_defaults(func=do_email_outbox)
+
+
+def _parser_search_index(subparser):
+    """Set up the CLI argument parser for the search-index action.
+
+    :arg subparser: an argparse subparser allowing to have action's specific
+        arguments
+
+    """
+    local_parser = subparser.add_parser(
+        "search-index",
+        help="Rebuild the full-text search index of the issues and "
+        "pull-requests (only needed on SQLite)",
+    )
+    local_parser.set_defaults(func=do_search_index)
+
+
 def _parser_update_acls(subparser):
     """Set up the CLI argument parser for the update-acls action.
 
@@ -512,6 +543,12 @@ def parse_arguments(args=None):
     # update-acls
     _parser_update_acls(subparser)
 
+    # email-outbox
+    _parser_email_outbox(subparser)
+
+    # search-index
+    _parser_search_index(subparser)
+
     return parser.parse_args(args)
 
 
@@ -1258,6 +1295,48 @@ def do_set_default_branch(args):
     print("Branch %s set as default" % (args.branch))
 
 
+def do_email_outbox(args):
+    """Show the number of emails waiting to be sent, the number of emails
+    which could not be sent and since when the oldest email is waiting.
+
+    :arg args: the argparse object returned by ``parse_arguments()``.
+
+    """
+    stats = pagure.lib.notify.get_email_outbox_stats(session)
+    print("Emails queued: %s" % stats["queued"])
+    print("Emails failed: %s" % stats["failed"])
+    print("Oldest email queued since: %ds" % stats["oldest"])
+
+    failed = (
+        session.query(pagure.lib.model.EmailOutbox)
+        .filter(pagure.lib.model.EmailOutbox.next_attempt.is_(None))
+        .order_by(pagure.lib.model.EmailOutbox.id)
+        .all()
+    )
+    for email in failed:
+        print(
+            "  %s to %s: %s"
+            % (email.date_created, email.to_email, email.last_error)
+        )
+
+
+def do_search_index(args):
+    """Rebuild the full-text search index of the issues and pull-requests.
+
+    :arg args: the argparse object returned by ``parse_arguments()``.
+
+    """
+    if not _config.get("FULLTEXT_SEARCH", False):
+        print("Note: FULLTEXT_SEARCH is not enabled in the configuration")
+
+    count = pagure.lib.search.reindex(session)
+    if count is None:
+        print("No full-text search index to rebuild on this database")
+        return
+    session.commit()
+    print("%s issues, comments and pull-requests indexed" % count)
+
+
 def main():
     """Start of the application."""
 
@@ -47,6 +47,17 @@ PAGURE_ADMIN_USERS = []
 # Whether or not to send emails
 EMAIL_SEND = False
 
+# Store the emails to send in the database and send them from a dedicated
+# worker (listening to the EMAIL_CELERY_QUEUE), instead of sending them while
+# processing the request
+EMAIL_OUTBOX = False
+
+# Maximum number of emails the email worker sends at once
+EMAIL_OUTBOX_BATCH_SIZE = 100
+
+# Number of attempts at sending an email before giving up
+EMAIL_OUTBOX_MAX_ATTEMPTS = 8
+
 # The email address to which the flask.log will send the errors (tracebacks)
 EMAIL_ERROR = "root@localhost.localdomain"
 
@@ -124,6 +135,7 @@ WEBHOOK_CELERY_QUEUE = "pagure_webhook"
 LOGCOM_CELERY_QUEUE = "pagure_logcom"
 LOADJSON_CELERY_QUEUE = "pagure_loadjson"
 CI_CELERY_QUEUE = "pagure_ci"
+EMAIL_CELERY_QUEUE = "pagure_email"
 MIRRORING_QUEUE = "pagure_mirror"
 
 # Number of items displayed per page
@@ -145,6 +157,9 @@ REDIS_HOST = "0.0.0.0"
 REDIS_PORT = 6379
 REDIS_DB = 0
 EVENTSOURCE_PORT = 8080
+# Number of seconds for which the EventSource server remembers which issue or
+# pull-request a page is about and whether it is private
+EVENTSOURCE_LOOKUP_CACHE_TTL = 60
 
 # Disallow remote pull requests
 DISABLE_REMOTE_PR = False
@@ -402,6 +417,62 @@ FLAG_PENDING = "pending"
 # easy denial of service to the system if enabled.
 ALLOW_PROJECT_DOWAIT = False
 
+# Write the JSON representation of issues and pull-requests directly into
+# the object database of the tickets and requests git repositories instead
+# of going through a temporary clone and a push
+GIT_UPDATE_DIRECT_WRITE = False
+
+# Number of seconds during which the changes made to the issues and
+# pull-requests of a project are collected before being written to git in
+# a single commit. Requires redis, changes are written one at a time if unset
+GIT_UPDATE_COALESCE_WINDOW = None
+
+# Folder in which to store the index of the commits of each branch, allowing
+# the commits page to be served without walking the whole history
+COMMITS_INDEX_FOLDER = None
+
+# Folder in which to cache the blame of the files, computed by a worker. The
+# blame is computed by the web application at every request if unset
+BLAME_CACHE_FOLDER = None
+
+# Number of seconds for which the commits to merge between two commits,
+# computed to show the commits page and the pull-requests, are kept in redis
+# (when redis is configured)
+DIFF_INFO_CACHE_TIMEOUT = 7 * 24 * 3600
+
+# Number of seconds for which the statistics about the commits of a project,
+# shown on its stats page, are kept in redis (when redis is configured)
+COMMITS_STATS_CACHE_TIMEOUT = 7 * 24 * 3600
+
+# Settings for the delivery of the web-hook notifications: the maximum
+# number of notifications delivered concurrently, overall and per host, the
+# timeout of the requests, in seconds, and how many times to retry after an
+# error, waiting WEBHOOK_RETRY_DELAY seconds then twice as long each time
+WEBHOOK_MAX_WORKERS = 10
+WEBHOOK_MAX_PER_HOST = 2
+WEBHOOK_TIMEOUT = 60
+WEBHOOK_RETRIES = 2
+WEBHOOK_RETRY_DELAY = 1
+# Stop calling, for WEBHOOK_CIRCUIT_BREAKER_DELAY seconds, the URLs whose
+# last WEBHOOK_CIRCUIT_BREAKER_THRESHOLD deliveries failed (0 to disable)
+WEBHOOK_CIRCUIT_BREAKER_THRESHOLD = 5
+WEBHOOK_CIRCUIT_BREAKER_DELAY = 600
+# Number of deliveries kept in the database for each project
+WEBHOOK_DELIVERIES_KEPT = 100
+
+# Number of seconds for which the access of the users to the projects is
+# cached across requests, in each process (0 to only cache it for the time
+# of a request)
+ACCESS_CACHE_TTL = 0
+
+# Search the issues and pull-requests using the full-text search of the
+# database (PostgreSQL, or SQLite built with FTS5) instead of ILIKE
+FULLTEXT_SEARCH = False
+
+# Number of files read concurrently from git when loading the issues and
+# pull-requests pushed to the tickets and requests repositories
+LOADJSON_MAX_WORKERS = 4
+
 # Settings for MQTT message sending
 MQTT_NOTIFICATIONS = False
 MQTT_HOST = None
@@ -49,6 +49,7 @@ if (
     pagure_config["EVENTSOURCE_SOURCE"]
     or pagure_config["WEBHOOK"]
     or pagure_config.get("PAGURE_CI_SERVICES")
+    or pagure_config.get("GIT_UPDATE_COALESCE_WINDOW")
 ):
     pagure.lib.query.set_redis(
         host=pagure_config.get("REDIS_HOST", None),
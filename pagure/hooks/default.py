@@ -125,9 +125,11 @@ def send_action_notification(
     session, subject, action, project, repodir, user, refname, rev
 ):
     """Send out-going notifications about the branch/tag."""
-    email = pagure.lib.git.get_author_email(rev, repodir)
-    name = pagure.lib.git.get_author(rev, repodir)
-    author = pagure.lib.query.search_user(session, email=email) or name
+    info = pagure.lib.git.get_commits_info([rev], repodir)[0]
+    author = (
+        pagure.lib.query.search_user(session, email=info["author_email"])
+        or info["author"]
+    )
     if not isinstance(author, six.string_types):
         author = author.to_json(public=True)
     else:
@@ -171,12 +173,13 @@ def send_notifications(
     pushed.
     """
 
+    commits_info = pagure.lib.git.get_commits_info(revs, repodir)
+    users = pagure.lib.query.get_users_by_emails(
+        session, [info["author_email"] for info in commits_info]
+    )
     auths = set()
-    for rev in revs:
-        email = pagure.lib.git.get_author_email(rev, repodir)
-        name = pagure.lib.git.get_author(rev, repodir)
-        author = pagure.lib.query.search_user(session, email=email) or name
-        auths.add(author)
+    for info in commits_info:
+        auths.add(users.get(info["author_email"]) or info["author"])
 
     authors = []
     for author in auths:
@@ -339,10 +342,14 @@ class DefaultRunner(BaseRunner):
                 default_branch = repo_obj.head.shorthand
 
         pr_uids = []
+        to_index = []
 
         for refname in changes:
             (oldrev, newrev) = changes[refname]
 
+            if refname.startswith("refs/heads/") and set(newrev) != set("0"):
+                to_index.append((oldrev, newrev))
+
             forced = False
             if set(newrev) == set(["0"]):
                 if refname.startswith("refs/tags"):
@@ -482,6 +489,11 @@ class DefaultRunner(BaseRunner):
                 but_uids=pr_uids,
             )
 
+        if to_index:
+            pagure.lib.tasks.update_commits_index.delay(
+                project.repopath("main"), to_index
+            )
+
         if _config.get("GIT_GARBAGE_COLLECT", False):
             pagure.lib.tasks.git_garbage_collect.delay(
                 project.repopath("main")
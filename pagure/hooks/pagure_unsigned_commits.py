@@ -89,13 +89,12 @@ class PagureUnsignerRunner(BaseRunner):
             commits = pagure.lib.git.get_revs_between(
                 oldrev, newrev, repodir, refname
             )
-            for commit in commits:
+            for info in pagure.lib.git.get_commits_info(commits, repodir):
+                commit = info["commit"]
                 if _config.get("HOOK_DEBUG", False):
                     print("Processing commit: %s" % commit)
                 signed = False
-                for line in pagure.lib.git.read_git_lines(
-                    ["log", "--no-walk", commit], repodir
-                ):
+                for line in info["message"].splitlines():
                     if line.lower().strip().startswith("signed-off-by"):
                         signed = True
                         break
@@ -9,7 +9,10 @@
 """
 from __future__ import absolute_import, print_function, unicode_literals
 
+import collections
+import csv
 import datetime
+import hashlib
 import json
 import logging
 import os
@@ -18,6 +21,7 @@ import stat
 import subprocess
 import tarfile
 import tempfile
+import time
 import zipfile
 
 import arrow
@@ -155,6 +159,10 @@ def update_git(obj, repo):
     else:
         raise NotImplementedError("Unknown object type %s" % obj.isa)
 
+    window = pagure_config.get("GIT_UPDATE_COALESCE_WINDOW")
+    if window and pagure.lib.query.REDIS is not None:
+        return _queue_update_git(obj, repo, window)
+
     queued = pagure.lib.tasks.update_git.delay(
         repo.name,
         repo.namespace,
@@ -166,6 +174,89 @@ def update_git(obj, repo):
     return queued
 
 
+def get_update_git_key(name, namespace, user, repotype):
+    """Returns the redis key under which the uid of the objects waiting
+    to be written in the specified git repo are stored.
+    """
+    return "pagure.update_git.%s.%s.%s.%s" % (repotype, namespace, user, name)
+
+
+def _queue_update_git(obj, repo, window):
+    """Adds the given object to the set of objects waiting to be written
+    to git and schedules an update_git_batch task, unless one is already
+    scheduled, to run in ``window`` seconds.
+
+    This way, all the changes made to the issues (or pull-requests) of a
+    project during that window end up in a single commit.
+    """
+    args = (
+        repo.name,
+        repo.namespace,
+        repo.user.username if repo.is_fork else None,
+        obj.repotype,
+    )
+    pagure.lib.query.REDIS.sadd(get_update_git_key(*args), obj.uid)
+    return schedule_update_git_batch(args, window)
+
+
+def schedule_update_git_batch(args, window, force=False):
+    """Schedules an update_git_batch task for the given arguments to run in
+    ``window`` seconds, unless one is already scheduled.
+
+    A task that has been scheduled for more than twice the window plus a
+    minute is considered lost and is scheduled again.
+
+    :arg args: the (name, namespace, user, repotype) arguments of the task
+    :arg window: the number of seconds to wait before running the task
+    :kwarg force: schedule the task even if one is already scheduled
+    :return: the task scheduled or None
+
+    """
+    flag = get_update_git_key(*args) + ".scheduled"
+    now = time.time()
+    value = json.dumps({"time": now, "args": args, "window": window})
+
+    if not force and not pagure.lib.query.REDIS.set(flag, value, nx=True):
+        try:
+            scheduled = json.loads(pagure.lib.query.REDIS.get(flag))
+        except (TypeError, ValueError):
+            scheduled = {"time": 0}
+        if now - scheduled["time"] < int(window) * 2 + 60:
+            # A task is already going to pick the objects queued
+            return
+        _log.warning("Scheduled update_git_batch%s looks lost", args)
+        force = True
+
+    if force:
+        pagure.lib.query.REDIS.set(flag, value)
+
+    queued = pagure.lib.tasks.update_git_batch.apply_async(
+        args=args, countdown=window
+    )
+    _maybe_wait(queued)
+    return queued
+
+
+def reschedule_lost_update_git_batches():
+    """Schedules again the update_git_batch tasks that look lost, so that
+    the objects they were supposed to write are not left behind when no
+    further change is made to the project.
+    """
+    rescheduled = []
+    for flag in pagure.lib.query.REDIS.scan_iter("pagure.update_git.*"):
+        if not flag.endswith(b".scheduled"):
+            continue
+        try:
+            scheduled = json.loads(pagure.lib.query.REDIS.get(flag))
+        except (TypeError, ValueError):
+            continue
+        if schedule_update_git_batch(
+            tuple(scheduled["args"]), scheduled["window"]
+        ):
+            rescheduled.append(scheduled["args"])
+    return rescheduled
+
+
 def _maybe_wait(result):
     """Function to patch if one wants to wait for finish.
 
@@ -192,8 +283,39 @@ def _update_git(obj, repo):
 
     """
     _log.info("Update the git repo: %s for: %s", repo.path, obj)
+    return _update_git_objects([obj], repo, obj.repotype)
+
+
+def _update_git_message(objs):
+    """Returns the commit message to use when updating the given objects."""
+    if len(objs) == 1:
+        obj = objs[0]
+        return "Updated %s %s: %s" % (obj.isa, obj.uid, obj.title)
+    return "Updated %s %ss\n\n%s" % (
+        len(objs),
+        objs[0].isa,
+        "\n".join("%s: %s" % (obj.uid, obj.title) for obj in objs),
+    )
+
 
-    with TemporaryClone(repo, obj.repotype, "update_git") as tempclone:
+def _update_git_objects(objs, repo, repotype):
+    """Update the given issues or pull-requests in their git, all in a
+    single commit.
+
+    :arg objs: the list of issues or pull-requests to update, they must
+        all be stored in the same git repo
+    :arg repo: the Project object from the database
+    :arg repotype: the type of git repo the objects are stored in, either
+        ``tickets`` or ``requests``
+
+    """
+    if not objs:
+        return
+
+    if pagure_config.get("GIT_UPDATE_DIRECT_WRITE", False):
+        return _update_git_direct(objs, repo, repotype)
+
+    with TemporaryClone(repo, repotype, "update_git") as tempclone:
         if tempclone is None:
             # Turns out we don't have a repo for this kind of object.
             return
@@ -201,26 +323,27 @@ def _update_git(obj, repo):
         newpath = tempclone.repopath
         new_repo = tempclone.repo
 
-        file_path = os.path.join(newpath, obj.uid)
-
         # Get the current index
         index = new_repo.index
 
-        # Are we adding files
-        added = False
-        if not os.path.exists(file_path):
-            added = True
-
-        # Write down what changed
-        with open(file_path, "w") as stream:
-            stream.write(
-                json.dumps(
-                    obj.to_json(),
-                    sort_keys=True,
-                    indent=4,
-                    separators=(",", ": "),
+        added = []
+        for obj in objs:
+            file_path = os.path.join(newpath, obj.uid)
+
+            # Are we adding files
+            if not os.path.exists(file_path):
+                added.append(obj.uid)
+
+            # Write down what changed
+            with open(file_path, "w") as stream:
+                stream.write(
+                    json.dumps(
+                        obj.to_json(),
+                        sort_keys=True,
+                        indent=4,
+                        separators=(",", ": "),
+                    )
                 )
-            )
 
         # Retrieve the list of files that changed
         diff = new_repo.diff()
@@ -229,8 +352,8 @@ def _update_git(obj, repo):
             files.append(patch.delta.new_file.path)
 
         # Add the changes to the index
-        if added:
-            index.add(obj.uid)
+        for filename in added:
+            index.add(filename)
         for filename in files:
             index.add(filename)
 
@@ -257,7 +380,7 @@ def _update_git(obj, repo):
             "refs/heads/master",
             author,
             author,
-            "Updated %s %s: %s" % (obj.isa, obj.uid, obj.title),
+            _update_git_message(objs),
             new_repo.index.write_tree(),
             parents,
         )
@@ -267,6 +390,89 @@ def _update_git(obj, repo):
         tempclone.push("pagure", "master", internal="yes")
 
 
+def _update_git_direct(objs, repo, repotype, retries=5):
+    """Update the given issues in their git without cloning the repo.
+
+    The JSON blobs, the new tree and the commit are written directly into
+    the object database of the bare repository, the tree being built on top
+    of the one of the current ``master`` commit. The branch is then moved
+    using a compare-and-swap update, so if another process updated the
+    branch in the meantime, the commit is rebuilt on top of the new head.
+
+    Since nothing is pushed, no git hooks are run on the repository.
+
+    """
+    repopath = repo.repopath(repotype)
+    if repopath is None or not os.path.exists(repopath):
+        # Turns out we don't have a repo for this kind of object.
+        return
+
+    git_repo = pygit2.Repository(repopath)
+    blobs = {}
+    for obj in objs:
+        blobs[obj.uid] = git_repo.create_blob(
+            json.dumps(
+                obj.to_json(),
+                sort_keys=True,
+                indent=4,
+                separators=(",", ": "),
+            ).encode("utf-8")
+        )
+
+    # Author/commiter will always be this one
+    author = _make_signature(name="pagure", email="pagure")
+    refname = "refs/heads/master"
+
+    for _ in range(retries):
+        reference = git_repo.references.get(refname)
+        parents = []
+        changed = list(blobs)
+        builder = git_repo.TreeBuilder()
+        if reference is not None:
+            parent = reference.peel(pygit2.Commit)
+            changed = [
+                uid
+                for uid in blobs
+                if uid not in parent.tree or parent.tree[uid].id != blobs[uid]
+            ]
+            if not changed:
+                # If not change, return
+                return
+            parents.append(parent.id)
+            builder = git_repo.TreeBuilder(parent.tree)
+
+        for uid in changed:
+            builder.insert(uid, blobs[uid], pygit2.GIT_FILEMODE_BLOB)
+        commit = git_repo.create_commit(
+            None,
+            author,
+            author,
+            _update_git_message(objs),
+            builder.write(),
+            parents,
+        )
+
+        try:
+            if reference is None:
+                git_repo.references.create(refname, commit)
+            else:
+                # libgit2 only moves the reference if it still points to
+                # the commit we built on top of
+                reference.set_target(commit)
+        except (pygit2.GitError, pygit2.AlreadyExistsError):
+            _log.info(
+                "%s of %s was updated concurrently, retrying",
+                refname,
+                repopath,
+            )
+            continue
+        return
+
+    raise pagure.exceptions.PagureException(
+        "Could not update %s in %s" % (", ".join(blobs), repopath)
+    )
+
+
 def clean_git(repo, obj_repotype, obj_uid):
     if repo is None:
         return
@@ -632,7 +838,7 @@ def update_ticket_from_git(
     if close_status:
         if close_status.strip() not in repo.close_status:
             try:
-                repo.close_status.append(close_status.strip())
+                repo.close_status = repo.close_status + [close_status.strip()]
                 session.add(repo)
                 session.commit()
             except SQLAlchemyError:
@@ -1369,6 +1575,44 @@ def get_commit_subject(commit, abspath):
     return subject
 
 
+def get_commits_info(commits, abspath):
+    """Return the author, committer and message of the specified commits,
+    read in a single pass over the git repository instead of running git
+    once per commit and per field.
+
+    :arg commits: the identifiers of the commits
+    :arg abspath: the path to the git repository
+    :return: a dictionary per commit, in the order of ``commits``, with the
+        keys: ``commit``, ``author``, ``author_email``, ``committer``,
+        ``committer_email``, ``commit_time``, ``subject`` and ``message``
+    :rtype: list
+
+    """
+    repo_obj = pygit2.Repository(abspath)
+    output = []
+    for commitid in commits:
+        commit = repo_obj.revparse_single(commitid).peel(pygit2.Commit)
+        message = commit.message
+        # As git's %s: the first paragraph of the message, on one line
+        subject = " ".join(
+            line.strip()
+            for line in message.strip().split("\n\n")[0].splitlines()
+        )
+        output.append(
+            {
+                "commit": commitid,
+                "author": commit.author.name,
+                "author_email": commit.author.email,
+                "committer": commit.committer.name,
+                "committer_email": commit.committer.email,
+                "commit_time": commit.commit_time,
+                "subject": subject,
+                "message": message,
+            }
+        )
+    return output
+
+
 def get_changed_files(torev, fromrev, abspath):
     """Return files changed between HEAD and BASE.
     Return as a dict with paths as keys and status letters as values.
@@ -1523,6 +1767,461 @@ def get_branch_ref(repo, branchname):
     return branch_ref.resolve()
 
 
+def _commits_index_folder(repo_obj):
+    """Returns the folder in which the commits index of the given git repo
+    is stored or None if the commits index is disabled.
+    """
+    folder = pagure_config.get("COMMITS_INDEX_FOLDER")
+    if not folder:
+        return None
+    key = hashlib.sha256(
+        os.path.realpath(repo_obj.path).encode("utf-8")
+    ).hexdigest()
+    return os.path.join(folder, key)
+
+
+class CommitsIndex(object):
+    """Read access to the index of the commits reachable from a given
+    commit of a git repo.
+
+    The index of a commit is made of three files:
+
+    - ``<oid>.commits`` containing the raw ids (20 bytes each) of all the
+      commits reachable from that commit, the oldest first, so that any
+      page of the history can be read by seeking in the file,
+    - ``<oid>.authors`` containing a JSON dict associating each author
+      email to the position of their commits in the first file,
+    - ``<oid>.paths`` containing a JSON dict associating each file and
+      folder to the position of the commits changing it in the first file.
+
+    Positions are counted from the oldest commit so they do not change
+    when new commits are added on top of the history, which is what allows
+    the index of a new commit to be built from the one of its parent.
+
+    """
+
+    oid_size = 20
+
+    def __init__(self, folder, oid):
+        self._commits_path = os.path.join(folder, "%s.commits" % oid)
+        self._authors_path = os.path.join(folder, "%s.authors" % oid)
+        self._paths_path = os.path.join(folder, "%s.paths" % oid)
+        self.count = os.path.getsize(self._commits_path) // self.oid_size
+        self._authors = None
+        self._paths = None
+
+    @classmethod
+    def get(cls, repo_obj, oid):
+        """Returns the CommitsIndex of the specified commit in the given
+        git repo or None if this commit is not indexed.
+        """
+        folder = _commits_index_folder(repo_obj)
+        if folder is None:
+            return None
+        try:
+            return cls(folder, oid)
+        except OSError:
+            return None
+
+    @property
+    def authors(self):
+        """Dict associating each author email to the position of their
+        commits in the index."""
+        if self._authors is None:
+            with open(self._authors_path) as stream:
+                self._authors = json.load(stream)
+        return self._authors
+
+    @property
+    def has_paths(self):
+        """Whether the files changed by the commits are indexed, they are
+        not in the indexes built before they were."""
+        return self._paths is not None or os.path.exists(self._paths_path)
+
+    @property
+    def paths(self):
+        """Dict associating each file and folder to the position of the
+        commits changing it in the index."""
+        if self._paths is None:
+            with open(self._paths_path) as stream:
+                self._paths = json.load(stream)
+        return self._paths
+
+    def count_for(self, emails):
+        """Returns the number of commits made by any of the given emails."""
+        return sum(len(self.authors.get(email, [])) for email in emails)
+
+    def count_for_path(self, path):
+        """Returns the number of commits changing the given file or folder."""
+        return len(self.paths.get(path.strip("/"), []))
+
+    def _read_at(self, stream, position):
+        stream.seek(position * self.oid_size)
+        return pygit2.Oid(raw=stream.read(self.oid_size))
+
+    def get_commits(self, start, end, emails=None, path=None):
+        """Returns the ids of the commits between ``start`` and ``end``
+        (both included) in the history, the most recent commit being at
+        position 0, optionally restricted to the commits made by any of the
+        given emails or to the commits changing the given file or folder.
+        """
+        if path is not None:
+            positions = self.paths.get(path.strip("/"), [])[::-1]
+        elif emails is None:
+            positions = range(self.count - 1, -1, -1)
+        else:
+            positions = sorted(
+                (
+                    pos
+                    for email in emails
+                    for pos in self.authors.get(email, [])
+                ),
+                reverse=True,
+            )
+        with open(self._commits_path, "rb") as stream:
+            return [
+                self._read_at(stream, pos)
+                for pos in positions[start : end + 1]
+            ]
+
+
+def index_commits(repo_obj, newrev, oldrev=None):
+    """Build the index of the commits reachable from ``newrev``.
+
+    If ``oldrev`` is already indexed and is an ancestor of ``newrev``, only
+    the commits between the two are walked, the rest of the index is copied
+    from the one of ``oldrev``.
+
+    :arg repo_obj: the git repository to index
+    :type repo_obj: pygit2.Repository
+    :arg newrev: the commit to index
+    :type newrev: str
+    :kwarg oldrev: a previously indexed commit, typically the one the
+        branch pointed to before a push
+    :type oldrev: str or None
+
+    """
+    folder = _commits_index_folder(repo_obj)
+    if folder is None or CommitsIndex.get(repo_obj, newrev) is not None:
+        return
+
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    walker = repo_obj.walk(newrev, pygit2.GIT_SORT_NONE)
+    base = None
+    if oldrev and oldrev != newrev:
+        base = CommitsIndex.get(repo_obj, oldrev)
+        if base is not None and (
+            not base.has_paths or not repo_obj.descendant_of(newrev, oldrev)
+        ):
+            base = None
+    if base is not None:
+        walker.hide(oldrev)
+
+    new_commits = list(walker)
+    new_commits.reverse()
+
+    authors = {}
+    paths = {}
+    offset = 0
+    fd, commits_tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    with os.fdopen(fd, "wb") as stream:
+        if base is not None:
+            with open(base._commits_path, "rb") as base_stream:
+                shutil.copyfileobj(base_stream, stream)
+            offset = base.count
+            authors = base.authors
+            paths = base.paths
+        for idx, commit in enumerate(new_commits):
+            stream.write(commit.oid.raw)
+            authors.setdefault(commit.author.email, []).append(offset + idx)
+            for path in _get_changed_paths(repo_obj, commit):
+                paths.setdefault(path, []).append(offset + idx)
+
+    fd, authors_tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    with os.fdopen(fd, "w") as stream:
+        json.dump(authors, stream)
+
+    fd, paths_tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    with os.fdopen(fd, "w") as stream:
+        json.dump(paths, stream)
+
+    # The commits file is what marks the commit as indexed, so it goes last
+    os.rename(authors_tmp, os.path.join(folder, "%s.authors" % newrev))
+    os.rename(paths_tmp, os.path.join(folder, "%s.paths" % newrev))
+    os.rename(commits_tmp, os.path.join(folder, "%s.commits" % newrev))
+
+
+def _get_changed_paths(repo_obj, commit):
+    """Returns the files, and the folders containing them, changed by the
+    given commit compared to each of its parents, a merge only changes
+    the files that differ from all of its parents.
+    """
+    changed = None
+    for parent in commit.parents or [None]:
+        if parent is None:
+            diff = commit.tree.diff_to_tree(swap=True)
+        else:
+            diff = repo_obj.diff(parent, commit)
+        paths = set()
+        for delta in diff.deltas:
+            for path in (delta.old_file.path, delta.new_file.path):
+                while path and path not in paths:
+                    paths.add(path)
+                    path = path.rpartition("/")[0]
+        changed = paths if changed is None else changed & paths
+    return changed
+
+
+def get_file_history(repo_obj, filename, identifier, start=0, end=None):
+    """Returns the number of commits having changed the specified file or
+    folder in the history of the given branch, tag or commit and the ids
+    of those between ``start`` and ``end`` (both included), the most recent
+    first.
+
+    The commits index is used for the branches, the history is searched
+    using ``git log`` otherwise.
+    """
+    filename = filename.strip("/")
+    index = None
+    branch = None
+    try:
+        branch = repo_obj.lookup_branch(identifier)
+    except ValueError:
+        pass
+    if branch is not None:
+        commit = branch.peel(pygit2.Commit)
+        index = CommitsIndex.get(repo_obj, commit.hex)
+        if index is None and pagure_config.get("COMMITS_INDEX_FOLDER"):
+            # Index this branch for the next time
+            pagure.lib.tasks.update_commits_index.delay(
+                repo_obj.path, [(None, commit.hex)]
+            )
+
+    if index is not None and index.has_paths:
+        count = index.count_for_path(filename)
+        if end is None:
+            end = count
+        return count, index.get_commits(start, end, path=filename)
+
+    log = PagureRepo.log(
+        repo_obj.path,
+        log_options=["--pretty=%H"],
+        target=filename,
+        fromref=identifier,
+    ).split()
+    if end is None:
+        end = len(log)
+    return len(log), [pygit2.Oid(hex=oid) for oid in log[start : end + 1]]
+
+
+def prune_commits_index(repo_obj):
+    """Remove from the commits index of the given git repo the commits
+    that are no longer the head of a branch.
+    """
+    folder = _commits_index_folder(repo_obj)
+    if folder is None or not os.path.exists(folder):
+        return
+
+    heads = set()
+    for branchname in repo_obj.listall_branches():
+        heads.add(repo_obj.lookup_branch(branchname).peel().oid.hex)
+
+    for filename in os.listdir(folder):
+        if filename.endswith(".tmp"):
+            # Index being built
+            continue
+        if filename.split(".", 1)[0] not in heads:
+            os.unlink(os.path.join(folder, filename))
+
+
+BlameLine = collections.namedtuple(
+    "BlameLine", ["final_commit_id", "orig_committer"]
+)
+
+
+class Blame(object):
+    """Blame of a file, giving the commit having last changed each of its
+    lines, computed by libgit2 or read from the blame cache.
+
+    It is stored as a list of hunks: ``[lines, commit id, committer name,
+    committer email]``, consecutive lines last changed by the same commit
+    being grouped together.
+
+    """
+
+    def __init__(self, hunks):
+        self.hunks = hunks
+        self._lines = None
+
+    @classmethod
+    def from_pygit2(cls, blame):
+        """Returns the Blame corresponding to the given pygit2.Blame."""
+        hunks = []
+        for hunk in blame:
+            try:
+                committer = hunk.orig_committer
+            except ValueError:
+                committer = None
+            hunks.append(
+                [
+                    hunk.lines_in_hunk,
+                    hunk.final_commit_id.hex,
+                    committer.name if committer else None,
+                    committer.email if committer else None,
+                ]
+            )
+        return cls(hunks)
+
+    @classmethod
+    def from_lines(cls, lines):
+        """Returns the Blame corresponding to the given list of per-line
+        ``(commit id, committer name, committer email)`` entries."""
+        hunks = []
+        for line in lines:
+            if hunks and tuple(hunks[-1][1:]) == tuple(line):
+                hunks[-1][0] += 1
+            else:
+                hunks.append([1] + list(line))
+        return cls(hunks)
+
+    @property
+    def lines(self):
+        """List of ``(commit id, committer name, committer email)``, one
+        per line of the file."""
+        if self._lines is None:
+            self._lines = []
+            for hunk in self.hunks:
+                self._lines.extend([tuple(hunk[1:])] * hunk[0])
+        return self._lines
+
+    def for_line(self, lineno):
+        """Returns the commit having last changed the given line (starting
+        at 1), as pygit2.Blame.for_line does."""
+        if lineno < 1:
+            raise IndexError(lineno)
+        commitid, name, email = self.lines[lineno - 1]
+        committer = None
+        if name is not None:
+            committer = pygit2.Signature(name, email)
+        return BlameLine(commitid, committer)
+
+
+def _blame_cache_path(repo_obj, filename, commitid):
+    """Returns the file in which the blame of the specified file at the
+    given commit is cached or None if the blame cache is disabled.
+    """
+    folder = pagure_config.get("BLAME_CACHE_FOLDER")
+    if not folder:
+        return None
+    key = hashlib.sha256(
+        os.path.realpath(repo_obj.path).encode("utf-8")
+    ).hexdigest()
+    name = hashlib.sha256(filename.encode("utf-8")).hexdigest()
+    return os.path.join(folder, key, commitid, name)
+
+
+def get_cached_blame(repo_obj, filename, commitid):
+    """Returns the Blame of the specified file at the given commit if it
+    is in the blame cache, None otherwise.
+    """
+    path = _blame_cache_path(repo_obj, filename, commitid)
+    if path is None:
+        return None
+    try:
+        with open(path) as stream:
+            return Blame(json.load(stream))
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _get_blob(commit, filename):
+    """Returns the blob of the specified file at the given commit or None
+    if it does not exist there."""
+    try:
+        entry = commit.tree[filename]
+    except KeyError:
+        return None
+    if entry.type_str != "blob":
+        return None
+    return entry
+
+
+def _blame_from_parent(repo_obj, filename, commit):
+    """Returns the Blame of the specified file at the given commit derived
+    from the cached blame of its parent and the changes the commit made to
+    the file or None if that is not possible.
+    """
+    if len(commit.parents) != 1:
+        return None
+    parent = commit.parents[0]
+    old_blob = _get_blob(parent, filename)
+    new_blob = _get_blob(commit, filename)
+    if old_blob is None or new_blob is None:
+        return None
+    blame = get_cached_blame(repo_obj, filename, parent.oid.hex)
+    if blame is None:
+        return None
+    if old_blob.id == new_blob.id:
+        return blame
+
+    old_lines = blame.lines
+    new_entry = (
+        commit.oid.hex,
+        commit.committer.name,
+        commit.committer.email,
+    )
+    lines = []
+    patch = repo_obj[old_blob.id].diff(repo_obj[new_blob.id])
+    # Next line of the old file not accounted for yet
+    old_lineno = 1
+    for hunk in patch.hunks:
+        if hunk.old_lines == 0:
+            # Pure addition, after the line old_start of the old file
+            lines.extend(old_lines[old_lineno - 1 : hunk.old_start])
+            old_lineno = hunk.old_start + 1
+        for line in hunk.lines:
+            if line.old_lineno > 0:
+                # The lines between two hunks are unchanged
+                lines.extend(old_lines[old_lineno - 1 : line.old_lineno - 1])
+                old_lineno = line.old_lineno + 1
+            if line.origin == " ":
+                lines.append(old_lines[line.old_lineno - 1])
+            elif line.origin == "+":
+                lines.append(new_entry)
+    lines.extend(old_lines[old_lineno - 1 :])
+    return Blame.from_lines(lines)
+
+
+def compute_blame(repo_obj, filename, commitid):
+    """Returns the Blame of the specified file at the given commit and
+    stores it in the blame cache, if it is enabled.
+
+    When the blame of the parent of the commit is cached, it is only
+    updated with the changes the commit made to the file instead of
+    searching the whole history again.
+    """
+    commit = repo_obj[commitid]
+    blame = _blame_from_parent(repo_obj, filename, commit)
+    if blame is None:
+        blame = Blame.from_pygit2(
+            repo_obj.blame(filename, newest_commit=commit.oid.hex)
+        )
+
+    path = _blame_cache_path(repo_obj, filename, commit.oid.hex)
+    if path is not None:
+        folder = os.path.dirname(path)
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        fd, tmpfile = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "w") as stream:
+            json.dump(blame.hunks, stream)
+        os.rename(tmpfile, path)
+
+    return blame
+
+
 def merge_pull_request(session, request, username, domerge=True):
     """Merge the specified pull-request."""
     if domerge:
@@ -1990,6 +2689,85 @@ def rebase_pull_request(session, request, username):
     return "Pull-request rebased"
 
 
+# In-process fallback of the diff info cache, used when redis is not
+# configured. Entries are keyed on commit ids and thus never go stale.
+_DIFF_INFO_CACHE = collections.OrderedDict()
+_DIFF_INFO_CACHE_SIZE = 256
+
+
+def _get_diff_info_cache_key(from_oid, to_oid):
+    """Return the key under which the diff info between the two specified
+    commits is cached.
+    """
+    return "pagure.diff_info.%s.%s" % (from_oid, to_oid)
+
+
+def get_cached_diff_info(from_oid, to_oid):
+    """Return the cached merge base, ahead/behind counts and list of commits
+    present in ``from_oid`` but not in ``to_oid`` or None if they are not
+    known yet.
+    """
+    key = _get_diff_info_cache_key(from_oid, to_oid)
+    if pagure.lib.query.REDIS is not None:
+        value = pagure.lib.query.REDIS.get(key)
+        return json.loads(value) if value else None
+
+    value = _DIFF_INFO_CACHE.get(key)
+    if value is not None:
+        _DIFF_INFO_CACHE.move_to_end(key)
+    return value
+
+
+def set_cached_diff_info(from_oid, to_oid, info):
+    """Store the diff info between the two specified commits, as returned
+    by ``get_cached_diff_info``.
+    """
+    key = _get_diff_info_cache_key(from_oid, to_oid)
+    if pagure.lib.query.REDIS is not None:
+        pagure.lib.query.REDIS.set(
+            key, json.dumps(info), ex=pagure_config["DIFF_INFO_CACHE_TIMEOUT"]
+        )
+        return
+
+    _DIFF_INFO_CACHE[key] = info
+    while len(_DIFF_INFO_CACHE) > _DIFF_INFO_CACHE_SIZE:
+        _DIFF_INFO_CACHE.popitem(last=False)
+
+
+def _get_shared_repo(repo_obj, orig_repo):
+    """Return a repository object giving access to the objects of both
+    ``repo_obj`` and ``orig_repo``, without modifying either of them.
+    """
+    if os.path.realpath(repo_obj.path) == os.path.realpath(orig_repo.path):
+        return repo_obj
+    shared = pygit2.Repository(repo_obj.path)
+    shared.odb.add_disk_alternate(os.path.join(orig_repo.path, "objects"))
+    return shared
+
+
+def _compute_diff_info(repo_obj, from_oid, to_oid):
+    """Return the merge base, the ahead/behind counts and the list of the
+    commits present in ``from_oid`` but not in ``to_oid``.
+
+    Both commits must be present in ``repo_obj``.
+    """
+    merge_base = repo_obj.merge_base(from_oid, to_oid)
+    ahead, behind = repo_obj.ahead_behind(from_oid, to_oid)
+    walker = repo_obj.walk(from_oid, pygit2.GIT_SORT_NONE)
+    walker.hide(to_oid)
+    commits = [commit.oid.hex for commit in walker]
+    if merge_base is None:
+        # Unrelated histories: the oldest commit is used as the base of the
+        # diff rather than being part of it, as it always has been
+        commits = commits[:-1]
+    return {
+        "merge_base": merge_base.hex if merge_base else None,
+        "ahead": ahead,
+        "behind": behind,
+        "commits": commits,
+    }
+
+
 def get_diff_info(repo_obj, orig_repo, branch_from, branch_to, prid=None):
     """Return the info needed to see a diff or make a Pull-Request between
     the two specified repo.
@@ -2061,50 +2839,23 @@ def get_diff_info(repo_obj, orig_repo, branch_from, branch_to, prid=None):
         )
         if branch:
             orig_commit = orig_repo[branch.peel().hex]
-            main_walker = orig_repo.walk(
-                orig_commit.oid.hex, pygit2.GIT_SORT_NONE
-            )
-
-        repo_commit = repo_obj[commitid]
-        branch_walker = repo_obj.walk(
-            repo_commit.oid.hex, pygit2.GIT_SORT_NONE
-        )
-
-        main_commits = set()
-        branch_commits = set()
-
-        while 1:
-            com = None
-            if branch:
-                try:
-                    com = next(main_walker)
-                    main_commits.add(com.oid.hex)
-                except StopIteration:
-                    com = None
 
-            try:
-                branch_commit = next(branch_walker)
-            except StopIteration:
-                branch_commit = None
-
-            # We sure never end up here but better safe than sorry
-            if com is None and branch_commit is None:
-                break
-
-            if branch_commit:
-                branch_commits.add(branch_commit.oid.hex)
-                diff_commits.append(branch_commit)
-            if main_commits.intersection(branch_commits):
-                break
-
-        # If master is ahead of branch, we need to remove the commits
-        # that are after the first one found in master
-        i = 0
-        if diff_commits and main_commits:
-            for i in range(len(diff_commits)):
-                if diff_commits[i].oid.hex in main_commits:
-                    break
-            diff_commits = diff_commits[:i]
+        if orig_commit is not None:
+            # Rely on libgit2 to find the commits to merge and cache the
+            # result: it only depends on the two commit ids
+            info = get_cached_diff_info(commitid, orig_commit.oid.hex)
+            if info is None:
+                info = _compute_diff_info(
+                    _get_shared_repo(repo_obj, orig_repo),
+                    repo_obj[commitid].oid,
+                    orig_commit.oid,
+                )
+                set_cached_diff_info(commitid, orig_commit.oid.hex, info)
+            diff_commits = [repo_obj[oid] for oid in info["commits"]]
+        else:
+            diff_commits = list(
+                repo_obj.walk(repo_obj[commitid].oid, pygit2.GIT_SORT_NONE)
+            )
 
         _log.debug("Diff commits: %s", diff_commits)
         if diff_commits:
@@ -2433,35 +3184,108 @@ def get_git_tags_objects(project):
     return sorted_tags
 
 
-def log_commits_to_db(session, project, commits, gitdir):
-    """Log the given commits to the DB."""
+def _get_commits_authors(session, emails):
+    """Return the users matching the specified commit author emails, in a
+    couple of queries for the whole batch rather than one per commit.
+
+    As ``pagure.lib.query.get_user``, a user whose username is the email
+    takes precedence over a user having this email address.
+
+    """
+    emails = set(emails)
+    users = pagure.lib.query.get_users_by_emails(session, emails)
+    emails = sorted(emails)
+    for idx in range(0, len(emails), 500):
+        query = session.query(model.User).filter(
+            model.User.user.in_(emails[idx : idx + 500])
+        )
+        for user in query.all():
+            users[user.user] = user
+    return users
+
+
+def _copy_logs_to_db(session, rows):
+    """Insert the given pagure_logs rows using PostgreSQL's COPY."""
+    columns = (
+        "user_id",
+        "user_email",
+        "project_id",
+        "log_type",
+        "ref_id",
+        "date",
+        "date_created",
+    )
+    data = six.StringIO()
+    writer = csv.writer(data)
+    for row in rows:
+        writer.writerow(
+            [
+                # In the CSV format, unquoted empty values are NULL
+                "" if row[column] is None else row[column]
+                for column in columns
+            ]
+        )
+    data.seek(0)
+
+    session.flush()
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            "COPY pagure_logs (%s) FROM STDIN WITH CSV" % ", ".join(columns),
+            data,
+        )
+    finally:
+        cursor.close()
+
+
+def log_commits_to_db(session, project, commits, gitdir, batch_size=1000):
+    """Log the given commits to the DB.
+
+    The authors of the commits are resolved and the logs are inserted by
+    batches of ``batch_size`` commits: using COPY on PostgreSQL and a
+    single multi-rows INSERT otherwise.
+
+    """
     repo_obj = PagureRepo(gitdir)
+    commits = list(commits)
+    use_copy = session.get_bind().dialect.driver == "psycopg2"
 
-    for commitid in commits:
-        try:
-            commit = repo_obj[commitid]
-        except ValueError:
-            continue
+    for idx in range(0, len(commits), batch_size):
+        rows = []
+        for commitid in commits[idx : idx + batch_size]:
+            try:
+                commit = repo_obj[commitid]
+            except ValueError:
+                continue
 
-        try:
-            author_obj = pagure.lib.query.get_user(
-                session, commit.author.email
+            date_created = arrow.get(commit.commit_time)
+            rows.append(
+                {
+                    "user_id": None,
+                    "user_email": commit.author.email,
+                    "project_id": project.id,
+                    "log_type": "committed",
+                    "ref_id": commit.oid.hex,
+                    "date": date_created.date(),
+                    "date_created": date_created.naive,
+                }
             )
-        except pagure.exceptions.PagureException:
-            author_obj = None
-
-        date_created = arrow.get(commit.commit_time)
-
-        log = model.PagureLog(
-            user_id=author_obj.id if author_obj else None,
-            user_email=commit.author.email if not author_obj else None,
-            project_id=project.id,
-            log_type="committed",
-            ref_id=commit.oid.hex,
-            date=date_created.date(),
-            date_created=date_created.datetime,
+        if not rows:
+            continue
+
+        users = _get_commits_authors(
+            session, [row["user_email"] for row in rows]
         )
-        session.add(log)
+        for row in rows:
+            author_obj = users.get(row["user_email"])
+            if author_obj:
+                row["user_id"] = author_obj.id
+                row["user_email"] = None
+
+        if use_copy:
+            _copy_logs_to_db(session, rows)
+        else:
+            session.execute(model.PagureLog.__table__.insert(), rows)
 
 
 def reinit_git(project, repofolder):
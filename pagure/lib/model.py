@@ -11,6 +11,7 @@
 from __future__ import absolute_import, unicode_literals
 
 import collections
+import copy
 import datetime
 import json
 import logging
@@ -359,6 +360,73 @@ class UserEmailPending(BASE):
     )
 
 
+def _decode_project_settings(current):
+    """Return the settings of a project from their stored JSON, adding the
+    settings missing and dropping the ones no longer supported.
+    """
+    default = {
+        "issue_tracker": True,
+        "project_documentation": False,
+        "pull_requests": True,
+        "Only_assignee_can_merge_pull-request": False,
+        "Minimum_score_to_merge_pull-request": -1,
+        "Web-hooks": None,
+        "Enforce_signed-off_commits_in_pull-request": False,
+        "always_merge": False,
+        "issues_default_to_private": False,
+        "fedmsg_notifications": True,
+        "stomp_notifications": True,
+        "mqtt_notifications": True,
+        "pull_request_access_only": False,
+        "notify_on_pull-request_flag": False,
+        "notify_on_commit_flag": False,
+        "issue_tracker_read_only": False,
+        "disable_non_fast-forward_merges": False,
+        "open_metadata_access_to_all": False,
+    }
+
+    if current:
+        # Update the current dict with the new keys
+        for key in default:
+            if key not in current:
+                current[key] = default[key]
+            elif key == "Minimum_score_to_merge_pull-request":
+                current[key] = int(current[key])
+            elif is_true(current[key]):
+                current[key] = True
+        # Update the current dict, removing the old keys
+        for key in sorted(current):
+            if key not in default:
+                del current[key]
+        return current
+    else:
+        return default
+
+
+def _decode_project_milestones(milestones):
+    """Return the milestones of a project from their stored JSON."""
+
+    def _convert_to_dict(value):
+        if isinstance(value, dict):
+            return value
+        else:
+            return {"date": value, "active": True}
+
+    return dict(
+        [(k, _convert_to_dict(v)) for k, v in (milestones or {}).items()]
+    )
+
+
+def _json_dict(value):
+    """Return the given decoded JSON, or an empty dict if there was none."""
+    return value if value is not None else {}
+
+
+def _json_list(value):
+    """Return the given decoded JSON, or an empty list if there was none."""
+    return value if value is not None else []
+
+
 class Project(BASE):
     """Stores the projects.
 
@@ -508,6 +576,21 @@ class Project(BASE):
         viewonly=True,
     )
 
+    # How to decode the JSON columns and the content they were last decoded
+    # from, see _get_json_column
+    _JSON_COLUMNS = {
+        "_settings": _decode_project_settings,
+        "_milestones": _decode_project_milestones,
+        "_milestones_keys": _json_dict,
+        "_priorities": _json_dict,
+        "_block_users": _json_list,
+        "_quick_replies": _json_list,
+        "_notifications": _json_dict,
+        "_reports": _json_dict,
+        "_close_status": _json_list,
+    }
+    _json_cache = None
+
     def __repr__(self):
         return (
             "Project(%s, name:%s, namespace:%s, url:%s, is_fork:%s, "
@@ -593,49 +676,52 @@ class Project(BASE):
         """Return the list of tags in a simple text form."""
         return [tag.tag for tag in self.tags]
 
+    def _get_json_column(self, column):
+        """Return the decoded content of the specified JSON column.
+
+        The column is only decoded again when its content changes, for
+        example when the property is assigned. A copy of the top-level
+        object is returned, so it can be edited before being assigned back.
+        """
+        raw = getattr(self, column)
+        if self._json_cache is None:
+            self._json_cache = {}
+        cached = self._json_cache.get(column)
+        if cached is None or (cached[0] is not raw and cached[0] != raw):
+            value = json.loads(raw) if raw else None
+            cached = (raw, self._JSON_COLUMNS[column](value))
+            self._json_cache[column] = cached
+        return copy.copy(cached[1])
+
+    @classmethod
+    def load_json_columns(cls, projects):
+        """Decode the JSON columns of all the given projects, using a single
+        json.loads call per column, before listing these projects.
+        """
+        for column, decode in cls._JSON_COLUMNS.items():
+            todo = [
+                (project, getattr(project, column))
+                for project in projects
+                if getattr(project, column)
+            ]
+            if not todo:
+                continue
+            try:
+                values = json.loads("[%s]" % ",".join(raw for _, raw in todo))
+            except ValueError:
+                # Leave the invalid content to be reported on access
+                continue
+            for (project, raw), value in zip(todo, values):
+                if project._json_cache is None:
+                    project._json_cache = {}
+                project._json_cache[column] = (raw, decode(value))
+
     @property
     def settings(self):
         """Return the dict stored as string in the database as an actual
         dict object.
         """
-        default = {
-            "issue_tracker": True,
-            "project_documentation": False,
-            "pull_requests": True,
-            "Only_assignee_can_merge_pull-request": False,
-            "Minimum_score_to_merge_pull-request": -1,
-            "Web-hooks": None,
-            "Enforce_signed-off_commits_in_pull-request": False,
-            "always_merge": False,
-            "issues_default_to_private": False,
-            "fedmsg_notifications": True,
-            "stomp_notifications": True,
-            "mqtt_notifications": True,
-            "pull_request_access_only": False,
-            "notify_on_pull-request_flag": False,
-            "notify_on_commit_flag": False,
-            "issue_tracker_read_only": False,
-            "disable_non_fast-forward_merges": False,
-            "open_metadata_access_to_all": False,
-        }
-
-        if self._settings:
-            current = json.loads(self._settings)
-            # Update the current dict with the new keys
-            for key in default:
-                if key not in current:
-                    current[key] = default[key]
-                elif key == "Minimum_score_to_merge_pull-request":
-                    current[key] = int(current[key])
-                elif is_true(current[key]):
-                    current[key] = True
-            # Update the current dict, removing the old keys
-            for key in sorted(current):
-                if key not in default:
-                    del current[key]
-            return current
-        else:
-            return default
+        return self._get_json_column("_settings")
 
     @settings.setter
     def settings(self, settings):
@@ -647,24 +733,7 @@ class Project(BASE):
         """Return the dict stored as string in the database as an actual
         dict object.
         """
-        milestones = {}
-
-        if self._milestones:
-
-            def _convert_to_dict(value):
-                if isinstance(value, dict):
-                    return value
-                else:
-                    return {"date": value, "active": True}
-
-            milestones = dict(
-                [
-                    (k, _convert_to_dict(v))
-                    for k, v in json.loads(self._milestones).items()
-                ]
-            )
-
-        return milestones
+        return self._get_json_column("_milestones")
 
     @milestones.setter
     def milestones(self, milestones):
@@ -674,12 +743,7 @@ class Project(BASE):
     @property
     def milestones_keys(self):
         """Return the list of milestones so we can keep the order consistent."""
-        milestones_keys = {}
-
-        if self._milestones_keys:
-            milestones_keys = json.loads(self._milestones_keys)
-
-        return milestones_keys
+        return self._get_json_column("_milestones_keys")
 
     @milestones_keys.setter
     def milestones_keys(self, milestones_keys):
@@ -691,12 +755,7 @@ class Project(BASE):
         """Return the dict stored as string in the database as an actual
         dict object.
         """
-        priorities = {}
-
-        if self._priorities:
-            priorities = json.loads(self._priorities)
-
-        return priorities
+        return self._get_json_column("_priorities")
 
     @priorities.setter
     def priorities(self, priorities):
@@ -708,12 +767,7 @@ class Project(BASE):
         """Return the dict stored as string in the database as an actual
         dict object.
         """
-        block_users = []
-
-        if self._block_users:
-            block_users = json.loads(self._block_users)
-
-        return block_users
+        return self._get_json_column("_block_users")
 
     @block_users.setter
     def block_users(self, block_users):
@@ -725,12 +779,7 @@ class Project(BASE):
         """Return a list of quick replies available for pull requests and
         issues.
         """
-        quick_replies = []
-
-        if self._quick_replies:
-            quick_replies = json.loads(self._quick_replies)
-
-        return quick_replies
+        return self._get_json_column("_quick_replies")
 
     @quick_replies.setter
     def quick_replies(self, quick_replies):
@@ -742,12 +791,7 @@ class Project(BASE):
         """Return the dict stored as string in the database as an actual
         dict object.
         """
-        notifications = {}
-
-        if self._notifications:
-            notifications = json.loads(self._notifications)
-
-        return notifications
+        return self._get_json_column("_notifications")
 
     @notifications.setter
     def notifications(self, notifications):
@@ -759,12 +803,7 @@ class Project(BASE):
         """Return the dict stored as string in the database as an actual
         dict object.
         """
-        reports = {}
-
-        if self._reports:
-            reports = json.loads(self._reports)
-
-        return reports
+        return self._get_json_column("_reports")
 
     @reports.setter
     def reports(self, reports):
@@ -776,12 +815,7 @@ class Project(BASE):
         """Return the dict stored as string in the database as an actual
         dict object.
         """
-        close_status = []
-
-        if self._close_status:
-            close_status = json.loads(self._close_status)
-
-        return close_status
+        return self._get_json_column("_close_status")
 
     @close_status.setter
     def close_status(self, close_status):
@@ -3401,6 +3435,74 @@ class BoardIssues(BASE):
         }
 
 
+class WebhookDelivery(BASE):
+    """Stores the outcome of the deliveries of the web-hook notifications.
+
+    Table -- webhook_deliveries
+    """
+
+    __tablename__ = "webhook_deliveries"
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    project_id = sa.Column(
+        sa.Integer,
+        sa.ForeignKey("projects.id", onupdate="CASCADE", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    url = sa.Column(sa.Text, nullable=False, index=True)
+    topic = sa.Column(sa.Text, nullable=False)
+    msg_id = sa.Column(sa.String(64), nullable=False)
+    # None if no response was received
+    status_code = sa.Column(sa.Integer, nullable=True)
+    # None if the notification was delivered
+    error = sa.Column(sa.Text, nullable=True)
+    # 0 if the delivery was not attempted because the endpoint keeps failing
+    attempts = sa.Column(sa.Integer, nullable=False, default=0)
+    # Duration of the last attempt, in seconds
+    latency = sa.Column(sa.Float, nullable=True)
+    date_created = sa.Column(
+        sa.DateTime,
+        nullable=False,
+        default=datetime.datetime.utcnow,
+        index=True,
+    )
+
+    project = relation(
+        "Project",
+        foreign_keys=[project_id],
+        remote_side=[Project.id],
+        backref=backref("webhook_deliveries", cascade="delete, delete-orphan"),
+    )
+
+
+class EmailOutbox(BASE):
+    """Stores the emails waiting to be sent by the email worker.
+
+    Table -- email_outbox
+    """
+
+    __tablename__ = "email_outbox"
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    from_email = sa.Column(sa.Text, nullable=False)
+    to_email = sa.Column(sa.Text, nullable=False)
+    message = sa.Column(sa.Text, nullable=False)
+    attempts = sa.Column(sa.Integer, nullable=False, default=0)
+    last_error = sa.Column(sa.Text, nullable=True)
+    date_created = sa.Column(
+        sa.DateTime, nullable=False, default=datetime.datetime.utcnow
+    )
+    # None once the email could not be sent after the maximum number of
+    # attempts
+    next_attempt = sa.Column(
+        sa.DateTime,
+        nullable=True,
+        index=True,
+        default=datetime.datetime.utcnow,
+    )
+
+
 # ##########################################################
 # These classes are only used if you're using the `local`
 #                  authentication method
@@ -3445,5 +3547,22 @@ class PagureUserGroup(BASE):
     __table_args__ = (sa.UniqueConstraint("user_id", "group_id"),)
 
 
+# Indexes used by the full-text search on PostgreSQL, see pagure.lib.search
+for _name, _table, _column in (
+    ("issues_title_fts_idx", Issue.__table__, "title"),
+    ("issues_content_fts_idx", Issue.__table__, "content"),
+    ("issue_comments_comment_fts_idx", IssueComment.__table__, "comment"),
+    ("pull_requests_title_fts_idx", PullRequest.__table__, "title"),
+):
+    sa.event.listen(
+        _table,
+        "after_create",
+        sa.DDL(
+            "CREATE INDEX %s ON %s USING GIN (to_tsvector('simple', %s))"
+            % (_name, _table.name, _column)
+        ).execute_if(dialect="postgresql"),
+    )
+
+
 # Make sure to load the Plugin tables, so they have a chance to register
 get_plugin_tables()
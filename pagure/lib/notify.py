@@ -10,6 +10,7 @@ pagure notifications.
 """
 from __future__ import absolute_import, print_function, unicode_literals
 
+import atexit
 import datetime
 import hashlib
 import json
@@ -18,6 +19,7 @@ import os
 import re
 import smtplib
 import ssl
+import threading
 import time
 from email.header import Header
 from email.mime.text import MIMEText
@@ -25,9 +27,12 @@ from email.mime.text import MIMEText
 import blinker
 import flask
 import six
+import sqlalchemy as sa
 from markdown.extensions.fenced_code import FencedBlockPreprocessor
 from six.moves.urllib_parse import urljoin
 
+import pagure.lib.model
+import pagure.lib.model_base
 import pagure.lib.query
 import pagure.lib.tasks_services
 from pagure.config import config as pagure_config
@@ -112,6 +117,7 @@ def fedora_messaging_publish(topic, message):  # pragma: no cover
 
 
 stomp_conn = None
+_MQTT_LOCK = threading.Lock()
 
 
 def stomp_publish(topic, message):
@@ -154,52 +160,137 @@ def blinker_publish(topic, message):
     ready.send("pagure", topic=topic, message=message)
 
 
+class MQTTPublisher(object):
+    """Long-lived connection to the MQTT server, publishing the messages
+    of the current process from a background thread.
+
+    Messages are queued in a bounded in-memory queue, they are dropped
+    (and a warning logged) when it is full, so publishing never blocks
+    the caller even when the MQTT server is unreachable. The connection
+    is reestablished by the network loop of paho when it is lost.
+    """
+
+    def __init__(self, queue_size=1000):
+        self.queue = six.moves.queue.Queue(maxsize=queue_size)
+        self.connected = threading.Event()
+        self.pid = os.getpid()
+        self.client = None
+        self.thread = None
+
+    def start(self):
+        """Connect to the MQTT server and start the background threads."""
+        # pylint: disable=import-error
+        import paho.mqtt.client as mqtt
+
+        # The client identifier must be unique, the server closes the
+        # connection of the clients re-using an identifier
+        client = mqtt.Client("%s-%s" % (os.uname()[1], self.pid))
+        client.tls_set(
+            ca_certs=pagure_config.get("MQTT_CA_CERTS"),
+            certfile=pagure_config.get("MQTT_CERTFILE"),
+            keyfile=pagure_config.get("MQTT_KEYFILE"),
+            cert_reqs=pagure_config.get("MQTT_CERT_REQS", ssl.CERT_REQUIRED),
+            tls_version=pagure_config.get(
+                "MQTT_TLS_VERSION", ssl.PROTOCOL_TLSv1_2
+            ),
+            ciphers=pagure_config.get("MQTT_CIPHERS"),
+        )
+        mqtt_username = pagure_config.get("MQTT_USERNAME")
+        mqtt_pass = pagure_config.get("MQTT_PASSWORD")
+        if mqtt_username and mqtt_pass:
+            client.username_pw_set(mqtt_username, mqtt_pass)
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.reconnect_delay_set(min_delay=1, max_delay=60)
+        client.connect_async(
+            pagure_config.get("MQTT_HOST"), int(pagure_config.get("MQTT_PORT"))
+        )
+        client.loop_start()
+        self.client = client
+
+        self.thread = threading.Thread(target=self._run, name="mqtt-publisher")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _on_connect(self, client, userdata, flags, rc, *args):
+        """Called by paho once connected to the MQTT server."""
+        if rc == 0:
+            self.connected.set()
+        else:
+            _log.warning("Could not connect to the MQTT server: %s", rc)
+
+    def _on_disconnect(self, client, userdata, rc, *args):
+        """Called by paho when the connection to the MQTT server is lost."""
+        self.connected.clear()
+        if rc != 0:
+            _log.warning("Lost the connection to the MQTT server: %s", rc)
+
+    def _run(self):
+        """Publish the queued messages, waiting to be connected."""
+        while True:
+            topic, payload = self.queue.get()
+            try:
+                self.connected.wait()
+                self.client.publish(topic, payload)
+            except Exception:
+                _log.exception("Error sending mqtt message")
+            finally:
+                self.queue.task_done()
+
+    def publish(self, topic, payload):
+        """Queue the message to be published, without waiting."""
+        try:
+            self.queue.put_nowait((topic, payload))
+        except six.moves.queue.Full:
+            _log.warning("MQTT queue full, dropping message on %s", topic)
+
+    def stop(self, timeout=2):
+        """Give the queued messages some time to be published and close
+        the connection to the MQTT server."""
+        deadline = time.time() + timeout
+        while self.queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.05)
+        self.client.disconnect()
+        self.client.loop_stop()
+
+
+mqtt_publisher = None
+
+
+def _stop_mqtt_publisher():
+    """Stop the MQTT publisher of this process, if it has one."""
+    if mqtt_publisher is not None and mqtt_publisher.pid == os.getpid():
+        mqtt_publisher.stop()
+
+
+atexit.register(_stop_mqtt_publisher)
+
+
 def mqtt_publish(topic, message):
     """Try to publish a message on a MQTT message bus."""
     if not pagure_config.get("MQTT_NOTIFICATIONS", False):
         return
 
-    mqtt_host = pagure_config.get("MQTT_HOST")
-    mqtt_port = int(pagure_config.get("MQTT_PORT"))
-
-    mqtt_username = pagure_config.get("MQTT_USERNAME")
-    mqtt_pass = pagure_config.get("MQTT_PASSWORD")
-
-    mqtt_ca_certs = pagure_config.get("MQTT_CA_CERTS")
-    mqtt_certfile = pagure_config.get("MQTT_CERTFILE")
-    mqtt_keyfile = pagure_config.get("MQTT_KEYFILE")
-    mqtt_cert_reqs = pagure_config.get("MQTT_CERT_REQS", ssl.CERT_REQUIRED)
-    mqtt_tls_version = pagure_config.get(
-        "MQTT_TLS_VERSION", ssl.PROTOCOL_TLSv1_2
-    )
-    mqtt_ciphers = pagure_config.get("MQTT_CIPHERS")
-
     mqtt_topic_prefix = pagure_config.get("MQTT_TOPIC_PREFIX") or None
     if mqtt_topic_prefix:
         topic = "/".join([mqtt_topic_prefix.rstrip("/"), topic])
 
     # We catch Exception if we want :-p
     # pylint: disable=broad-except
-    # Ignore message about mqtt import
-    # pylint: disable=import-error
     try:
-        import paho.mqtt.client as mqtt
-
-        client = mqtt.Client(os.uname()[1])
-        client.tls_set(
-            ca_certs=mqtt_ca_certs,
-            certfile=mqtt_certfile,
-            keyfile=mqtt_keyfile,
-            cert_reqs=mqtt_cert_reqs,
-            tls_version=mqtt_tls_version,
-            ciphers=mqtt_ciphers,
-        )
-        if mqtt_username and mqtt_pass:
-            client.username_pw_set(mqtt_username, mqtt_pass)
-
-        client.connect(mqtt_host, mqtt_port)
-        client.publish(topic, json.dumps(message))
-        client.disconnect()
+        global mqtt_publisher
+        # The connection and the threads are not inherited by child processes
+        if mqtt_publisher is None or mqtt_publisher.pid != os.getpid():
+            with _MQTT_LOCK:
+                if mqtt_publisher is None or (
+                    mqtt_publisher.pid != os.getpid()
+                ):
+                    publisher = MQTTPublisher(
+                        pagure_config.get("MQTT_QUEUE_SIZE", 1000)
+                    )
+                    publisher.start()
+                    mqtt_publisher = publisher
+        mqtt_publisher.publish(topic, json.dumps(message))
 
     except Exception:
         _log.exception("Error sending mqtt message")
@@ -398,6 +489,208 @@ def _fullname_to_url(fullname):
     return fullname
 
 
+def _smtp_connect():
+    """Returns a new connection to the SMTP server, secured and
+    authenticated as configured."""
+    if pagure_config["SMTP_SSL"]:
+        smtp = smtplib.SMTP_SSL(
+            pagure_config["SMTP_SERVER"], pagure_config["SMTP_PORT"]
+        )
+    else:
+        smtp = smtplib.SMTP(
+            pagure_config["SMTP_SERVER"], pagure_config["SMTP_PORT"]
+        )
+
+    if pagure_config.get("SMTP_STARTTLS"):
+        context = ssl.create_default_context()
+        keyfile = pagure_config.get("SMTP_KEYFILE") or None
+        certfile = pagure_config.get("SMTP_CERTFILE") or None
+        respcode, _ = smtp.starttls(
+            keyfile=keyfile,
+            certfile=certfile,
+            context=context,
+        )
+        if respcode != 220:
+            _log.warning(
+                "The starttls command did not return the 220 "
+                "response code expected."
+            )
+
+    if pagure_config["SMTP_USERNAME"] and pagure_config["SMTP_PASSWORD"]:
+        smtp.login(
+            pagure_config["SMTP_USERNAME"],
+            pagure_config["SMTP_PASSWORD"],
+        )
+    return smtp
+
+
+def queue_emails(emails):
+    """Store the specified emails in the outbox and let the email worker
+    know there are emails to send.
+
+    The emails are stored using their own database session, so they are
+    not lost (nor sent) with the changes of the caller's session.
+
+    :arg emails: list of (from, to, message) tuples, the message being the
+        full email as a string.
+
+    """
+    session = pagure.lib.model_base.create_session(pagure_config["DB_URL"])
+    try:
+        for from_email, to_email, message in emails:
+            session.add(
+                pagure.lib.model.EmailOutbox(
+                    from_email=from_email, to_email=to_email, message=message
+                )
+            )
+        session.commit()
+    finally:
+        session.remove()
+    pagure.lib.tasks_services.send_queued_emails.delay()
+
+
+# Connection to the SMTP server kept open by the email worker between the
+# batches of emails it sends
+_SMTP = None
+
+
+def _get_smtp():
+    """Returns the connection to the SMTP server of the email worker,
+    opening a new one if it does not have any or if it was closed."""
+    global _SMTP
+    if _SMTP is not None:
+        try:
+            if _SMTP.noop()[0] == 250:
+                return _SMTP
+        except (smtplib.SMTPException, OSError):
+            pass
+        _close_smtp()
+    _SMTP = _smtp_connect()
+    return _SMTP
+
+
+def _close_smtp():
+    """Closes the connection to the SMTP server of the email worker."""
+    global _SMTP
+    if _SMTP is None:
+        return
+    try:
+        _SMTP.quit()
+    except (smtplib.SMTPException, OSError):
+        _SMTP.close()
+    _SMTP = None
+
+
+def send_queued_emails(session):
+    """Send the emails of the outbox due to be sent, up to
+    ``EMAIL_OUTBOX_BATCH_SIZE`` of them.
+
+    The emails failing to be sent are tried again later, waiting twice as
+    long after each attempt, until ``EMAIL_OUTBOX_MAX_ATTEMPTS`` is
+    reached.
+
+    :arg session: the session to use to connect to the database.
+    :return: the number of seconds after which this should be called again:
+        0 if there are more emails to send already, the delay before trying
+        again to send the emails which failed in this batch or None.
+
+    """
+    now = datetime.datetime.utcnow()
+    query = (
+        session.query(pagure.lib.model.EmailOutbox)
+        .filter(pagure.lib.model.EmailOutbox.next_attempt <= now)
+        .order_by(pagure.lib.model.EmailOutbox.id)
+        .limit(pagure_config["EMAIL_OUTBOX_BATCH_SIZE"])
+    )
+    if session.bind.dialect.name == "postgresql":  # pragma: no cover
+        # Let concurrent workers send the other emails
+        query = query.with_for_update(skip_locked=True)
+    emails = query.all()
+
+    start = time.time()
+    sent = 0
+    latency = datetime.timedelta(0)
+    retry_in = None
+    for email in emails:
+        try:
+            _get_smtp().sendmail(
+                email.from_email, [email.to_email], email.message
+            )
+        except (smtplib.SMTPException, OSError) as err:
+            if not isinstance(err, smtplib.SMTPResponseException):
+                # The connection is not usable anymore
+                _close_smtp()
+            email.attempts += 1
+            email.last_error = "%s" % err
+            if email.attempts >= pagure_config["EMAIL_OUTBOX_MAX_ATTEMPTS"]:
+                _log.error(
+                    "Giving up sending email %s to %s: %s",
+                    email.id,
+                    email.to_email,
+                    err,
+                )
+                email.next_attempt = None
+            else:
+                _log.warning(
+                    "Failed to send email %s to %s: %s",
+                    email.id,
+                    email.to_email,
+                    err,
+                )
+                delay = min(60 * 2 ** (email.attempts - 1), 3600)
+                email.next_attempt = now + datetime.timedelta(seconds=delay)
+                retry_in = min(delay, retry_in or delay)
+            session.add(email)
+        else:
+            sent += 1
+            latency = max(latency, now - email.date_created)
+            session.delete(email)
+        # Do not send the emails again if the worker stops
+        session.commit()
+
+    stats = get_email_outbox_stats(session)
+    _log.info(
+        "Sent %s emails in %.3fs, waited up to %.1fs in the outbox, "
+        "%s emails queued, %s failed",
+        sent,
+        time.time() - start,
+        latency.total_seconds(),
+        stats["queued"],
+        stats["failed"],
+    )
+
+    if len(emails) == pagure_config["EMAIL_OUTBOX_BATCH_SIZE"]:
+        return 0
+    return retry_in
+
+
+def get_email_outbox_stats(session):
+    """Returns the number of emails waiting in the outbox, the number of
+    emails which could not be sent and the age of the oldest email waiting
+    to be sent, in seconds.
+    """
+    query = session.query(pagure.lib.model.EmailOutbox)
+    queued = query.filter(
+        pagure.lib.model.EmailOutbox.next_attempt.isnot(None)
+    )
+    oldest = (
+        session.query(sa.func.min(pagure.lib.model.EmailOutbox.date_created))
+        .filter(pagure.lib.model.EmailOutbox.next_attempt.isnot(None))
+        .scalar()
+    )
+    return {
+        "queued": queued.count(),
+        "failed": query.filter(
+            pagure.lib.model.EmailOutbox.next_attempt.is_(None)
+        ).count(),
+        "oldest": (
+            (datetime.datetime.utcnow() - oldest).total_seconds()
+            if oldest
+            else 0
+        ),
+    }
+
+
 def send_email(
     text,
     subject,
@@ -444,6 +737,7 @@ def send_email(
         )
 
     smtp = None
+    queued = []
     for mailto in to_mail.split(","):
         try:
             pagure.lib.query.allowed_emailaddress(mailto)
@@ -511,48 +805,19 @@ def send_email(
             _log.debug(msg.as_string())
             _log.debug("*****/EMAIL******")
             continue
+        if pagure_config.get("EMAIL_OUTBOX"):
+            queued.append((from_email, mailto, msg.as_string()))
+            continue
         try:
             if smtp is None:
-                if pagure_config["SMTP_SSL"]:
-                    smtp = smtplib.SMTP_SSL(
-                        pagure_config["SMTP_SERVER"],
-                        pagure_config["SMTP_PORT"],
-                    )
-                else:
-                    smtp = smtplib.SMTP(
-                        pagure_config["SMTP_SERVER"],
-                        pagure_config["SMTP_PORT"],
-                    )
-
-            if pagure_config.get("SMTP_STARTTLS"):
-                context = ssl.create_default_context()
-                keyfile = pagure_config.get("SMTP_KEYFILE") or None
-                certfile = pagure_config.get("SMTP_CERTFILE") or None
-                respcode, _ = smtp.starttls(
-                    keyfile=keyfile,
-                    certfile=certfile,
-                    context=context,
-                )
-                if respcode != 220:
-                    _log.warning(
-                        "The starttls command did not return the 220 "
-                        "response code expected."
-                    )
-
-            if (
-                pagure_config["SMTP_USERNAME"]
-                and pagure_config["SMTP_PASSWORD"]
-            ):
-                smtp.login(
-                    pagure_config["SMTP_USERNAME"],
-                    pagure_config["SMTP_PASSWORD"],
-                )
-
+                smtp = _smtp_connect()
             smtp.sendmail(from_email, [mailto], msg.as_string())
         except smtplib.SMTPException as err:
             _log.exception(err)
     if smtp:
         smtp.quit()
+    if queued:
+        queue_emails(queued)
     return msg
 
 
@@ -1105,15 +1370,7 @@ def notify_new_commits(abspath, project, branch, commits):
     """
     # string note: abspath, project and branch can only contain ASCII
     # by policy (pagure)
-    commits_info = []
-    for commit in commits:
-        commits_info.append(
-            {
-                "commit": commit,
-                "author": pagure.lib.git.get_author(commit, abspath),
-                "subject": pagure.lib.git.get_commit_subject(commit, abspath),
-            }
-        )
+    commits_info = pagure.lib.git.get_commits_info(commits, abspath)
 
     # make sure this is unicode
     commits_string = "\n".join(
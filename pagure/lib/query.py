@@ -56,6 +56,7 @@ import pagure.lib.link
 import pagure.lib.login
 import pagure.lib.notify
 import pagure.lib.plugins
+import pagure.lib.search
 import pagure.lib.tasks
 import pagure.lib.tasks_services
 import pagure.pfmarkdown
@@ -225,6 +226,31 @@ def search_user(session, username=None, email=None, token=None, pattern=None):
     return output
 
 
+def get_users_by_emails(session, emails):
+    """Returns the users having one of the specified email addresses.
+
+    :arg session: the session to use to connect to the database.
+    :arg emails: the email addresses to look for
+    :type emails: iterable of string
+    :return: A dictionary associating the email addresses found to the
+        corresponding User object.
+    :rtype: dict
+
+    """
+    output = {}
+    emails = sorted(set(emails))
+    # Keep the number of parameters of each query reasonable
+    for idx in range(0, len(emails), 500):
+        query = (
+            session.query(model.UserEmail.email, model.User)
+            .filter(model.UserEmail.user_id == model.User.id)
+            .filter(model.UserEmail.email.in_(emails[idx : idx + 500]))
+        )
+        for email, user in query.all():
+            output[email] = user
+    return output
+
+
 def is_valid_ssh_key(key, fp_hash="SHA256"):
     """Validates the ssh key using ssh-keygen."""
     key = key.strip()
@@ -1098,6 +1124,7 @@ def add_user_to_project(
         session.add(access_obj)
         session.add(project)
         session.commit()
+        pagure.utils.invalidate_access_cache(project)
 
         pagure.lib.notify.log(
             project,
@@ -1124,6 +1151,7 @@ def add_user_to_project(
     session.add(project)
     # Commit so the JSON sent in the notification is up to date
     session.commit()
+    pagure.utils.invalidate_access_cache(project)
 
     pagure.lib.notify.log(
         project,
@@ -1208,6 +1236,7 @@ def add_group_to_project(
         session.add(project)
         # Commit so the JSON sent in the notification is up to date
         session.commit()
+        pagure.utils.invalidate_access_cache(project)
 
         pagure.lib.notify.log(
             project,
@@ -1235,6 +1264,7 @@ def add_group_to_project(
     session.add(project)
     # Commit so the JSON sent in the notification is up to date
     session.commit()
+    pagure.utils.invalidate_access_cache(project)
 
     pagure.lib.notify.log(
         project,
@@ -2835,9 +2865,11 @@ def search_issues(
     :type count: boolean
     :kwarg search_id: an integer to search in issues identifier
     :type search_id: int or None
-    :kwarg search_pattern: a string to search in issues title
+    :kwarg search_pattern: a string to search in issues title, using the
+        full-text search if FULLTEXT_SEARCH is enabled
     :type search_pattern: str or None
-    :kwarg search_content: a string to search in the issues comments
+    :kwarg search_content: a string to search in the issues content and
+        comments, using the full-text search if FULLTEXT_SEARCH is enabled
     :type search_content: str or None
     :kwarg custom_search: a dictionary of key/values to be used when
         searching issues with a custom key constraint
@@ -2849,7 +2881,8 @@ def search_issues(
     :type None, True, or False
     :kwarg order: Order issues in 'asc' or 'desc' order.
     :type order: None, str
-    :kwarg order_key: Order issues by database column
+    :kwarg order_key: Order issues by database column, or by ``relevance``
+        to the full-text search
     :type order_key: None, str
 
     :return: A single Issue object if issueid is specified, a list of Project
@@ -3043,7 +3076,14 @@ def search_issues(
                 sqlalchemy.or_((const for const in constraints))
             )
 
+    content_match = None
     if search_content is not None:
+        content_match = pagure.lib.search.match(
+            session, "issue", "content", search_content
+        )
+    if content_match is not None:
+        query = query.filter(content_match.criterion)
+    elif search_content is not None:
         query = query.outerjoin(model.IssueComment).filter(
             sqlalchemy.or_(
                 model.Issue.content.ilike("%%%s%%" % search_content),
@@ -3063,7 +3103,14 @@ def search_issues(
     if repo is not None:
         query = query.filter(model.Issue.project_id == repo.id)
 
+    pattern_match = None
     if search_pattern is not None:
+        pattern_match = pagure.lib.search.match(
+            session, "issue", "title", search_pattern
+        )
+    if pattern_match is not None:
+        query = query.filter(pattern_match.criterion)
+    elif search_pattern is not None:
         query = query.filter(
             model.Issue.title.ilike("%%%s%%" % search_pattern)
         )
@@ -3094,6 +3141,10 @@ def search_issues(
                 model.User, model.Issue.user_id == model.User.id
             )
             column = model.User.user
+        # If we are ordering by relevance, then order by how well the issues
+        # match the full-text search, the most recent first for a tie
+        elif order_key == "relevance" and (pattern_match or content_match):
+            column = (pattern_match or content_match).rank
         elif order_key in model.Issue.__table__.columns.keys():
             column = getattr(model.Issue, order_key)
 
@@ -3108,6 +3159,8 @@ def search_issues(
         query = query.order_by(asc(column))
     else:
         query = query.order_by(desc(column))
+    if order_key == "relevance":
+        query = query.order_by(desc(model.Issue.date_created))
 
     if issueid is not None or issueuid is not None:
         output = query.first()
@@ -3294,7 +3347,16 @@ def search_pull_requests(
                     model.PullRequest.uid.in_(list(final_set))
                 )
 
-    if search_pattern is not None:
+    pattern_match = None
+    if search_pattern is not None and "*" not in search_pattern:
+        pattern_match = pagure.lib.search.match(
+            session, "pull-request", "title", search_pattern
+        )
+    if pattern_match is not None:
+        query = query.filter(pattern_match.criterion)
+        if order_key == "relevance":
+            column = pattern_match.rank
+    elif search_pattern is not None:
         if "*" in search_pattern:
             search_pattern = search_pattern.replace("*", "%")
         else:
@@ -5380,6 +5442,7 @@ def set_project_owner(session, project, user, required_groups=None):
     project.user = user
     project.date_modified = datetime.datetime.utcnow()
     session.add(project)
+    pagure.utils.invalidate_access_cache(project)
 
 
 def get_pagination_metadata(
@@ -5653,7 +5716,23 @@ def get_authorized_project(
     :rtype: Project
 
     """
-    repo = _get_project(session, project_name, user, namespace)
+    # The same projects are looked up several times while processing a
+    # request, remember the ones found for the rest of the request.
+    cache = pagure.utils.get_request_cache("projects")
+    key = (id(session), project_name, user, namespace)
+    if not pagure_config.get("CASE_SENSITIVE", False):
+        key = (
+            id(session),
+            project_name.lower(),
+            user,
+            namespace.lower() if namespace else namespace,
+        )
+    if cache is not None and key in cache:
+        repo = cache[key]
+    else:
+        repo = _get_project(session, project_name, user, namespace)
+        if cache is not None and repo is not None:
+            cache[key] = repo
 
     if repo and repo.private and not pagure.utils.is_repo_user(repo, asuser):
         return None
@@ -5743,6 +5822,7 @@ def remove_user_of_project(session, user, project, agent):
             break
 
     session.commit()
+    pagure.utils.invalidate_access_cache(project)
 
     pagure.lib.notify.log(
         project,
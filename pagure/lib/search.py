@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+
+"""
+ (c) 2026 - Copyright Red Hat Inc
+
+Full-text search of the issues and pull-requests.
+
+When FULLTEXT_SEARCH is enabled, the searches in the title and content of
+the issues and pull-requests use:
+
+- on PostgreSQL, the GIN indexes on their ``to_tsvector`` (see model.py and
+  the corresponding alembic migration),
+- on SQLite, the ``search_index`` FTS5 table, filled as the issues, their
+  comments and the pull-requests are created or edited.
+
+On the other databases, or when it is disabled, the callers fall back to
+looking for the text anywhere in the columns with ILIKE.
+
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import logging
+import re
+
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
+
+from pagure.config import config as pagure_config
+from pagure.lib import model
+
+_log = logging.getLogger(__name__)
+
+# Text search configuration used on PostgreSQL, the words are not stemmed
+# as the issues are written in many different languages. It must match the
+# one of the indexes.
+PG_CONFIG = "simple"
+
+# Whether the sqlite library supports FTS5, None until checked
+_SQLITE_FTS5 = None
+
+# The FTS5 table used on SQLite, see SQLiteSearch
+SEARCH_INDEX = sa.table(
+    "search_index",
+    sa.column("ref"),
+    sa.column("uid"),
+    sa.column("kind"),
+    sa.column("title"),
+    sa.column("content"),
+    sa.column("rank"),
+)
+
+
+def _get_words(text):
+    """Return the words of the text searched."""
+    return re.findall(r"\w+", text or "", re.UNICODE)
+
+
+class Match(object):
+    """The issues or pull-requests matching a full-text search.
+
+    :attr criterion: the SQL criterion selecting the matching objects
+    :attr rank: a SQL expression whose value is higher for the objects
+        matching the search best
+
+    """
+
+    def __init__(self, criterion, rank):
+        self.criterion = criterion
+        self.rank = rank
+
+
+class PostgreSQLSearch(object):
+    """Full-text search using the GIN indexes of PostgreSQL."""
+
+    def _vector(self, column):
+        return sa.func.to_tsvector(
+            sa.literal_column("'%s'" % PG_CONFIG), column
+        )
+
+    def match(self, session, kind, field, words):
+        query = sa.func.to_tsquery(
+            sa.literal_column("'%s'" % PG_CONFIG),
+            " & ".join("%s:*" % word for word in words),
+        )
+        if kind == "pull-request":
+            vector = self._vector(model.PullRequest.title)
+            return Match(
+                vector.op("@@")(query), sa.func.ts_rank(vector, query)
+            )
+
+        vector = self._vector(getattr(model.Issue, field))
+        criterion = vector.op("@@")(query)
+        if field == "content":
+            comments = session.query(model.IssueComment.issue_uid).filter(
+                self._vector(model.IssueComment.comment).op("@@")(query)
+            )
+            criterion = sa.or_(criterion, model.Issue.uid.in_(comments))
+        return Match(criterion, sa.func.ts_rank(vector, query))
+
+
+class SQLiteSearch(object):
+    """Full-text search using a FTS5 table of SQLite.
+
+    The table has a row per issue, issue comment and pull-request:
+
+    - ref: what the row is about: ``issue:<uid>``, ``comment:<id>`` or
+      ``pull-request:<uid>``
+    - uid: the uid of the issue or pull-request, to match the results to
+    - kind: ``issue`` or ``pull-request``
+    - title: the title of the issue or pull-request
+    - content: the content of the issue or of the comment
+
+    """
+
+    @staticmethod
+    def create_table(connection):
+        """Create the FTS5 table, if it does not exist."""
+        connection.execute(
+            sa.text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING "
+                "fts5(ref UNINDEXED, uid UNINDEXED, kind UNINDEXED, "
+                "title, content)"
+            )
+        )
+
+    def match(self, session, kind, field, words):
+        self.create_table(session.connection())
+        # Quote the words, which then cannot be FTS5 operators, and look for
+        # the words starting with them
+        text = "%s : (%s)" % (
+            field,
+            " ".join('"%s"*' % word for word in words),
+        )
+        cls = model.PullRequest if kind == "pull-request" else model.Issue
+        matches = (
+            sa.literal_column("search_index").op("MATCH")(text),
+            SEARCH_INDEX.c.kind == kind,
+        )
+        uids = session.query(SEARCH_INDEX.c.uid).filter(*matches)
+        # bm25 ranks the best matches the lowest
+        rank = (
+            session.query(-sa.func.min(SEARCH_INDEX.c.rank))
+            .filter(*matches)
+            .filter(SEARCH_INDEX.c.uid == cls.uid)
+            .correlate(cls)
+            .scalar_subquery()
+        )
+        return Match(cls.uid.in_(uids), rank)
+
+    @classmethod
+    def index(cls, connection, ref, uid, kind, title, content):
+        """Add or update the specified row of the index."""
+        cls.create_table(connection)
+        connection.execute(
+            sa.text("DELETE FROM search_index WHERE ref = :ref"), {"ref": ref}
+        )
+        connection.execute(
+            sa.text(
+                "INSERT INTO search_index (ref, uid, kind, title, content) "
+                "VALUES (:ref, :uid, :kind, :title, :content)"
+            ),
+            {
+                "ref": ref,
+                "uid": uid,
+                "kind": kind,
+                "title": title or "",
+                "content": content or "",
+            },
+        )
+
+    @classmethod
+    def unindex(cls, connection, ref):
+        """Remove the specified row of the index."""
+        cls.create_table(connection)
+        connection.execute(
+            sa.text("DELETE FROM search_index WHERE ref = :ref"), {"ref": ref}
+        )
+
+
+def _sqlite_has_fts5(connection):
+    """Return whether the sqlite library supports FTS5."""
+    global _SQLITE_FTS5
+    if _SQLITE_FTS5 is None:
+        try:
+            SQLiteSearch.create_table(connection)
+            _SQLITE_FTS5 = True
+        except OperationalError:
+            _log.warning("SQLite does not support FTS5, not indexing")
+            _SQLITE_FTS5 = False
+    return _SQLITE_FTS5
+
+
+def get_backend(session):
+    """Return the full-text search backend to use with this session, or
+    None if the full-text search is disabled or not supported.
+    """
+    if not pagure_config.get("FULLTEXT_SEARCH", False):
+        return None
+    name = session.get_bind().dialect.name
+    if name == "postgresql":
+        return PostgreSQLSearch()
+    if name == "sqlite" and _sqlite_has_fts5(session.connection()):
+        return SQLiteSearch()
+    return None
+
+
+def match(session, kind, field, text):
+    """Return the Match of the issues or pull-requests whose field contains
+    the words of the text (or words starting with them), or None if the
+    search cannot be done with the full-text search.
+
+    :arg session: the session to use to connect to the database
+    :arg kind: ``issue`` or ``pull-request``
+    :arg field: ``title``, or ``content`` for the content and comments of
+        the issues
+    :arg text: the text searched
+
+    """
+    backend = get_backend(session)
+    words = _get_words(text)
+    if backend is None or not words:
+        return None
+    return backend.match(session, kind, field, words)
+
+
+def _sqlite_indexed(connection):
+    """Return whether the changes need to be indexed in the FTS5 table."""
+    return (
+        pagure_config.get("FULLTEXT_SEARCH", False)
+        and connection.dialect.name == "sqlite"
+        and _sqlite_has_fts5(connection)
+    )
+
+
+def _changed(target, *names):
+    """Return whether any of the given attributes of target was changed."""
+    state = sa.inspect(target)
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+
+@sa.event.listens_for(model.Issue, "after_insert")
+@sa.event.listens_for(model.Issue, "after_update")
+def _index_issue(mapper, connection, target):
+    if _sqlite_indexed(connection) and _changed(target, "title", "content"):
+        SQLiteSearch.index(
+            connection,
+            "issue:%s" % target.uid,
+            target.uid,
+            "issue",
+            target.title,
+            target.content,
+        )
+
+
+@sa.event.listens_for(model.IssueComment, "after_insert")
+@sa.event.listens_for(model.IssueComment, "after_update")
+def _index_issue_comment(mapper, connection, target):
+    if _sqlite_indexed(connection) and _changed(target, "comment"):
+        SQLiteSearch.index(
+            connection,
+            "comment:%s" % target.id,
+            target.issue_uid,
+            "issue",
+            None,
+            target.comment,
+        )
+
+
+@sa.event.listens_for(model.PullRequest, "after_insert")
+@sa.event.listens_for(model.PullRequest, "after_update")
+def _index_pull_request(mapper, connection, target):
+    if _sqlite_indexed(connection) and _changed(target, "title"):
+        SQLiteSearch.index(
+            connection,
+            "pull-request:%s" % target.uid,
+            target.uid,
+            "pull-request",
+            target.title,
+            None,
+        )
+
+
+@sa.event.listens_for(model.Issue, "after_delete")
+def _unindex_issue(mapper, connection, target):
+    if _sqlite_indexed(connection):
+        SQLiteSearch.unindex(connection, "issue:%s" % target.uid)
+
+
+@sa.event.listens_for(model.IssueComment, "after_delete")
+def _unindex_issue_comment(mapper, connection, target):
+    if _sqlite_indexed(connection):
+        SQLiteSearch.unindex(connection, "comment:%s" % target.id)
+
+
+@sa.event.listens_for(model.PullRequest, "after_delete")
+def _unindex_pull_request(mapper, connection, target):
+    if _sqlite_indexed(connection):
+        SQLiteSearch.unindex(connection, "pull-request:%s" % target.uid)
+
+
+def reindex(session):
+    """Rebuild the full-text index from the content of the database.
+
+    This is only needed on SQLite, after enabling FULLTEXT_SEARCH on an
+    existing instance, PostgreSQL keeps its indexes up to date itself.
+
+    :return: the number of rows indexed, or None if there is no index to
+        rebuild
+    :rtype: int or None
+
+    """
+    connection = session.connection()
+    if connection.dialect.name != "sqlite" or not _sqlite_has_fts5(connection):
+        return None
+
+    connection.execute(sa.text("DELETE FROM search_index"))
+    count = 0
+    for issue in session.query(model.Issue).yield_per(500):
+        SQLiteSearch.index(
+            connection,
+            "issue:%s" % issue.uid,
+            issue.uid,
+            "issue",
+            issue.title,
+            issue.content,
+        )
+        count += 1
+    for comment in session.query(model.IssueComment).yield_per(500):
+        SQLiteSearch.index(
+            connection,
+            "comment:%s" % comment.id,
+            comment.issue_uid,
+            "issue",
+            None,
+            comment.comment,
+        )
+        count += 1
+    for request in session.query(model.PullRequest).yield_per(500):
+        SQLiteSearch.index(
+            connection,
+            "pull-request:%s" % request.uid,
+            request.uid,
+            "pull-request",
+            request.title,
+            None,
+        )
+        count += 1
+    return count
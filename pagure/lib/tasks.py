@@ -13,6 +13,7 @@ from __future__ import absolute_import, unicode_literals
 import collections
 import datetime
 import hashlib
+import json
 import os
 import os.path
 import subprocess
@@ -290,6 +291,99 @@ def update_git(
     return result
 
 
+@conn.task(queue=pagure_config.get("SLOW_CELERY_QUEUE", None), bind=True)
+@pagure_task
+def update_git_batch(self, session, name, namespace, user, repotype):
+    """Update, in a single commit, the JSON representation of all the
+    tickets or pull-requests of a project queued for update since this
+    task was scheduled.
+    """
+    if pagure.lib.query.REDIS is None:
+        pagure.lib.query.set_redis(
+            host=pagure_config.get("REDIS_HOST", None),
+            port=pagure_config.get("REDIS_PORT", None),
+            socket=pagure_config.get("REDIS_SOCKET", None),
+            dbname=pagure_config["REDIS_DB"],
+        )
+
+    key = pagure.lib.git.get_update_git_key(name, namespace, user, repotype)
+    processing = key + ".processing"
+
+    project = pagure.lib.query._get_project(
+        session, namespace=namespace, name=name, user=user
+    )
+    if project is None:
+        _log.info(
+            "Project %s/%s from user %s no longer exists, dropping the "
+            "queued updates",
+            namespace,
+            name,
+            user,
+        )
+        pagure.lib.query.REDIS.delete(key, key + ".scheduled", processing)
+        return
+
+    # Objects queued from now on will be picked by a new task, while the
+    # ones queued so far are kept aside until they are written to git.
+    # Objects left aside by a task that died are picked up as well.
+    pipeline = pagure.lib.query.REDIS.pipeline()
+    pipeline.delete(key + ".scheduled")
+    pipeline.sunionstore(processing, [processing, key])
+    pipeline.delete(key)
+    pipeline.smembers(processing)
+    uids = [
+        uid.decode("utf-8") if isinstance(uid, bytes) else uid
+        for uid in pipeline.execute()[3]
+    ]
+
+    if repotype == "tickets":
+        project_lock = "WORKER_TICKET"
+        model = pagure.lib.model.Issue
+    else:
+        project_lock = "WORKER_REQUEST"
+        model = pagure.lib.model.PullRequest
+
+    try:
+        with project.lock(project_lock):
+            objs = []
+            if uids:
+                objs = (
+                    session.query(model)
+                    .filter(model.uid.in_(uids))
+                    .order_by(model.uid)
+                    .all()
+                )
+
+            _log.info(
+                "Updating %s objects in the %s repo of %s",
+                len(objs),
+                repotype,
+                project.fullname,
+            )
+            result = pagure.lib.git._update_git_objects(
+                objs, project, repotype
+            )
+    except Exception:
+        _log.exception(
+            "Failed to update the %s repo of %s, queuing the objects again",
+            repotype,
+            project.fullname,
+        )
+        pipeline = pagure.lib.query.REDIS.pipeline()
+        pipeline.sunionstore(key, [key, processing])
+        pipeline.delete(processing)
+        pipeline.execute()
+        pagure.lib.git.schedule_update_git_batch(
+            (name, namespace, user, repotype),
+            pagure_config.get("GIT_UPDATE_COALESCE_WINDOW") or 60,
+            force=True,
+        )
+        raise
+
+    pagure.lib.query.REDIS.delete(processing)
+    return result
+
+
 @conn.task(queue=pagure_config.get("SLOW_CELERY_QUEUE", None), bind=True)
 @pagure_task
 def clean_git(self, session, name, namespace, user, obj_repotype, obj_uid):
@@ -770,6 +864,69 @@ def update_checksums_file(self, session, folder, filenames):
                 )
 
 
+_COMMITS_STATS_CACHE = collections.OrderedDict()
+_COMMITS_STATS_CACHE_SIZE = 128
+
+
+def _get_commits_stats_cache_key(kind, repopath):
+    """Return the key under which the specified kind of statistics about
+    the commits of the given git repository are cached.
+    """
+    return "pagure.commits_stats.%s.%s" % (kind, repopath)
+
+
+def get_cached_commits_stats(kind, repopath):
+    """Return the statistics about the commits of the specified git
+    repository last computed, along with the commit they were computed
+    at (as the ``head`` key), or None if they are not known.
+    """
+    key = _get_commits_stats_cache_key(kind, repopath)
+    if pagure.lib.query.REDIS is not None:
+        value = pagure.lib.query.REDIS.get(key)
+        return json.loads(value) if value else None
+
+    value = _COMMITS_STATS_CACHE.get(key)
+    if value is not None:
+        _COMMITS_STATS_CACHE.move_to_end(key)
+    return value
+
+
+def set_cached_commits_stats(kind, repopath, stats):
+    """Store the statistics about the commits of the specified git
+    repository, as returned by ``get_cached_commits_stats``.
+    """
+    key = _get_commits_stats_cache_key(kind, repopath)
+    if pagure.lib.query.REDIS is not None:
+        pagure.lib.query.REDIS.set(
+            key,
+            json.dumps(stats),
+            ex=pagure_config["COMMITS_STATS_CACHE_TIMEOUT"],
+        )
+        return
+
+    _COMMITS_STATS_CACHE[key] = stats
+    while len(_COMMITS_STATS_CACHE) > _COMMITS_STATS_CACHE_SIZE:
+        _COMMITS_STATS_CACHE.popitem(last=False)
+
+
+def _walk_new_commits(repo_obj, head, cached):
+    """Returns a walker over the commits reachable from ``head`` not yet
+    accounted for in the ``cached`` statistics and whether these
+    statistics can be updated with them (rather than computed again).
+    """
+    walker = repo_obj.walk(head, pygit2.GIT_SORT_NONE)
+    if cached is None:
+        return walker, False
+    try:
+        # Not the case if the branch was force-pushed
+        incremental = repo_obj.descendant_of(head, cached["head"])
+    except (KeyError, ValueError, pygit2.GitError):
+        incremental = False
+    if incremental:
+        walker.hide(cached["head"])
+    return walker, incremental
+
+
 @conn.task(queue=pagure_config.get("FAST_CELERY_QUEUE", None), bind=True)
 @pagure_task
 def commits_author_stats(self, session, repopath):
@@ -782,29 +939,58 @@ def commits_author_stats(self, session, repopath):
 
     repo_obj = pygit2.Repository(repopath)
 
-    stats = collections.defaultdict(int)
-    number_of_commits = 0
-    authors_email = set()
     try:
-        for commit in repo_obj.walk(
-            repo_obj.head.peel().oid.hex, pygit2.GIT_SORT_NONE
-        ):
-            # For each commit record how many times each combination of name and
-            # e-mail appears in the git history.
-            number_of_commits += 1
-            email = commit.author.email
-            author = commit.author.name
-            stats[(author, email)] += 1
+        head = repo_obj.head.peel().oid.hex
     except pygit2.errors.GitError as e:
         return e
 
+    cached = get_cached_commits_stats("authors", repopath)
+    if cached is None or cached["head"] != head:
+        walker, incremental = _walk_new_commits(repo_obj, head, cached)
+        if incremental:
+            stats = collections.defaultdict(
+                int, {(n, e): v for n, e, v in cached["authors"]}
+            )
+            number_of_commits = cached["commits"]
+            last_commit_time = cached["last_commit_time"]
+        else:
+            stats = collections.defaultdict(int)
+            number_of_commits = 0
+            last_commit_time = None
+        try:
+            for commit in walker:
+                # For each commit record how many times each combination of
+                # name and e-mail appears in the git history.
+                number_of_commits += 1
+                stats[(commit.author.name, commit.author.email)] += 1
+                if not incremental:
+                    last_commit_time = commit.commit_time
+        except pygit2.errors.GitError as e:
+            return e
+        cached = {
+            "head": head,
+            "commits": number_of_commits,
+            "authors": [
+                [name, email, val] for (name, email), val in stats.items()
+            ],
+            "last_commit_time": last_commit_time,
+        }
+        set_cached_commits_stats("authors", repopath, cached)
+
+    stats = collections.defaultdict(int)
+    for name, email, val in cached["authors"]:
+        stats[(name, email)] += val
+
+    users = pagure.lib.query.get_users_by_emails(
+        session, [email for _, email in stats if email]
+    )
     for (name, email), val in list(stats.items()):
         if not email:
             # Author email is missing in the git commit.
             continue
         # For each recorded user info, check if we know the e-mail address of
         # the user.
-        user = pagure.lib.query.search_user(session, email=email)
+        user = users.get(email)
         if user and (user.default_email != email or user.fullname != name):
             # We know the the user, but the name or e-mail used in Git commit
             # does not match their default e-mail address and full name. Let's
@@ -816,6 +1002,7 @@ def commits_author_stats(self, session, repopath):
     # authored. The list consists of tuples with number of commits and people
     # with that number of commits. Each contributor is represented by a tuple
     # of name, e-mail address and avatar url.
+    authors_email = set()
     out_stats = collections.defaultdict(list)
     for authors, val in stats.items():
         authors_email.add(authors[1])
@@ -829,10 +1016,10 @@ def commits_author_stats(self, session, repopath):
     ]
 
     return (
-        number_of_commits,
+        cached["commits"],
         out_list,
         len(authors_email),
-        commit.commit_time,
+        cached["last_commit_time"],
     )
 
 
@@ -848,23 +1035,39 @@ def commits_history_stats(self, session, repopath):
 
     repo_obj = pygit2.Repository(repopath)
 
-    dates = collections.defaultdict(int)
-
     try:
-        for commit in repo_obj.walk(
-            repo_obj.head.peel().oid.hex, pygit2.GIT_SORT_NONE
-        ):
-            delta = (
-                datetime.datetime.utcnow()
-                - arrow.get(commit.commit_time).naive
-            )
-            if delta.days > 365:
-                break
-            dates[arrow.get(commit.commit_time).date().isoformat()] += 1
+        head = repo_obj.head.peel().oid.hex
     except pygit2.errors.GitError as e:
         return e
 
-    return [(key, dates[key]) for key in sorted(dates)]
+    cached = get_cached_commits_stats("history", repopath)
+    if cached is None or cached["head"] != head:
+        walker, incremental = _walk_new_commits(repo_obj, head, cached)
+        dates = collections.defaultdict(int)
+        if incremental:
+            dates.update(cached["dates"])
+        try:
+            for commit in walker:
+                delta = (
+                    datetime.datetime.utcnow()
+                    - arrow.get(commit.commit_time).naive
+                )
+                if delta.days > 365:
+                    break
+                dates[arrow.get(commit.commit_time).date().isoformat()] += 1
+        except pygit2.errors.GitError as e:
+            return e
+        cached = {"head": head, "dates": dates}
+        set_cached_commits_stats("history", repopath, cached)
+
+    # The statistics may have been computed some time ago, only keep the
+    # last year
+    oldest = (datetime.datetime.utcnow() - datetime.timedelta(days=366)).date()
+    return [
+        (key, cached["dates"][key])
+        for key in sorted(cached["dates"])
+        if key > oldest.isoformat()
+    ]
 
 
 @conn.task(queue=pagure_config.get("MEDIUM_CELERY_QUEUE", None), bind=True)
@@ -1053,6 +1256,57 @@ def git_garbage_collect(self, session, repopath):
     subprocess.check_output(["git", "gc", "--auto", "-q"], cwd=repopath)
 
 
+@conn.task(queue=pagure_config.get("MEDIUM_CELERY_QUEUE", None), bind=True)
+@pagure_task
+def update_commits_index(self, session, repopath, changes):
+    """Index the commits reachable from the specified revisions so that
+    the commits page does not have to walk the whole history.
+
+    :arg repopath: the path to the git repo to index
+    :type repopath: str
+    :arg changes: list of (oldrev, newrev) tuples, oldrev being the
+        revision the branch pointed to before the change or None
+    :type changes: list
+
+    """
+    repo_obj = pygit2.Repository(repopath)
+    default_head = None
+    if not repo_obj.is_empty and not repo_obj.head_is_unborn:
+        default_head = repo_obj.head.target.hex
+
+    for oldrev, newrev in changes:
+        if not isinstance(repo_obj.get(newrev), pygit2.Commit):
+            continue
+        if not oldrev or set(oldrev) == set("0"):
+            # New branch, most likely forked off the default one
+            oldrev = default_head
+        _log.info("Indexing commits of %s in %s", newrev, repopath)
+        pagure.lib.git.index_commits(repo_obj, newrev, oldrev=oldrev)
+
+    pagure.lib.git.prune_commits_index(repo_obj)
+
+
+@conn.task(queue=pagure_config.get("MEDIUM_CELERY_QUEUE", None), bind=True)
+@pagure_task
+def compute_blame(self, session, repopath, filename, commitid):
+    """Compute the blame of a file at the specified commit and store it in
+    the blame cache.
+
+    :arg repopath: the path to the git repo
+    :type repopath: str
+    :arg filename: the path of the file in the git repo
+    :type filename: str
+    :arg commitid: the commit at which to blame the file
+    :type commitid: str
+
+    """
+    repo_obj = pygit2.Repository(repopath)
+    if pagure.lib.git.get_cached_blame(repo_obj, filename, commitid):
+        return
+    _log.info("Blaming %s at %s in %s", filename, commitid, repopath)
+    pagure.lib.git.compute_blame(repo_obj, filename, commitid)
+
+
 @conn.task(queue=pagure_config.get("FAST_CELERY_QUEUE", None), bind=True)
 @pagure_task
 def generate_archive(
@@ -10,23 +10,31 @@
 
 from __future__ import absolute_import, unicode_literals
 
+import collections
+import concurrent.futures
 import datetime
+import functools
 import hashlib
 import hmac
 import importlib
 import json
 import os.path
+import threading
 import time
 import uuid
 
 import requests
 import six
+import sqlalchemy.orm
 from celery import Celery
 from celery.signals import after_setup_task_logger
 from celery.utils.log import get_task_logger
 from kitchen.text.converters import to_bytes
+from six.moves.urllib_parse import urlparse
 from sqlalchemy.exc import SQLAlchemyError
 
+import pagure.lib.model
+import pagure.lib.notify
 import pagure.lib.query
 from pagure.config import config as pagure_config
 from pagure.lib.tasks_utils import pagure_task
@@ -64,7 +72,12 @@ def augment_celery_log(**kwargs):
 
 
 def call_web_hooks(project, topic, msg, urls):
-    """Sends the web-hook notification."""
+    """Sends the web-hook notification to the specified URLs, concurrently,
+    and logs the outcome of the deliveries in the database.
+
+    The URLs whose last deliveries all failed are not called, until
+    ``WEBHOOK_CIRCUIT_BREAKER_DELAY`` has passed.
+    """
     _log.info("Processing project: %s - topic: %s", project.fullname, topic)
     _log.debug("msg: %s", msg)
 
@@ -103,20 +116,178 @@ def call_web_hooks(project, topic, msg, urls):
         "X-Pagure-Topic": topic,
         "Content-Type": "application/json",
     }
-    for url in sorted(urls):
-        url = url.strip()
-        _log.info("Calling url %s" % url)
-        try:
-            req = requests.post(url, headers=headers, data=content, timeout=60)
-            if not req:
-                _log.info(
-                    "An error occured while querying: %s - "
-                    "Error code: %s" % (url, req.status_code)
-                )
-        except (requests.exceptions.RequestException, Exception) as err:
+    session = sqlalchemy.orm.object_session(project)
+    urls = sorted(set(url.strip() for url in urls if url.strip()))
+    deliveries = {}
+    for url in urls:
+        if _is_web_hook_failing(session, url):
+            _log.info("Not calling url %s, it keeps failing", url)
+            deliveries[url] = (None, "Endpoint failing, not called", 0, None)
+    pending = [url for url in urls if url not in deliveries]
+    if pending:
+        executor = _get_web_hooks_executor()
+        for url, result in zip(
+            pending,
+            executor.map(
+                lambda url: _deliver_web_hook(url, headers, content), pending
+            ),
+        ):
+            deliveries[url] = result
+
+    for url in urls:
+        status_code, error, attempts, latency = deliveries[url]
+        if error:
             _log.info(
-                "An error occured while querying: %s - Error: %s" % (url, err)
+                "An error occured while querying: %s - Error: %s", url, error
+            )
+        session.add(
+            pagure.lib.model.WebhookDelivery(
+                project_id=project.id,
+                url=url,
+                topic=msg["topic"],
+                msg_id=msg["msg_id"],
+                status_code=status_code,
+                error=error,
+                attempts=attempts,
+                latency=latency,
+            )
+        )
+    session.flush()
+
+    # Only keep the most recent deliveries of the project
+    oldest_kept = (
+        session.query(pagure.lib.model.WebhookDelivery.id)
+        .filter(pagure.lib.model.WebhookDelivery.project_id == project.id)
+        .order_by(pagure.lib.model.WebhookDelivery.id.desc())
+        .offset(pagure_config["WEBHOOK_DELIVERIES_KEPT"])
+        .limit(1)
+        .scalar()
+    )
+    if oldest_kept:
+        session.query(pagure.lib.model.WebhookDelivery).filter(
+            pagure.lib.model.WebhookDelivery.project_id == project.id
+        ).filter(pagure.lib.model.WebhookDelivery.id <= oldest_kept).delete(
+            synchronize_session=False
+        )
+    try:
+        session.commit()
+    except SQLAlchemyError:
+        session.rollback()
+        _log.exception("Could not log the web-hook deliveries")
+
+
+_WEB_HOOKS_LOCK = threading.Lock()
+_WEB_HOOKS_EXECUTOR = None
+_WEB_HOOKS_SESSION = None
+_WEB_HOOKS_HOSTS = {}
+
+
+def _get_web_hooks_executor():
+    """Returns the pool of threads delivering the web-hook notifications."""
+    global _WEB_HOOKS_EXECUTOR
+    with _WEB_HOOKS_LOCK:
+        if _WEB_HOOKS_EXECUTOR is None:
+            _WEB_HOOKS_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+                max_workers=pagure_config["WEBHOOK_MAX_WORKERS"],
+                thread_name_prefix="webhook",
+            )
+    return _WEB_HOOKS_EXECUTOR
+
+
+def _get_web_hooks_session():
+    """Returns the HTTP session, keeping the connections to the web-hook
+    endpoints open, used to deliver the notifications."""
+    global _WEB_HOOKS_SESSION
+    with _WEB_HOOKS_LOCK:
+        if _WEB_HOOKS_SESSION is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=pagure_config["WEBHOOK_MAX_WORKERS"],
+                pool_maxsize=pagure_config["WEBHOOK_MAX_PER_HOST"],
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _WEB_HOOKS_SESSION = session
+    return _WEB_HOOKS_SESSION
+
+
+def _get_host_semaphore(host):
+    """Returns the semaphore limiting the number of notifications delivered
+    concurrently to the specified host."""
+    with _WEB_HOOKS_LOCK:
+        if host not in _WEB_HOOKS_HOSTS:
+            _WEB_HOOKS_HOSTS[host] = threading.BoundedSemaphore(
+                pagure_config["WEBHOOK_MAX_PER_HOST"]
+            )
+        return _WEB_HOOKS_HOSTS[host]
+
+
+def _deliver_web_hook(url, headers, content):
+    """Deliver the web-hook notification to the specified URL, trying again
+    a few times, waiting longer after each attempt, if the endpoint could
+    not be reached or had an error.
+
+    :return: the status code of the last response (None if there were
+        none), the error (None if the notification was delivered), the
+        number of attempts and the duration of the last one.
+
+    """
+    http = _get_web_hooks_session()
+    retries = pagure_config["WEBHOOK_RETRIES"]
+    with _get_host_semaphore(urlparse(url).netloc):
+        for attempt in range(1, retries + 2):
+            start = time.time()
+            status_code = None
+            error = None
+            try:
+                req = http.post(
+                    url,
+                    headers=headers,
+                    data=content,
+                    timeout=pagure_config["WEBHOOK_TIMEOUT"],
+                )
+                status_code = req.status_code
+                if not req.ok:
+                    error = "Error code: %s" % status_code
+            except (requests.exceptions.RequestException, Exception) as err:
+                error = "%s" % err
+            latency = time.time() - start
+            # Client errors are not going to be fixed by trying again
+            if (
+                error is None
+                or (status_code and status_code < 500 and status_code != 429)
+                or attempt > retries
+            ):
+                break
+            time.sleep(
+                pagure_config["WEBHOOK_RETRY_DELAY"] * 2 ** (attempt - 1)
             )
+    return status_code, error, attempt, latency
+
+
+def _is_web_hook_failing(session, url):
+    """Returns whether the deliveries to the specified URL have failed so
+    many times recently that it should not be called for a while."""
+    threshold = pagure_config["WEBHOOK_CIRCUIT_BREAKER_THRESHOLD"]
+    if not threshold:
+        return False
+    last = (
+        session.query(pagure.lib.model.WebhookDelivery)
+        .filter(pagure.lib.model.WebhookDelivery.url == url)
+        .filter(pagure.lib.model.WebhookDelivery.attempts > 0)
+        .order_by(pagure.lib.model.WebhookDelivery.id.desc())
+        .limit(threshold)
+        .all()
+    )
+    if len(last) < threshold or any(d.error is None for d in last):
+        return False
+    # Try again once the endpoint had some time to recover
+    return last[0].date_created > (
+        datetime.datetime.utcnow()
+        - datetime.timedelta(
+            seconds=pagure_config["WEBHOOK_CIRCUIT_BREAKER_DELAY"]
+        )
+    )
 
 
 @conn.task(queue=pagure_config.get("WEBHOOK_CELERY_QUEUE", None), bind=True)
@@ -161,6 +332,21 @@ def webhook_notification(
     call_web_hooks(project, topic, msg, urls)
 
 
+@conn.task(queue=pagure_config.get("EMAIL_CELERY_QUEUE", None), bind=True)
+@pagure_task
+def send_queued_emails(self, session):
+    """Send the emails waiting in the outbox, one batch at a time.
+
+    :arg session: SQLAlchemy session object
+    :type session: sqlalchemy.orm.session.Session
+
+    """
+    next_in = pagure.lib.notify.send_queued_emails(session)
+    if next_in is not None:
+        # Continue with the next batch or come back for the emails to retry
+        send_queued_emails.apply_async(countdown=next_in)
+
+
 @conn.task(queue=pagure_config.get("LOGCOM_CELERY_QUEUE", None), bind=True)
 @pagure_task
 def log_commit_send_notifications(
@@ -232,38 +418,50 @@ def log_commit_send_notifications(
 
 
 def get_files_to_load(title, new_commits_list, abspath):
+    """Return the files changed by the specified commits, listed by a
+    single git diff-tree process reading the commits on its standard input.
+    """
+    _log.info(
+        "%s: Retrieve the list of files changed in %s commits",
+        title,
+        len(new_commits_list),
+    )
+    if not new_commits_list:
+        return []
+    filenames = pagure.lib.git.read_git_lines(
+        [
+            # Do not quote the paths having non-ASCII characters
+            "-c",
+            "core.quotepath=off",
+            "diff-tree",
+            "--stdin",
+            "--no-commit-id",
+            "--name-only",
+            "-r",
+            "--root",
+        ],
+        abspath,
+        input=to_bytes("\n".join(new_commits_list) + "\n"),
+    )
+    return list(
+        collections.OrderedDict.fromkeys(
+            line.strip() for line in filenames if line.strip()
+        )
+    )
 
-    _log.info("%s: Retrieve the list of files changed" % title)
-    file_list = []
-    new_commits_list.reverse()
-    n = len(new_commits_list)
-    for idx, commit in enumerate(new_commits_list):
-        if (idx % 100) == 0:
-            _log.info(
-                "Loading files change in commits for %s: %s/%s", title, idx, n
-            )
-        if commit == new_commits_list[0]:
-            filenames = pagure.lib.git.read_git_lines(
-                [
-                    "diff-tree",
-                    "--no-commit-id",
-                    "--name-only",
-                    "-r",
-                    "--root",
-                    commit,
-                ],
-                abspath,
-            )
-        else:
-            filenames = pagure.lib.git.read_git_lines(
-                ["diff-tree", "--no-commit-id", "--name-only", "-r", commit],
-                abspath,
-            )
-        for line in filenames:
-            if line.strip():
-                file_list.append(line.strip())
 
-    return file_list
+def _load_json_file(filename, abspath):
+    """Return the JSON content of the specified file at HEAD, if any."""
+    json_data = None
+    data = "".join(
+        pagure.lib.git.read_git_lines(["show", "HEAD:%s" % filename], abspath)
+    )
+    if data and not filename.startswith("files/"):
+        try:
+            json_data = json.loads(data)
+        except ValueError:
+            pass
+    return json_data
 
 
 @conn.task(queue=pagure_config.get("LOADJSON_CELERY_QUEUE", None), bind=True)
@@ -312,7 +510,7 @@ def load_json_commits_to_db(
         abspath,
     )
 
-    file_list = set(get_files_to_load(project.fullname, commits, abspath))
+    file_list = sorted(get_files_to_load(project.fullname, commits, abspath))
     n = len(file_list)
     _log.info("LOADJSON: %s files to process" % n)
     mail_body = [
@@ -324,7 +522,15 @@ def load_json_commits_to_db(
         "",
     ]
 
-    for idx, filename in enumerate(sorted(file_list)):
+    # The files are read and parsed in parallel, but loaded in the database
+    # one after the other, in order, using the session of the task.
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=pagure_config.get("LOADJSON_MAX_WORKERS", 4)
+    )
+    loaded = executor.map(
+        functools.partial(_load_json_file, abspath=abspath), file_list
+    )
+    for idx, filename in enumerate(file_list):
         _log.info(
             "LOADJSON: Loading: %s: %s -- %s/%s",
             project.fullname,
@@ -335,16 +541,7 @@ def load_json_commits_to_db(
         tmp = "Loading: %s -- %s/%s" % (filename, idx + 1, n)
         try:
             json_data = None
-            data = "".join(
-                pagure.lib.git.read_git_lines(
-                    ["show", "HEAD:%s" % filename], abspath
-                )
-            )
-            if data and not filename.startswith("files/"):
-                try:
-                    json_data = json.loads(data)
-                except ValueError:
-                    pass
+            json_data = next(loaded)
             if json_data:
                 if data_type == "ticket":
                     pagure.lib.git.update_ticket_from_git(
@@ -378,6 +575,8 @@ def load_json_commits_to_db(
             break
         finally:
             mail_body.append(tmp)
+    # Do not read the files left if the loading stopped on an error
+    executor.shutdown(wait=False, cancel_futures=True)
 
     try:
         session.commit()
@@ -14,10 +14,10 @@ import base64
 import logging
 import os
 import subprocess
-import tempfile
+import threading
 
 import flask
-import werkzeug.wsgi
+import werkzeug.exceptions
 
 import pagure.exceptions
 import pagure.forms
@@ -154,56 +154,106 @@ def proxy_raw_git(project):
     _log.debug("Running git via git directly")
     cmd = ["/usr/bin/git", "http-backend"]
 
-    # Note: using a temporary files to buffer the input contents
-    # is non-ideal, but it is a way to make sure we don't need to have
-    # the full input (which can be very long) in memory.
-    # Ideally, we'd directly stream, but that's an RFE for the future,
-    # since that needs to happen in other threads so as to not block.
-    # (See the warnings in the subprocess module)
-    with tempfile.SpooledTemporaryFile() as infile:
-        while True:
-            block = flask.request.stream.read(4096)
-            if not block:
-                break
-            infile.write(block)
-        infile.seek(0)
+    _log.debug("Calling: %s", cmd)
+    proc = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=None,
+        env=gitenv,
+    )
 
-        _log.debug("Calling: %s", cmd)
-        proc = subprocess.Popen(
-            cmd, stdin=infile, stdout=subprocess.PIPE, stderr=None, env=gitenv
-        )
+    # Stream the request body to git from another thread while this one
+    # reads its output, so neither side can block the other. The pipe to git
+    # provides the backpressure: the feeder only reads from the client as
+    # fast as git consumes. Compressed bodies are passed as-is, git decodes
+    # them according to HTTP_CONTENT_ENCODING.
+    feeder = threading.Thread(
+        target=_feed_stdin,
+        args=(flask.request.stream, proc.stdin),
+        name="git-http-backend-feeder",
+    )
+    feeder.daemon = True
+    feeder.start()
+
+    out = proc.stdout
+
+    # First, gather the response head
+    headers = {}
+    while True:
+        line = out.readline()
+        if not line:
+            _cleanup_proc(proc, feeder)
+            raise Exception("End of file while reading headers?")
+        # This strips the \n, meaning end-of-headers
+        line = line.strip()
+        if not line:
+            break
+        header = line.decode("utf-8").split(": ", 1)
+        headers[str(header[0].lower())] = header[1]
+
+    if len(headers) == 0:
+        _cleanup_proc(proc, feeder)
+        raise Exception("No response at all received")
+
+    if "status" not in headers:
+        # If no status provided, assume 200 OK as per RFC3875
+        headers[str("status")] = "200 OK"
+
+    respcode, respmsg = headers.pop("status").split(" ", 1)
+    return flask.Response(
+        _stream_stdout(proc, feeder),
+        status=int(respcode),
+        headers=headers,
+        direct_passthrough=True,
+    )
 
-        out = proc.stdout
 
-        # First, gather the response head
-        headers = {}
+def _feed_stdin(stream, stdin, blocksize=65536):
+    """Copy the content of the request ``stream`` into the ``stdin`` pipe
+    of git, closing it once everything has been sent.
+    """
+    try:
         while True:
-            line = out.readline()
-            if not line:
-                raise Exception("End of file while reading headers?")
-            # This strips the \n, meaning end-of-headers
-            line = line.strip()
-            if not line:
+            block = stream.read(blocksize)
+            if not block:
                 break
-            header = line.split(b": ", 1)
-            header[0] = header[0].decode("utf-8")
-            headers[str(header[0].lower())] = header[1]
-
-        if len(headers) == 0:
-            raise Exception("No response at all received")
-
-        if "status" not in headers:
-            # If no status provided, assume 200 OK as per RFC3875
-            headers[str("status")] = "200 OK"
-
-        respcode, respmsg = headers.pop("status").split(" ", 1)
-        wrapout = werkzeug.wsgi.wrap_file(flask.request.environ, out)
-        return flask.Response(
-            wrapout,
-            status=int(respcode),
-            headers=headers,
-            direct_passthrough=True,
-        )
+            stdin.write(block)
+    except (
+        IOError,
+        OSError,
+        ValueError,
+        werkzeug.exceptions.ClientDisconnected,
+    ):
+        # git closed its input early (or the client went away), there is
+        # no one left to send the rest of the body to.
+        _log.debug("Stopped streaming the request body to git")
+    finally:
+        try:
+            stdin.close()
+        except (IOError, OSError):
+            pass
+
+
+def _cleanup_proc(proc, feeder):
+    """Wait for the git process and the thread feeding it to finish."""
+    proc.stdout.close()
+    feeder.join()
+    proc.wait()
+
+
+def _stream_stdout(proc, feeder, blocksize=65536):
+    """Yield the output of git as it comes and clean up once done or once
+    the client disconnects.
+    """
+    try:
+        while True:
+            block = proc.stdout.read1(blocksize)
+            if not block:
+                break
+            yield block
+    finally:
+        _cleanup_proc(proc, feeder)
 
 
 def clone_proxy(project, username=None, namespace=None):
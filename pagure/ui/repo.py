@@ -357,20 +357,37 @@ def view_commits(repo, branchname=None, username=None, namespace=None):
     start = limit * (page - 1)
     end = limit * page
 
+    emails = None
+    if author_obj:
+        emails = set(email.email for email in author_obj.emails)
+
     n_commits = 0
     last_commits = []
+    index = None
     if commit:
+        index = pagure.lib.git.CommitsIndex.get(repo_obj, commit.hex)
+        if (
+            index is None
+            and branch
+            and pagure_config.get("COMMITS_INDEX_FOLDER")
+        ):
+            # Index this branch for the next time
+            pagure.lib.tasks.update_commits_index.delay(
+                repo_obj.path, [(None, commit.hex)]
+            )
+
+    if index is not None:
+        # Seek directly to the page requested
+        n_commits = index.count if emails is None else index.count_for(emails)
+        last_commits = [
+            repo_obj[oid] for oid in index.get_commits(start, end, emails)
+        ]
+    elif commit:
         for commit in repo_obj.walk(commit.hex, pygit2.GIT_SORT_NONE):
 
             # Filters the commits for a user
-            if author_obj:
-                tmp = False
-                for email in author_obj.emails:
-                    if email.email == commit.author.email:
-                        tmp = True
-                        break
-                if not tmp:
-                    continue
+            if emails is not None and commit.author.email not in emails:
+                continue
 
             if n_commits >= start and n_commits <= end:
                 last_commits.append(commit)
@@ -799,7 +816,20 @@ def view_blame_file(repo, filename, username=None, namespace=None):
         _log.exception("File could not be decoded")
         flask.abort(500, description="File could not be decoded")
 
-    blame = repo_obj.blame(filename, newest_commit=commit.oid.hex)
+    blame = pagure.lib.git.get_cached_blame(repo_obj, filename, commit.oid.hex)
+    if blame is None and pagure_config.get("BLAME_CACHE_FOLDER"):
+        task = pagure.lib.tasks.compute_blame.delay(
+            repo_obj.path, filename, commit.oid.hex
+        )
+        blame = pagure.lib.git.get_cached_blame(
+            repo_obj, filename, commit.oid.hex
+        )
+        if blame is None:
+            return pagure.utils.wait_for_task(task)
+    elif blame is None:
+        blame = pagure.lib.git.compute_blame(
+            repo_obj, filename, commit.oid.hex
+        )
 
     return flask.render_template(
         "blame.html",
@@ -835,22 +865,19 @@ def view_history_file(repo, filename, username=None, namespace=None):
         except pygit2.GitError:
             flask.abort(400, description="Invalid repository")
 
+    limit = pagure_config["ITEM_PER_PAGE"]
+    start = limit * (flask.g.page - 1)
     try:
-        log = pagure.lib.repo.PagureRepo.log(
-            flask.g.reponame,
-            log_options=["--pretty=oneline", "--abbrev-commit"],
-            target=filename,
-            fromref=branchname,
-        )
-        if log.strip():
-            log = [line.split(" ", 1) for line in log.strip().split("\n")]
-        else:
-            log = []
+        n_commits, log = pagure.lib.git.get_file_history(
+            repo_obj, filename, branchname, start, start + limit - 1
+        )
     except Exception:
-        log = []
+        n_commits, log = 0, []
     if not log:
         flask.abort(400, description="No history could be found for this file")
 
+    total_page = int(ceil(n_commits / float(limit)))
+
     return flask.render_template(
         "file_history.html",
         select="tree",
@@ -861,6 +888,7 @@ def view_history_file(repo, filename, username=None, namespace=None):
         branchname=branchname,
         output_type="history",
         log=log,
+        total_page=total_page,
     )
 
 
@@ -2128,6 +2156,7 @@ def remove_group_project(repo, groupid, username=None, namespace=None):
         try:
             # Commit so the JSON sent on the notification is up to date
             flask.g.session.commit()
+            pagure.utils.invalidate_access_cache(repo)
             pagure.lib.notify.log(
                 repo,
                 topic="project.group.removed",
@@ -10,12 +10,15 @@
 
 from __future__ import absolute_import, unicode_literals
 
+import collections
 import datetime
 import fnmatch
 import logging
 import logging.config
 import os
 import re
+import threading
+import time
 from functools import wraps
 
 import flask
@@ -35,6 +38,12 @@ from pagure.exceptions import (
 _log = logging.getLogger(__name__)
 LOGGER_SETUP = False
 
+# Access of the users to the projects, kept across requests for
+# ACCESS_CACHE_TTL seconds: {(kind, project_id, username, ...): (expiry, ..)}
+_ACCESS_CACHE = collections.OrderedDict()
+_ACCESS_CACHE_SIZE = 4096
+_ACCESS_CACHE_LOCK = threading.Lock()
+
 
 def set_up_logging(app=None, force=False, configkey="LOGGING"):
     global LOGGER_SETUP
@@ -193,6 +202,64 @@ def is_admin():
     return not groups.isdisjoint(admins)
 
 
+def get_request_cache(name):
+    """Return the dictionary in which the current request caches the
+    results of the given kind, or None outside of a request.
+    """
+    if not flask.has_request_context():
+        return None
+    return flask.g.setdefault("_pagure_cache_%s" % name, {})
+
+
+def _cached_access(key, compute):
+    """Return the access described by key, computed by calling compute
+    at most once per request (and per ACCESS_CACHE_TTL seconds when set).
+    """
+    if key[1] is None:
+        # Project not saved yet
+        return compute()
+
+    request_cache = get_request_cache("access")
+    if request_cache is not None and key in request_cache:
+        return request_cache[key]
+
+    ttl = pagure_config.get("ACCESS_CACHE_TTL", 0)
+    value = None
+    if ttl:
+        with _ACCESS_CACHE_LOCK:
+            cached = _ACCESS_CACHE.get(key)
+        if cached and cached[0] > time.time():
+            value = cached[1]
+        else:
+            value = compute()
+            with _ACCESS_CACHE_LOCK:
+                _ACCESS_CACHE[key] = (time.time() + ttl, value)
+                _ACCESS_CACHE.move_to_end(key)
+                while len(_ACCESS_CACHE) > _ACCESS_CACHE_SIZE:
+                    _ACCESS_CACHE.popitem(last=False)
+    else:
+        value = compute()
+
+    if request_cache is not None:
+        request_cache[key] = value
+    return value
+
+
+def invalidate_access_cache(project):
+    """Forget the access computed for the users of the specified project,
+    to be called when its users, groups or owner change.
+    """
+    request_cache = get_request_cache("access")
+    if request_cache is not None:
+        for key in list(request_cache):
+            if key[1] == project.id:
+                del request_cache[key]
+    with _ACCESS_CACHE_LOCK:
+        for key in list(_ACCESS_CACHE):
+            if key[1] == project.id:
+                del _ACCESS_CACHE[key]
+
+
 def is_repo_admin(repo_obj, username=None):
     """Return whether the user is an admin of the provided repo."""
     if not authenticated():
@@ -206,25 +273,43 @@ def is_repo_admin(repo_obj, username=None):
     if is_admin():
         return True
 
-    usergrps = [usr.user for grp in repo_obj.admin_groups for usr in grp.users]
+    def _is_repo_admin():
+        usergrps = [
+            usr.user for grp in repo_obj.admin_groups for usr in grp.users
+        ]
 
-    return (
-        user == repo_obj.user.user
-        or (user in [usr.user for usr in repo_obj.admins])
-        or (user in usergrps)
-    )
+        return (
+            user == repo_obj.user.user
+            or (user in [usr.user for usr in repo_obj.admins])
+            or (user in usergrps)
+        )
+
+    return _cached_access(("admin", repo_obj.id, user), _is_repo_admin)
 
 
 def is_repo_committer(repo_obj, username=None, session=None):
     """Return whether the user is a committer of the provided repo."""
-    import pagure.lib.query
-
-    usergroups = set()
+    # The groups of the user logged in are taken into account
+    key = ("commit", repo_obj.id, username, username is None)
     if username is None:
         if not authenticated():
             return False
         if is_admin():
             return True
+        key = ("commit", repo_obj.id, flask.g.fas_user.username, True)
+
+    return _cached_access(
+        key, lambda: _is_repo_committer(repo_obj, username, session)
+    )
+
+
+def _is_repo_committer(repo_obj, username, session):
+    """Return whether the user is a committer of the provided repo,
+    see is_repo_committer."""
+    import pagure.lib.query
+
+    usergroups = set()
+    if username is None:
         username = flask.g.fas_user.username
         usergroups = set(flask.g.fas_user.groups)
 
@@ -339,13 +424,16 @@ def is_repo_user(repo_obj, username=None):
     if is_admin():
         return True
 
-    usergrps = [usr.user for grp in repo_obj.groups for usr in grp.users]
+    def _is_repo_user():
+        usergrps = [usr.user for grp in repo_obj.groups for usr in grp.users]
 
-    return (
-        user == repo_obj.user.user
-        or (user in [usr.user for usr in repo_obj.users])
-        or (user in usergrps)
-    )
+        return (
+            user == repo_obj.user.user
+            or (user in [usr.user for usr in repo_obj.users])
+            or (user in usergrps)
+        )
+
+    return _cached_access(("user", repo_obj.id, user), _is_repo_user)
 
 
 def get_user_repo_access(repo_obj, username):
@@ -1310,6 +1310,88 @@ class PagureListGroupTests(tests.Modeltests):
         self.assertEqual(len(groups), 1)
 
 
+class PagureEmailOutboxTests(tests.Modeltests):
+    """Tests for pagure-admin email-outbox"""
+
+    populate_db = False
+
+    def setUp(self):
+        """Set up the environnment, ran before every tests."""
+        super(PagureEmailOutboxTests, self).setUp()
+        pagure.cli.admin.session = self.session
+
+    @patch("sys.stdout", new_callable=StringIO)
+    def test_email_outbox(self, mock_stdout):
+        """Test the email-outbox function of pagure-admin"""
+        created = datetime.datetime(2026, 1, 1)
+        emails = []
+        for _ in range(2):
+            email = pagure.lib.model.EmailOutbox(
+                from_email="pagure@localhost.localdomain",
+                to_email="foo@bar.com",
+                message="Email content",
+                date_created=created,
+                next_attempt=created,
+            )
+            self.session.add(email)
+            emails.append(email)
+        self.session.commit()
+        emails[1].next_attempt = None
+        emails[1].last_error = "Gone"
+        self.session.add(emails[1])
+        self.session.commit()
+
+        args = munch.Munch()
+        pagure.cli.admin.do_email_outbox(args)
+
+        output = mock_stdout.getvalue().split("\n")
+        self.assertEqual(output[0], "Emails queued: 1")
+        self.assertEqual(output[1], "Emails failed: 1")
+        self.assertTrue(output[2].startswith("Oldest email queued since: "))
+        self.assertEqual(
+            output[3], "  2026-01-01 00:00:00 to foo@bar.com: Gone"
+        )
+
+
+class PagureSearchIndexTests(tests.Modeltests):
+    """Tests for pagure-admin search-index"""
+
+    def setUp(self):
+        """Set up the environnment, ran before every tests."""
+        super(PagureSearchIndexTests, self).setUp()
+        pagure.cli.admin.session = self.session
+
+    @patch.dict("pagure.cli.admin._config", {"FULLTEXT_SEARCH": True})
+    @patch("sys.stdout", new_callable=StringIO)
+    def test_search_index(self, mock_stdout):
+        """Test the search-index function of pagure-admin"""
+        tests.create_projects(self.session)
+        item = pagure.lib.model.Issue(
+            id=1,
+            uid="foobar",
+            project_id=1,
+            title="Search for me",
+            content="Content",
+            user_id=1,
+        )
+        self.session.add(item)
+        self.session.commit()
+
+        args = munch.Munch()
+        pagure.cli.admin.do_search_index(args)
+
+        if self.session.get_bind().dialect.name == "sqlite":
+            self.assertEqual(
+                mock_stdout.getvalue(),
+                "1 issues, comments and pull-requests indexed\n",
+            )
+        else:
+            self.assertEqual(
+                mock_stdout.getvalue(),
+                "No full-text search index to rebuild on this database\n",
+            )
+
+
 class PagureBlockUserTests(tests.Modeltests):
     """Tests for pagure-admin block-user"""
 
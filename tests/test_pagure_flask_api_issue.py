@@ -34,6 +34,7 @@ sys.path.insert(
 
 import pagure.config
 import pagure.lib.query
+import pagure.lib.search
 import tests
 
 FULL_ISSUE_LIST = [
@@ -2102,6 +2103,51 @@ class PagureFlaskApiIssuetests(tests.SimplePagureTest):
             },
         )
 
+    def test_api_view_issues_search(self):
+        """Test the api_view_issues method of the flask api when searching
+        the title or the content of the issues.
+        """
+        tests.create_projects(self.session)
+        tests.create_projects_git(
+            os.path.join(self.path, "tickets"), bare=True
+        )
+
+        repo = pagure.lib.query.get_authorized_project(self.session, "test")
+        for title, content in (
+            ("Crash in the widgets", "Widgets crash when opening widgets"),
+            ("Improve the documentation", "Document the widgets"),
+        ):
+            pagure.lib.query.new_issue(
+                session=self.session,
+                repo=repo,
+                title=title,
+                content=content,
+                user="pingou",
+            )
+        self.session.commit()
+
+        def search(query):
+            output = self.app.get("/api/0/test/issues?%s" % query)
+            self.assertEqual(output.status_code, 200)
+            data = json.loads(output.get_data(as_text=True))
+            return [issue["id"] for issue in data["issues"]]
+
+        self.assertEqual(search("search=idget"), [1])
+        self.assertEqual(search("content=widgets"), [2, 1])
+        self.assertEqual(search("content=widgets&order=asc"), [1, 2])
+        self.assertEqual(search("search=crash&content=document"), [])
+
+        with patch.dict("pagure.config.config", {"FULLTEXT_SEARCH": True}):
+            pagure.lib.search.reindex(self.session)
+            self.session.commit()
+            self.assertEqual(search("search=widg"), [1])
+            self.assertEqual(
+                search("content=crash widgets&order_key=relevance"), [1]
+            )
+            self.assertEqual(
+                search("content=widgets&order_key=relevance"), [1, 2]
+            )
+
     def test_api_view_issues_priority(self):
         """Test the api_view_issues method of the flask api when filtering
         for a priority.
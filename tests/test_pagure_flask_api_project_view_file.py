@@ -324,5 +324,81 @@ class PagureFlaskApiProjectViewFiletests(tests.Modeltests):
         )
 
 
+class PagureFlaskApiProjectFileHistorytests(tests.Modeltests):
+    """Tests for the file history endpoint of the flask API of pagure"""
+
+    maxDiff = None
+
+    def setUp(self):
+        super(PagureFlaskApiProjectFileHistorytests, self).setUp()
+        tests.create_projects(self.session)
+        tests.create_projects_git(os.path.join(self.path, "repos"), bare=True)
+        gitrepo = os.path.join(self.path, "repos", "test.git")
+        tests.add_content_git_repo(gitrepo)
+        tests.add_commit_git_repo(gitrepo, ncommits=2)
+        repo_obj = pygit2.Repository(gitrepo)
+        self.history = [
+            commit.hex
+            for commit in repo_obj.walk(
+                repo_obj.head.target, pygit2.GIT_SORT_NONE
+            )
+        ]
+
+    def test_file_history_empty_project(self):
+        output = self.app.get("/api/0/test2/git/history/sources")
+        self.assertEqual(output.status_code, 404)
+        data = json.loads(output.get_data(as_text=True))
+        self.assertEqual(data["error_code"], "EEMPTYGIT")
+
+    def test_file_history_no_file(self):
+        output = self.app.get("/api/0/test/git/history/foo")
+        self.assertEqual(output.status_code, 404)
+        data = json.loads(output.get_data(as_text=True))
+        self.assertEqual(data["error_code"], "EFILENOTFOUND")
+
+    def test_file_history(self):
+        output = self.app.get("/api/0/test/git/history/sources?per_page=2")
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.get_data(as_text=True))
+        self.assertEqual(data["commits"], self.history[:2])
+        self.assertEqual(data["filename"], "sources")
+        self.assertEqual(data["identifier"], "master")
+        self.assertEqual(data["total_commits"], 3)
+        self.assertEqual(data["pagination"]["pages"], 2)
+
+        output = self.app.get(
+            "/api/0/test/git/history/sources?per_page=2&page=2"
+        )
+        data = json.loads(output.get_data(as_text=True))
+        self.assertEqual(data["commits"], self.history[-1:])
+
+        output = self.app.get("/api/0/test/git/history/folder1/folder2")
+        data = json.loads(output.get_data(as_text=True))
+        self.assertEqual(data["commits"], self.history[-2:-1])
+        self.assertEqual(data["total_commits"], 1)
+
+    def test_file_history_indexed(self):
+        index_folder = os.path.join(self.path, "commits_index")
+        with patch.dict(
+            "pagure.config.config", {"COMMITS_INDEX_FOLDER": index_folder}
+        ):
+            # The first call indexes the branch
+            output = self.app.get("/api/0/test/git/history/sources")
+            data = json.loads(output.get_data(as_text=True))
+            self.assertEqual(data["total_commits"], 3)
+
+            with patch(
+                "pagure.lib.repo.PagureRepo.log",
+                side_effect=AssertionError("git log called"),
+            ):
+                output = self.app.get(
+                    "/api/0/test/git/history/sources?per_page=2&page=2"
+                )
+        self.assertEqual(output.status_code, 200)
+        data = json.loads(output.get_data(as_text=True))
+        self.assertEqual(data["commits"], self.history[-1:])
+        self.assertEqual(data["total_commits"], 3)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -12,6 +12,7 @@ from __future__ import unicode_literals, absolute_import
 
 import base64
 import datetime
+import gzip
 import unittest
 import shutil
 import sys
@@ -153,6 +154,48 @@ class PagureFlaskAppClonetests(tests.Modeltests):
         # Either means we didn't fully crash when returning the response
         self.assertIn(output.status_code, (200, 415))
 
+    @patch.dict(
+        "pagure.config.config",
+        {
+            "ALLOW_HTTP_PULL_PUSH": True,
+            "ALLOW_HTTP_PUSH": False,
+        },
+    )
+    def test_http_clone_fetch_pack(self):
+        """Test that the body of the request is streamed to git, compressed
+        or not, and that the pack comes back."""
+        repo = pygit2.Repository(
+            os.path.join(self.path, "repos", "clonetest.git")
+        )
+        head = repo.head.target.hex
+
+        def pkt_line(data):
+            return ("%04x%s" % (len(data) + 4, data)).encode("utf-8")
+
+        body = pkt_line("want %s\n" % head) + b"0000" + pkt_line("done\n")
+        headers = {"Content-Type": "application/x-git-upload-pack-request"}
+
+        output = self.app.post(
+            "/clonetest.git/git-upload-pack", headers=headers, data=body
+        )
+        self.assertEqual(output.status_code, 200)
+        self.assertEqual(
+            output.headers["Content-Type"],
+            "application/x-git-upload-pack-result",
+        )
+        data = output.get_data()
+        self.assertTrue(data.startswith(b"0008NAK\n"))
+        self.assertIn(b"PACK", data)
+
+        headers["Content-Encoding"] = "gzip"
+        output = self.app.post(
+            "/clonetest.git/git-upload-pack",
+            headers=headers,
+            data=gzip.compress(body),
+        )
+        self.assertEqual(output.status_code, 200)
+        self.assertEqual(output.get_data(), data)
+
     @patch.dict(
         "pagure.config.config",
         {
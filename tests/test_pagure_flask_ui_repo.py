@@ -2624,6 +2624,51 @@ class PagureFlaskRepotests(tests.Modeltests):
         self.assertIn("<title>Commits - test3 - Pagure</title>", output_text)
         self.assertIn("Forked from", output_text)
 
+    def test_view_commits_indexed(self):
+        """Test the view_commits endpoint with the commits index enabled."""
+        tests.create_projects(self.session)
+        tests.create_projects_git(os.path.join(self.path, "repos"), bare=True)
+        gitrepo = os.path.join(self.path, "repos", "test.git")
+        tests.add_content_git_repo(gitrepo)
+        tests.add_commit_git_repo(gitrepo, ncommits=5)
+        repo = pygit2.Repository(gitrepo)
+        history = [c.oid.hex for c in repo.walk(repo.head.target)]
+
+        index_folder = os.path.join(self.path, "commits_index")
+        with patch.dict(
+            "pagure.config.config",
+            {"COMMITS_INDEX_FOLDER": index_folder, "ITEM_PER_PAGE": 2},
+        ):
+            # The first visit queues the indexing of the branch
+            output = self.app.get("/test/commits")
+            self.assertEqual(output.status_code, 200)
+            self.assertIsNotNone(
+                pagure.lib.git.CommitsIndex.get(repo, history[0])
+            )
+
+            # Pages are then served from the index
+            with patch("pygit2.Repository.walk") as walk:
+                output = self.app.get("/test/commits?page=2")
+                output_text = output.get_data(as_text=True)
+                output_author = self.app.get(
+                    "/test/commits?author=pingou"
+                ).get_data(as_text=True)
+            walk.assert_not_called()
+
+        self.assertEqual(output.status_code, 200)
+        self.assertIn(
+            'Commits <span class="badge badge-secondary"> 7</span>',
+            output_text,
+        )
+        for commit in history[2:5]:
+            self.assertIn(commit, output_text)
+        for commit in history[:2] + history[5:]:
+            self.assertNotIn(commit, output_text)
+        self.assertIn(
+            'Commits <span class="badge badge-secondary"> 0</span>',
+            output_author,
+        )
+
     def test_view_commits_from_tag(self):
         """Test the view_commits endpoint given a tag."""
 
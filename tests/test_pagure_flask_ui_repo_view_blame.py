@@ -13,6 +13,7 @@ import re
 import sys
 import os
 import pygit2
+from mock import patch
 
 sys.path.insert(
     0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
@@ -107,6 +108,31 @@ class PagureFlaskRepoViewBlameFiletests(tests.Modeltests):
         data = self.regex.findall(output_text)
         self.assertEqual(len(data), 2)
 
+    def test_view_blame_file_cached(self):
+        """Test the view_blame_file endpoint with the blame cache"""
+        blame_folder = os.path.join(self.path, "blame")
+        with patch.dict(
+            "pagure.config.config", {"BLAME_CACHE_FOLDER": blame_folder}
+        ):
+            output = self.app.get("/test/blame/sources")
+            self.assertEqual(output.status_code, 200)
+            self.assertTrue(os.path.exists(blame_folder))
+
+            with patch("pagure.lib.tasks.compute_blame.delay") as task:
+                task.side_effect = AssertionError("blame computed")
+                output = self.app.get("/test/blame/sources")
+            self.assertEqual(output.status_code, 200)
+            output_text = output.get_data(as_text=True)
+            self.assertIn(
+                '<td class="cell2"><pre><code>foo</code></pre></td>',
+                output_text,
+            )
+            self.assertIn(
+                '<td class="cell_user">Alice Author</td>', output_text
+            )
+            data = self.regex.findall(output_text)
+            self.assertEqual(len(data), 2)
+
     def test_view_blame_file_default_branch_non_master(self):
         """Test the view_blame_file endpoint"""
         repo = pygit2.Repository(os.path.join(self.path, "repos", "test.git"))
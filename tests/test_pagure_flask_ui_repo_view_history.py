@@ -12,12 +12,14 @@ import re
 import sys
 import os
 import pygit2
+from mock import patch
 
 sys.path.insert(
     0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
 )
 
 import tests
+import pagure.lib.git
 import pagure.lib.model
 
 
@@ -259,3 +261,82 @@ class PagureFlaskRepoViewHistoryFiletests(tests.Modeltests):
         self.assertEqual(output.status_code, 400)
         output_text = output.get_data(as_text=True)
         self.assertIn("Invalid repository", output_text)
+
+
+class PagureFlaskRepoViewHistoryFileIndexedtests(tests.Modeltests):
+    """Tests for view_history_file endpoint of the flask pagure app when
+    the history comes from the commits index"""
+
+    def setUp(self):
+        """Set up the environment, ran before every tests."""
+        super(PagureFlaskRepoViewHistoryFileIndexedtests, self).setUp()
+        self.regex = re.compile(r' <div class="list-group-item " id="c_')
+        tests.create_projects(self.session)
+        tests.create_projects_git(os.path.join(self.path, "repos"), bare=True)
+        self.gitrepo = os.path.join(self.path, "repos", "test.git")
+        tests.add_content_git_repo(self.gitrepo)
+        tests.add_commit_git_repo(self.gitrepo, ncommits=4)
+
+    @patch.dict("pagure.config.config", {"ITEM_PER_PAGE": 2})
+    def test_view_history_file_indexed(self):
+        """Test the view_history_file endpoint"""
+        index_folder = os.path.join(self.path, "commits_index")
+        repo_obj = pygit2.Repository(self.gitrepo)
+        with patch.dict(
+            "pagure.config.config", {"COMMITS_INDEX_FOLDER": index_folder}
+        ):
+            pagure.lib.git.index_commits(repo_obj, repo_obj.head.target.hex)
+
+            with patch(
+                "pagure.lib.repo.PagureRepo.log",
+                side_effect=AssertionError("git log called"),
+            ):
+                output = self.app.get("/test/history/sources")
+                self.assertEqual(output.status_code, 200)
+                output_text = output.get_data(as_text=True)
+                self.assertIn(
+                    "<strong>Add row 3 to sources file</strong>", output_text
+                )
+                self.assertIn("page 1 of 3", output_text)
+                self.assertEqual(len(self.regex.findall(output_text)), 2)
+
+                output = self.app.get("/test/history/sources?page=3")
+                self.assertEqual(output.status_code, 200)
+                output_text = output.get_data(as_text=True)
+                self.assertIn(
+                    "<strong>Add sources file for testing</strong>",
+                    output_text,
+                )
+                self.assertIn("page 3 of 3", output_text)
+                self.assertEqual(len(self.regex.findall(output_text)), 1)
+
+                output = self.app.get("/test/history/folder1/")
+                self.assertEqual(output.status_code, 200)
+                output_text = output.get_data(as_text=True)
+                self.assertIn(
+                    "<strong>Add some directory and a file for more testing"
+                    "</strong>",
+                    output_text,
+                )
+                self.assertNotIn("page 1 of", output_text)
+
+                output = self.app.get("/test/history/foofile")
+                self.assertEqual(output.status_code, 400)
+
+    def test_view_history_file_not_indexed(self):
+        """Test the view_history_file endpoint indexes the branch when its
+        history is not indexed yet"""
+        index_folder = os.path.join(self.path, "commits_index")
+        repo_obj = pygit2.Repository(self.gitrepo)
+        with patch.dict(
+            "pagure.config.config", {"COMMITS_INDEX_FOLDER": index_folder}
+        ):
+            output = self.app.get("/test/history/sources")
+            self.assertEqual(output.status_code, 200)
+            output_text = output.get_data(as_text=True)
+            self.assertEqual(len(self.regex.findall(output_text)), 5)
+
+            index = pagure.lib.git.CommitsIndex.get(
+                repo_obj, repo_obj.head.target.hex
+            )
+            self.assertEqual(index.count_for_path("sources"), 5)
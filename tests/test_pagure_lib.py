@@ -71,6 +71,26 @@ class PagureLibtests_search_user(tests.Modeltests):
         item = pagure.lib.query.search_user(self.session, username="bar")
         self.assertEqual(None, item)
 
+    def test_get_users_by_emails(self):
+        """
+        Test the method returns the users having the given email addresses
+        """
+        output = pagure.lib.query.get_users_by_emails(
+            self.session,
+            ["foo@foo.com", "foo@bar.com", "foo@pingou.com", "bar@pingou.com"],
+        )
+        self.assertEqual(
+            sorted((email, user.user) for email, user in output.items()),
+            [
+                ("bar@pingou.com", "pingou"),
+                ("foo@bar.com", "foo"),
+                ("foo@pingou.com", "pingou"),
+            ],
+        )
+        self.assertEqual(
+            pagure.lib.query.get_users_by_emails(self.session, []), {}
+        )
+
     def test_search_user_email(self):
         """
         Test the method returns a user for a given email address
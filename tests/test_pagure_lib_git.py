@@ -11,6 +11,7 @@
 from __future__ import unicode_literals, absolute_import
 
 import datetime
+import json
 import os
 import shutil
 import sys
@@ -18,6 +19,7 @@ import tempfile
 import time
 import unittest
 
+import arrow
 import pygit2
 import six
 from mock import patch, MagicMock
@@ -270,6 +272,281 @@ index 458821a..77674a8
         # print commit_patch
         self.assertEqual(commit_patch, exp)
 
+    @patch.dict("pagure.config.config", {"GIT_UPDATE_DIRECT_WRITE": True})
+    @patch("pagure.lib.git.TemporaryClone")
+    @patch("pagure.lib.notify.send_email")
+    def test_update_git_direct_write(self, email_f, tempclone):
+        """Test the update_git of pagure.lib.git without a clone."""
+        email_f.return_value = True
+
+        # Create project
+        item = pagure.lib.model.Project(
+            user_id=1,  # pingou
+            name="test_ticket_repo",
+            description="test project for ticket",
+            hook_token="aaabbbwww",
+        )
+        self.session.add(item)
+        self.session.commit()
+
+        # Create repo
+        self.gitrepo = os.path.join(
+            self.path, "repos", "tickets", "test_ticket_repo.git"
+        )
+        pygit2.init_repository(self.gitrepo, bare=True)
+
+        repo = pagure.lib.query.get_authorized_project(
+            self.session, "test_ticket_repo"
+        )
+        # Create an issue to play with
+        msg = pagure.lib.query.new_issue(
+            session=self.session,
+            repo=repo,
+            title="Test issue",
+            content="We should work on this",
+            user="pingou",
+        )
+        self.assertEqual(msg.title, "Test issue")
+        issue = pagure.lib.query.search_issues(self.session, repo, issueid=1)
+        pagure.lib.git.update_git(issue, repo).get()
+
+        gitrepo = pygit2.Repository(self.gitrepo)
+        commit = gitrepo.revparse_single("refs/heads/master")
+        self.assertEqual(commit.parents, [])
+        self.assertEqual(
+            commit.message, "Updated issue %s: Test issue" % issue.uid
+        )
+        self.assertEqual([entry.name for entry in commit.tree], [issue.uid])
+        data = json.loads(commit.tree[issue.uid].data)
+        self.assertEqual(data["title"], "Test issue")
+        self.assertEqual(data["comments"], [])
+
+        # Nothing changed, no new commit
+        pagure.lib.git._update_git(issue, repo)
+        self.assertEqual(
+            gitrepo.revparse_single("refs/heads/master").id, commit.id
+        )
+
+        # Test again after adding a comment
+        msg = pagure.lib.query.add_issue_comment(
+            session=self.session,
+            issue=issue,
+            comment="Hey look a comment!",
+            user="foo",
+        )
+        self.session.commit()
+        self.assertEqual(msg, "Comment added")
+
+        commit2 = gitrepo.revparse_single("refs/heads/master")
+        self.assertEqual(commit2.parents[0].id, commit.id)
+        self.assertEqual([entry.name for entry in commit2.tree], [issue.uid])
+        data = json.loads(commit2.tree[issue.uid].data)
+        self.assertEqual(data["comments"][0]["comment"], "Hey look a comment!")
+
+        # No temporary clone was ever made
+        tempclone.assert_not_called()
+
+    def test_update_git_direct_concurrent_update(self):
+        """Test that the direct update of git does not overwrite a commit
+        made while it was building its own."""
+        gitpath = os.path.join(self.path, "repos", "tickets", "test.git")
+        gitrepo = pygit2.init_repository(gitpath, bare=True)
+        author = pygit2.Signature("pagure", "pagure")
+        builder = gitrepo.TreeBuilder()
+        builder.insert(
+            "first", gitrepo.create_blob(b"{}"), pygit2.GIT_FILEMODE_BLOB
+        )
+        first = gitrepo.create_commit(
+            "refs/heads/master", author, author, "First", builder.write(), []
+        )
+
+        obj = MagicMock(isa="issue", uid="foobar", title="Test issue")
+        obj.to_json.return_value = {"title": "Test issue"}
+        project = MagicMock()
+        project.repopath.return_value = gitpath
+
+        # Someone else moves master right after the commit is built
+        concurrent = []
+        calls = []
+        create_commit = pygit2.Repository.create_commit
+
+        def racing_create_commit(repo, *args):
+            calls.append(args)
+            commit = create_commit(repo, *args)
+            if not concurrent:
+                other = pygit2.Repository(gitpath)
+                builder = other.TreeBuilder(other[first].tree)
+                builder.insert(
+                    "concurrent",
+                    other.create_blob(b"{}"),
+                    pygit2.GIT_FILEMODE_BLOB,
+                )
+                concurrent.append(
+                    create_commit(
+                        other,
+                        "refs/heads/master",
+                        author,
+                        author,
+                        "Concurrent",
+                        builder.write(),
+                        [first],
+                    )
+                )
+            return commit
+
+        with patch.object(
+            pygit2.Repository, "create_commit", racing_create_commit
+        ):
+            pagure.lib.git._update_git_direct([obj], project, "tickets")
+
+        # The commit was built twice, the second time on the new head
+        self.assertEqual(len(calls), 2)
+        gitrepo = pygit2.Repository(gitpath)
+        head = gitrepo.revparse_single("refs/heads/master")
+        self.assertEqual(head.message, "Updated issue foobar: Test issue")
+        self.assertEqual([p.id for p in head.parents], concurrent)
+        self.assertEqual(
+            sorted(entry.name for entry in head.tree),
+            ["concurrent", "first", "foobar"],
+        )
+
+    @patch.dict("pagure.config.config", {"GIT_UPDATE_COALESCE_WINDOW": 5})
+    @patch("pagure.lib.notify.send_email")
+    def test_update_git_coalesced(self, email_f):
+        """Test the update_git of pagure.lib.git when updates are batched."""
+        email_f.return_value = True
+
+        # Create project
+        item = pagure.lib.model.Project(
+            user_id=1,  # pingou
+            name="test_ticket_repo",
+            description="test project for ticket",
+            hook_token="aaabbbwww",
+        )
+        self.session.add(item)
+        self.session.commit()
+
+        # Create repo
+        self.gitrepo = os.path.join(
+            self.path, "repos", "tickets", "test_ticket_repo.git"
+        )
+        pygit2.init_repository(self.gitrepo, bare=True)
+
+        repo = pagure.lib.query.get_authorized_project(
+            self.session, "test_ticket_repo"
+        )
+        key = pagure.lib.git.get_update_git_key(
+            "test_ticket_repo", None, None, "tickets"
+        )
+
+        with patch("pagure.lib.query.REDIS", self.broker_client):
+            with patch(
+                "pagure.lib.tasks.update_git_batch.apply_async"
+            ) as apply_async:
+                for idx in range(3):
+                    pagure.lib.query.new_issue(
+                        session=self.session,
+                        repo=repo,
+                        title="Test issue #%s" % idx,
+                        content="We should work on this",
+                        user="pingou",
+                    )
+            self.session.commit()
+
+            # Only one task was scheduled for the three issues
+            apply_async.assert_called_once_with(
+                args=("test_ticket_repo", None, None, "tickets"), countdown=5
+            )
+            self.assertEqual(len(self.broker_client.smembers(key)), 3)
+
+            pagure.lib.tasks.update_git_batch.delay(
+                "test_ticket_repo", None, None, "tickets"
+            ).get()
+
+        self.assertEqual(self.broker_client.smembers(key), set())
+        self.assertFalse(self.broker_client.exists(key + ".scheduled"))
+
+        # All three issues were written in a single commit
+        gitrepo = pygit2.Repository(self.gitrepo)
+        commit = gitrepo.revparse_single("refs/heads/master")
+        self.assertEqual(commit.parents, [])
+        self.assertTrue(commit.message.startswith("Updated 3 issues\n"))
+        self.assertEqual(
+            sorted(entry.name for entry in commit.tree),
+            sorted(issue.uid for issue in repo.issues),
+        )
+
+    @patch.dict("pagure.config.config", {"GIT_UPDATE_COALESCE_WINDOW": 5})
+    @patch("pagure.lib.notify.send_email", MagicMock(return_value=True))
+    def test_update_git_coalesced_failure(self):
+        """Test that objects are queued again if the batch fails."""
+        tests.create_projects(self.session)
+        repo = pagure.lib.query.get_authorized_project(self.session, "test")
+        args = ("test", None, None, "tickets")
+        key = pagure.lib.git.get_update_git_key(*args)
+
+        with patch("pagure.lib.query.REDIS", self.broker_client):
+            with patch(
+                "pagure.lib.tasks.update_git_batch.apply_async"
+            ) as apply_async:
+                pagure.lib.query.new_issue(
+                    session=self.session,
+                    repo=repo,
+                    title="Test issue",
+                    content="We should work on this",
+                    user="pingou",
+                )
+                self.session.commit()
+                self.assertEqual(apply_async.call_count, 1)
+
+                with patch(
+                    "pagure.lib.git._update_git_objects",
+                    side_effect=pagure.exceptions.PagureException("Boom"),
+                ):
+                    self.assertRaises(
+                        pagure.exceptions.PagureException,
+                        pagure.lib.tasks.update_git_batch.apply(args).get,
+                    )
+
+                # The issue is queued again and a new task scheduled
+                self.assertEqual(
+                    self.broker_client.smembers(key),
+                    set([repo.issues[0].uid.encode("utf-8")]),
+                )
+                self.assertFalse(
+                    self.broker_client.exists(key + ".processing")
+                )
+                self.assertTrue(self.broker_client.exists(key + ".scheduled"))
+                self.assertEqual(apply_async.call_count, 2)
+
+                # The scheduled task is lost, the next change schedules a
+                # new one
+                pagure.lib.query.new_issue(
+                    session=self.session,
+                    repo=repo,
+                    title="Test issue #2",
+                    content="We should work on this",
+                    user="pingou",
+                )
+                self.session.commit()
+                self.assertEqual(apply_async.call_count, 2)
+                with patch("time.time", return_value=time.time() + 600):
+                    self.assertEqual(
+                        pagure.lib.git.reschedule_lost_update_git_batches(),
+                        [list(args)],
+                    )
+                self.assertEqual(apply_async.call_count, 3)
+                self.assertEqual(len(self.broker_client.smembers(key)), 2)
+
+            # The project is deleted, the queue is dropped
+            self.session.delete(repo)
+            self.session.commit()
+            self.assertIsNone(
+                pagure.lib.tasks.update_git_batch.delay(*args).get()
+            )
+            self.assertFalse(self.broker_client.exists(key))
+            self.assertFalse(self.broker_client.exists(key + ".scheduled"))
+
     def test_clean_git(self):
         """Test the clean_git method of pagure.lib.git."""
         self.test_update_git()
@@ -1872,6 +2149,39 @@ index 0000000..60f7480
             output = pagure.lib.git.get_author(githash, gitrepo)
             self.assertEqual(output, "pagure")
 
+    def test_get_commits_info(self):
+        """Test the get_commits_info method of pagure.lib.git."""
+
+        self.test_update_git()
+
+        gitrepo = os.path.join(
+            self.path, "repos", "tickets", "test_ticket_repo.git"
+        )
+        commits = [
+            githash.replace("'", "")
+            for githash in pagure.lib.git.read_git_lines(
+                ["log", "-3", "--pretty='%H'"], gitrepo
+            )
+        ]
+        self.assertEqual(len(commits), 2)
+
+        output = pagure.lib.git.get_commits_info(commits, gitrepo)
+        self.assertEqual([info["commit"] for info in output], commits)
+        for info in output:
+            githash = info["commit"]
+            self.assertEqual(
+                info["author"], pagure.lib.git.get_author(githash, gitrepo)
+            )
+            self.assertEqual(
+                info["author_email"],
+                pagure.lib.git.get_author_email(githash, gitrepo),
+            )
+            self.assertEqual(
+                info["subject"],
+                pagure.lib.git.get_commit_subject(githash, gitrepo),
+            )
+            self.assertTrue(info["message"].startswith(info["subject"]))
+
     def get_author_email(self):
         """Test the get_author_email method of pagure.lib.git."""
 
@@ -2257,6 +2567,88 @@ index 0000000..60f7480
             )
         )
 
+    def test_index_commits(self):
+        """Test the index_commits method of pagure.lib.git."""
+        gitrepo = os.path.join(self.path, "repos", "test_repo.git")
+        pygit2.init_repository(gitrepo, bare=True)
+        tests.add_content_git_repo(gitrepo)
+        tests.add_commit_git_repo(gitrepo, ncommits=5)
+
+        repo_obj = pygit2.Repository(gitrepo)
+        commit = repo_obj[repo_obj.head.target]
+        history = [c.oid for c in repo_obj.walk(commit.oid)]
+
+        index_folder = os.path.join(self.path, "commits_index")
+        with patch.dict(
+            "pagure.config.config", {"COMMITS_INDEX_FOLDER": index_folder}
+        ):
+            self.assertIsNone(
+                pagure.lib.git.CommitsIndex.get(repo_obj, commit.hex)
+            )
+            pagure.lib.git.index_commits(repo_obj, commit.hex)
+
+            index = pagure.lib.git.CommitsIndex.get(repo_obj, commit.hex)
+            self.assertEqual(index.count, 7)
+            self.assertEqual(index.count_for(["alice@authors.tld"]), 7)
+            self.assertEqual(index.count_for(["foo@bar.com"]), 0)
+            self.assertEqual(index.get_commits(0, 2), history[:3])
+            self.assertEqual(index.get_commits(5, 10), history[5:])
+            self.assertEqual(
+                index.get_commits(1, 2, ["alice@authors.tld"]), history[1:3]
+            )
+            self.assertEqual(index.get_commits(0, 2, ["foo@bar.com"]), [])
+            # add_content_git_repo adds sources then folder1/folder2/file,
+            # add_commit_git_repo edits sources
+            self.assertEqual(index.count_for_path("sources"), 6)
+            self.assertEqual(index.count_for_path("folder1/"), 1)
+            self.assertEqual(index.count_for_path("folder1/folder2/file"), 1)
+            self.assertEqual(index.count_for_path("foo"), 0)
+            self.assertEqual(
+                index.get_commits(1, 2, path="sources"), history[1:3]
+            )
+            self.assertEqual(
+                index.get_commits(0, 9, path="folder1"), history[-2:-1]
+            )
+
+            # Only the new commits are walked, the rest comes from the index
+            tests.add_commit_git_repo(gitrepo, ncommits=3)
+            repo_obj = pygit2.Repository(gitrepo)
+            commit2 = repo_obj[repo_obj.head.target]
+            history = [c.oid for c in repo_obj.walk(commit2.oid)]
+            # Tag the index of the old head to check it gets reused
+            folder = pagure.lib.git._commits_index_folder(repo_obj)
+            authors_path = os.path.join(folder, "%s.authors" % commit.hex)
+            with open(authors_path) as stream:
+                authors = json.load(stream)
+            authors["foo@bar.com"] = authors.pop("alice@authors.tld")
+            with open(authors_path, "w") as stream:
+                json.dump(authors, stream)
+            pagure.lib.git.index_commits(
+                repo_obj, commit2.hex, oldrev=commit.hex
+            )
+
+            index = pagure.lib.git.CommitsIndex.get(repo_obj, commit2.hex)
+            self.assertEqual(index.count, 10)
+            self.assertEqual(index.get_commits(0, 20), history)
+            self.assertEqual(index.count_for(["alice@authors.tld"]), 3)
+            self.assertEqual(index.count_for(["foo@bar.com"]), 7)
+            self.assertEqual(index.count_for_path("sources"), 9)
+
+            # Only the index of the branch head is kept
+            self.assertEqual(len(os.listdir(folder)), 6)
+            pagure.lib.git.prune_commits_index(repo_obj)
+            self.assertEqual(
+                sorted(os.listdir(folder)),
+                [
+                    "%s.authors" % commit2.hex,
+                    "%s.commits" % commit2.hex,
+                    "%s.paths" % commit2.hex,
+                ],
+            )
+
+        # The index is stored outside of the git repo
+        self.assertTrue(folder.startswith(index_folder))
+
     def test_read_output(self):
         here = os.path.dirname(os.path.realpath(__file__))
         # This should't block
@@ -2315,6 +2707,140 @@ index 0000000..60f7480
             orig.references["refs/pull/6/head"].peel().hex, newesthex
         )
 
+    def test_compute_blame_incremental(self):
+        """Test that the blame derived from the cached blame of the parent
+        commit is the same as the one libgit2 computes."""
+        gitrepo = os.path.join(self.path, "repos", "test_repo.git")
+        repo_obj = pygit2.init_repository(gitrepo, bare=True)
+
+        versions = [
+            ["line %s" % idx for idx in range(10)],
+            ["top"] + ["line %s" % idx for idx in range(10)],
+            ["top"]
+            + ["line %s" % idx for idx in range(5)]
+            + ["middle 1", "middle 2"]
+            + ["line %s" % idx for idx in range(7, 10)]
+            + ["end"],
+            ["top", "line 1", "new 2", "line 4"]
+            + ["middle 1", "middle 2", "line 7", "line 9", "end", "last"],
+            ["top", "line 1", "new 2", "line 4", "last"],
+        ]
+        parents = []
+        commits = []
+        for idx, lines in enumerate(versions):
+            builder = repo_obj.TreeBuilder()
+            blob = repo_obj.create_blob(("\n".join(lines) + "\n").encode())
+            builder.insert("sources", blob, pygit2.GIT_FILEMODE_BLOB)
+            sig = pygit2.Signature(
+                "Author %s" % idx, "author%s@authors.tld" % idx
+            )
+            commit = repo_obj.create_commit(
+                "refs/heads/master",
+                sig,
+                sig,
+                "Commit %s" % idx,
+                builder.write(),
+                parents,
+            )
+            parents = [commit]
+            commits.append(commit.hex)
+
+        blame_folder = os.path.join(self.path, "blame")
+        with patch.dict(
+            "pagure.config.config", {"BLAME_CACHE_FOLDER": blame_folder}
+        ):
+            self.assertIsNone(
+                pagure.lib.git.get_cached_blame(
+                    repo_obj, "sources", commits[0]
+                )
+            )
+            for commitid in commits:
+                blame = pagure.lib.git.compute_blame(
+                    repo_obj, "sources", commitid
+                )
+                expected = pagure.lib.git.Blame.from_pygit2(
+                    repo_obj.blame("sources", newest_commit=commitid)
+                )
+                self.assertEqual(blame.lines, expected.lines)
+                self.assertEqual(
+                    pagure.lib.git.get_cached_blame(
+                        repo_obj, "sources", commitid
+                    ).lines,
+                    expected.lines,
+                )
+
+            # The blame of the parent is used, libgit2 is not called
+            with patch("pygit2.Repository.blame") as blame:
+                blame.side_effect = AssertionError("blame called")
+                shutil.rmtree(
+                    os.path.dirname(
+                        pagure.lib.git._blame_cache_path(
+                            repo_obj, "sources", commits[-1]
+                        )
+                    )
+                )
+                result = pagure.lib.git.compute_blame(
+                    repo_obj, "sources", commits[-1]
+                )
+            self.assertEqual(
+                result.for_line(5),
+                (
+                    commits[3],
+                    pygit2.Signature("Author 3", "author3@authors.tld"),
+                ),
+            )
+            self.assertRaises(IndexError, result.for_line, 6)
+
+    def test_log_commits_to_db(self):
+        """Test the log_commits_to_db method of pagure.lib.git."""
+        tests.create_projects(self.session)
+        project = pagure.lib.query.get_authorized_project(self.session, "test")
+        gitrepo = os.path.join(self.path, "repos", "test.git")
+        pygit2.init_repository(gitrepo, bare=True)
+        tests.add_commit_git_repo(gitrepo, ncommits=5)
+        repo_obj = pygit2.Repository(gitrepo)
+        commits = [c.oid.hex for c in repo_obj.walk(repo_obj.head.target)][
+            ::-1
+        ]
+
+        # Unknown author, logged by email
+        pagure.lib.git.log_commits_to_db(
+            self.session, project, commits[:2] + ["invalid"], gitrepo
+        )
+        self.session.commit()
+
+        # Known author, logged by user, with several batches
+        tests.create_user(
+            self.session, "alice", "Alice Author", ["alice@authors.tld"]
+        )
+        with patch(
+            "pagure.lib.query.get_users_by_emails",
+            wraps=pagure.lib.query.get_users_by_emails,
+        ) as get_users:
+            pagure.lib.git.log_commits_to_db(
+                self.session, project, commits[2:], gitrepo, batch_size=2
+            )
+        self.session.commit()
+        self.assertEqual(get_users.call_count, 2)
+
+        logs = (
+            self.session.query(pagure.lib.model.PagureLog)
+            .order_by(pagure.lib.model.PagureLog.id)
+            .all()
+        )
+        self.assertEqual([log.ref_id for log in logs], commits)
+        alice = pagure.lib.query.search_user(self.session, username="alice")
+        self.assertEqual(
+            [(log.user_id, log.user_email) for log in logs],
+            [(None, "alice@authors.tld")] * 2 + [(alice.id, None)] * 3,
+        )
+        for log in logs:
+            self.assertEqual(log.project_id, project.id)
+            self.assertEqual(log.log_type, "committed")
+            commit_time = arrow.get(repo_obj[log.ref_id].commit_time)
+            self.assertEqual(log.date, commit_time.date())
+            self.assertEqual(log.date_created, commit_time.naive)
+
 
 class PagureLibGitCommitToPatchtests(tests.Modeltests):
     """Tests for pagure.lib.git"""
@@ -256,6 +256,52 @@ class PagureFlaskForkPrtests(tests.Modeltests):
             orig_commit.message, "Editing the file sources for testing #5"
         )
 
+    def test_get_pr_info_cached(self):
+        """Test pagure.lib.git.get_diff_info relies on its cache once the
+        commits to merge are known"""
+
+        gitrepo = os.path.join(self.path, "repos", "test.git")
+        gitrepo2 = os.path.join(
+            self.path, "repos", "forks", "pingou", "test.git"
+        )
+        pagure.lib.git._DIFF_INFO_CACHE.clear()
+
+        diff, diff_commits, orig_commit = pagure.lib.git.get_diff_info(
+            repo_obj=PagureRepo(gitrepo2),
+            orig_repo=PagureRepo(gitrepo),
+            branch_from="feature_foo",
+            branch_to="master",
+        )
+        self.assertEqual(len(diff_commits), 2)
+
+        info = pagure.lib.git.get_cached_diff_info(
+            diff_commits[0].oid.hex, orig_commit.oid.hex
+        )
+        self.assertEqual(info["ahead"], 2)
+        self.assertEqual(info["behind"], 3)
+        self.assertEqual(
+            info["merge_base"], diff_commits[-1].parents[0].oid.hex
+        )
+        self.assertEqual(
+            info["commits"], [commit.oid.hex for commit in diff_commits]
+        )
+
+        with patch(
+            "pagure.lib.git._compute_diff_info",
+            side_effect=AssertionError("history walked"),
+        ):
+            diff2, diff_commits2, orig_commit2 = pagure.lib.git.get_diff_info(
+                repo_obj=PagureRepo(gitrepo2),
+                orig_repo=PagureRepo(gitrepo),
+                branch_from="feature_foo",
+                branch_to="master",
+            )
+        self.assertEqual(
+            [commit.oid for commit in diff_commits2],
+            [commit.oid for commit in diff_commits],
+        )
+        self.assertEqual(diff2.patch, diff.patch)
+
     def test_get_pr_info_raises(self):
         """Test pagure.ui.fork._get_pr_info"""
 
@@ -10,6 +10,7 @@
 
 from __future__ import unicode_literals, absolute_import
 
+import json
 import unittest
 import sys
 import os
@@ -247,6 +248,83 @@ class PagureLibModeltests(tests.Modeltests):
 
         self.assertEqual([p.fullname for p in group.projects], order)
 
+    def test_project_json_columns(self):
+        """Test that the JSON columns of a project are only decoded again
+        when they change."""
+        tests.create_projects(self.session)
+        repo = pagure.lib.query._get_project(self.session, "test")
+
+        repo._json_cache = None
+
+        with patch.object(pagure.lib.model, "json", wraps=json) as js:
+            loads = js.loads
+            self.assertTrue(repo.settings["issue_tracker"])
+            settings = repo.settings
+            settings["issue_tracker"] = False
+            # Editing the value returned does not change the project
+            self.assertTrue(repo.settings["issue_tracker"])
+            self.assertEqual(loads.call_count, 0)
+
+            repo.settings = settings
+            self.assertFalse(repo.settings["issue_tracker"])
+            self.assertEqual(loads.call_count, 1)
+
+            self.assertEqual(repo.milestones, {})
+            repo.milestones = {"v1": "2026-01-01", "v2": {"active": False}}
+            self.assertEqual(
+                repo.milestones,
+                {
+                    "v1": {"date": "2026-01-01", "active": True},
+                    "v2": {"active": False},
+                },
+            )
+            self.assertEqual(loads.call_count, 2)
+            repo.close_status = ["Fixed"]
+            self.assertEqual(repo.close_status, ["Fixed"])
+            self.assertEqual(repo.close_status, ["Fixed"])
+            self.assertEqual(loads.call_count, 3)
+
+        self.session.add(repo)
+        self.session.commit()
+        self.session.refresh(repo)
+        self.assertFalse(repo.settings["issue_tracker"])
+        self.assertEqual(repo.close_status, ["Fixed"])
+
+    def test_project_load_json_columns(self):
+        """Test decoding the JSON columns of several projects at once."""
+        tests.create_projects(self.session)
+        projects = self.session.query(pagure.lib.model.Project).all()
+        self.assertEqual(len(projects), 3)
+        projects[0].priorities = {"1": "High"}
+        projects[1].close_status = ["Fixed"]
+
+        for project in projects:
+            project._json_cache = None
+
+        with patch.object(pagure.lib.model, "json", wraps=json) as js:
+            loads = js.loads
+            pagure.lib.model.Project.load_json_columns(projects)
+            calls = loads.call_count
+            self.assertEqual(
+                [p.priorities for p in projects], [{"1": "High"}, {}, {}]
+            )
+            self.assertEqual(
+                [p.close_status for p in projects],
+                [
+                    ["Invalid", "Insufficient data", "Fixed", "Duplicate"],
+                    ["Fixed"],
+                    ["Invalid", "Insufficient data", "Fixed", "Duplicate"],
+                ],
+            )
+            self.assertEqual(
+                [p.settings["issue_tracker"] for p in projects],
+                [True, True, True],
+            )
+            self.assertEqual(loads.call_count, calls)
+        self.assertLessEqual(
+            calls, len(pagure.lib.model.Project._JSON_COLUMNS)
+        )
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
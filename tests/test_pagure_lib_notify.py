@@ -14,8 +14,10 @@ import unittest
 import shutil
 import sys
 import os
+import threading
+import time
 
-from mock import patch, MagicMock
+from mock import call, patch, MagicMock
 
 sys.path.insert(
     0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
@@ -570,5 +572,163 @@ RW1haWwgY29udGVudA==
             _check_mention(comment, exp)
 
 
+@patch("pagure.lib.notify._SMTP", None)
+class PagureLibNotifyOutboxtests(tests.Modeltests):
+    """Tests for the email outbox of pagure.lib.notify"""
+
+    @patch.dict(
+        "pagure.config.config", {"EMAIL_SEND": True, "EMAIL_OUTBOX": True}
+    )
+    @patch("pagure.lib.tasks_services.send_queued_emails.delay")
+    @patch("pagure.lib.notify.smtplib.SMTP")
+    def test_send_email_outbox(self, mock_smtp, mock_task):
+        """Test that send_email stores the emails in the outbox."""
+        email = pagure.lib.notify.send_email(
+            "Email content",
+            "Email Subject",
+            "foo@bar.com,bar@foo.net",
+            project_name="namespace/project",
+        )
+        self.assertEqual(email["To"], "bar@foo.net")
+        mock_smtp.assert_not_called()
+        mock_task.assert_called_once_with()
+
+        emails = (
+            self.session.query(pagure.lib.model.EmailOutbox)
+            .order_by(pagure.lib.model.EmailOutbox.id)
+            .all()
+        )
+        self.assertEqual(
+            [e.to_email for e in emails], ["foo@bar.com", "bar@foo.net"]
+        )
+        self.assertEqual(emails[1].message, email.as_string())
+        self.assertEqual(emails[0].attempts, 0)
+        self.assertEqual(
+            pagure.lib.notify.get_email_outbox_stats(self.session)["queued"],
+            2,
+        )
+
+    def _queue(self, *recipients):
+        """Add emails to the given recipients to the outbox."""
+        for recipient in recipients:
+            self.session.add(
+                pagure.lib.model.EmailOutbox(
+                    from_email="pagure@localhost.localdomain",
+                    to_email=recipient,
+                    message="Email content",
+                )
+            )
+        self.session.commit()
+
+    @patch.dict("pagure.config.config", {"EMAIL_OUTBOX_BATCH_SIZE": 2})
+    @patch("pagure.lib.notify.smtplib.SMTP")
+    def test_send_queued_emails(self, mock_smtp):
+        """Test that the emails of the outbox are sent in batches over a
+        single connection."""
+        mock_smtp.return_value.noop.return_value = (250, b"OK")
+        self._queue("foo@bar.com", "bar@foo.net", "baz@foo.net")
+
+        self.assertEqual(pagure.lib.notify.send_queued_emails(self.session), 0)
+        self.assertIsNone(pagure.lib.notify.send_queued_emails(self.session))
+
+        mock_smtp.assert_called_once_with("localhost", 25)
+        self.assertEqual(
+            [c[0][1] for c in mock_smtp.return_value.sendmail.call_args_list],
+            [["foo@bar.com"], ["bar@foo.net"], ["baz@foo.net"]],
+        )
+        self.assertEqual(
+            self.session.query(pagure.lib.model.EmailOutbox).count(), 0
+        )
+
+    @patch.dict("pagure.config.config", {"EMAIL_OUTBOX_MAX_ATTEMPTS": 2})
+    @patch("pagure.lib.notify.smtplib.SMTP")
+    def test_send_queued_emails_failure(self, mock_smtp):
+        """Test that the emails failing to be sent are tried again later,
+        until the maximum number of attempts is reached."""
+        mock_smtp.return_value.sendmail.side_effect = (
+            pagure.lib.notify.smtplib.SMTPServerDisconnected("Gone")
+        )
+        self._queue("foo@bar.com")
+
+        self.assertEqual(
+            pagure.lib.notify.send_queued_emails(self.session), 60
+        )
+        email = self.session.query(pagure.lib.model.EmailOutbox).one()
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, "Gone")
+        self.assertIsNotNone(email.next_attempt)
+
+        # Not due yet
+        self.assertIsNone(pagure.lib.notify.send_queued_emails(self.session))
+        self.assertEqual(mock_smtp.return_value.sendmail.call_count, 1)
+
+        email.next_attempt = email.date_created
+        self.session.add(email)
+        self.session.commit()
+        self.assertIsNone(pagure.lib.notify.send_queued_emails(self.session))
+        self.assertEqual(mock_smtp.return_value.sendmail.call_count, 2)
+        # The connection was dropped after each failure
+        self.assertEqual(mock_smtp.call_count, 2)
+
+        email = self.session.query(pagure.lib.model.EmailOutbox).one()
+        self.assertEqual(email.attempts, 2)
+        self.assertIsNone(email.next_attempt)
+        stats = pagure.lib.notify.get_email_outbox_stats(self.session)
+        self.assertEqual(stats["queued"], 0)
+        self.assertEqual(stats["failed"], 1)
+
+
+class PagureLibNotifyMQTTtests(unittest.TestCase):
+    """Tests for the MQTT publisher of pagure.lib.notify"""
+
+    def test_publish(self):
+        """Test that the messages are published once connected, in the
+        order they were queued."""
+        publisher = pagure.lib.notify.MQTTPublisher(queue_size=10)
+        publisher.client = MagicMock()
+        publisher.thread = threading.Thread(target=publisher._run)
+        publisher.thread.daemon = True
+        publisher.thread.start()
+
+        publisher.publish("topic1", "one")
+        publisher.publish("topic2", "two")
+        time.sleep(0.1)
+        publisher.client.publish.assert_not_called()
+
+        publisher._on_connect(publisher.client, None, {}, 0)
+        publisher.queue.join()
+        self.assertEqual(
+            publisher.client.publish.call_args_list,
+            [call("topic1", "one"), call("topic2", "two")],
+        )
+
+        publisher._on_disconnect(publisher.client, None, 1)
+        self.assertFalse(publisher.connected.is_set())
+
+    def test_publish_queue_full(self):
+        """Test that publishing does not block when the queue is full."""
+        publisher = pagure.lib.notify.MQTTPublisher(queue_size=1)
+        publisher.publish("topic1", "one")
+        publisher.publish("topic2", "two")
+        self.assertEqual(publisher.queue.qsize(), 1)
+        self.assertEqual(publisher.queue.get_nowait(), ("topic1", "one"))
+
+    @patch.dict("pagure.config.config", {"MQTT_NOTIFICATIONS": True})
+    @patch("pagure.lib.notify.MQTTPublisher")
+    def test_mqtt_publish(self, publisher):
+        """Test that a single publisher is used by the process."""
+        publisher.return_value.pid = os.getpid()
+        with patch("pagure.lib.notify.mqtt_publisher", None):
+            pagure.lib.notify.mqtt_publish("topic", {"foo": "bar"})
+            pagure.lib.notify.mqtt_publish("topic", {"foo": "baz"})
+
+        publisher.assert_called_once_with(1000)
+        publisher.return_value.start.assert_called_once_with()
+        self.assertEqual(
+            publisher.return_value.publish.call_args_list,
+            [call("topic", '{"foo": "bar"}'), call("topic", '{"foo": "baz"}')],
+        )
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -476,12 +476,18 @@ http://localhost.localdomain/fork/foo/test/issue/1
 
     @mock.patch("pagure.lib.notify.send_email")
     # for non-ASCII testing, we mock these return values
-    @mock.patch("pagure.lib.git.get_author", return_value="Cecil Cõmmîttër")
     @mock.patch(
-        "pagure.lib.git.get_commit_subject", return_value="We love Motörhead"
+        "pagure.lib.git.get_commits_info",
+        return_value=[
+            {
+                "commit": "abcdefg",
+                "author": "Cecil Cõmmîttër",
+                "subject": "We love Motörhead",
+            }
+        ],
     )
     def test_notify_new_commits(
-        self, _, __, fakemail
+        self, _, fakemail
     ):  # pylint: disable=invalid-name
         """Test for notification on new commits, especially when
         non-ASCII text is involved.
@@ -498,7 +504,7 @@ http://localhost.localdomain/test/commits/master
 """
         # first arg (abspath) doesn't matter and we can use a commit
         # ID that doesn't actually exist, as we are mocking
-        # the get_author and get_commit_subject calls anyway
+        # the get_commits_info call anyway
         pagure.lib.notify.notify_new_commits(
             "/", self.project1, "master", ["abcdefg"]
         )
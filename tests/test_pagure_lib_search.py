@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""
+ (c) 2026 - Copyright Red Hat Inc
+
+"""
+
+from __future__ import unicode_literals, absolute_import
+
+import unittest
+import sys
+import os
+
+import sqlalchemy as sa
+from mock import patch
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+)
+
+import pagure.lib.query
+import pagure.lib.search
+import tests
+
+
+class PagureLibSearchtests(tests.Modeltests):
+    """Tests for pagure.lib.search"""
+
+    def setUp(self):
+        """Set up the environnment, ran before every tests."""
+        super(PagureLibSearchtests, self).setUp()
+        if self.session.get_bind().dialect.name != "sqlite":
+            raise unittest.SkipTest("The index is only filled on SQLite")
+
+        for patcher in (
+            patch.dict("pagure.config.config", {"FULLTEXT_SEARCH": True}),
+            patch("pagure.lib.git.update_git", return_value=True),
+            patch("pagure.lib.notify.send_email", return_value=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        tests.create_projects(self.session)
+        self.repo = pagure.lib.query.get_authorized_project(
+            self.session, "test"
+        )
+        for title, content in (
+            ("Crash when uploading widgets", "The widgets make it crash"),
+            ("Improve the documentation", "Explain how to upload files"),
+            ("Rename the widget module", "It is used by widgets widgets"),
+        ):
+            pagure.lib.query.new_issue(
+                session=self.session,
+                repo=self.repo,
+                title=title,
+                content=content,
+                user="pingou",
+            )
+        self.session.commit()
+
+    def search(self, **kwargs):
+        """Return the ids of the issues found by search_issues."""
+        issues = pagure.lib.query.search_issues(
+            self.session, self.repo, **kwargs
+        )
+        return [issue.id for issue in issues]
+
+    def test_match_disabled(self):
+        """Test the match function when the full-text search is disabled."""
+        with patch.dict("pagure.config.config", {"FULLTEXT_SEARCH": False}):
+            self.assertIsNone(
+                pagure.lib.search.match(self.session, "issue", "title", "foo")
+            )
+            # It falls back to ILIKE, which matches within the words
+            self.assertEqual(self.search(search_pattern="idget"), [3, 1])
+
+        self.assertIsNotNone(
+            pagure.lib.search.match(self.session, "issue", "title", "foo")
+        )
+        # Nothing to search for
+        self.assertIsNone(
+            pagure.lib.search.match(self.session, "issue", "title", " - ")
+        )
+
+    def test_search_issues_title(self):
+        """Test searching the title of the issues."""
+        self.assertEqual(self.search(search_pattern="widget"), [3, 1])
+        self.assertEqual(self.search(search_pattern="WIDG"), [3, 1])
+        self.assertEqual(self.search(search_pattern="crash widgets"), [1])
+        self.assertEqual(self.search(search_pattern="idget"), [])
+        self.assertEqual(self.search(search_pattern='"foo" OR bar'), [])
+        self.assertEqual(self.search(search_pattern="upload"), [1])
+        self.assertEqual(
+            pagure.lib.query.search_issues(
+                self.session, self.repo, search_pattern="widget", count=True
+            ),
+            2,
+        )
+
+    def test_search_issues_content(self):
+        """Test searching the content and comments of the issues."""
+        self.assertEqual(self.search(search_content="upload"), [2])
+
+        issue = pagure.lib.query.search_issues(
+            self.session, self.repo, issueid=1
+        )
+        pagure.lib.query.add_issue_comment(
+            self.session, issue=issue, comment="Upload a big one", user="foo"
+        )
+        self.session.commit()
+        self.assertEqual(self.search(search_content="upload"), [2, 1])
+        self.assertEqual(self.search(search_content="upload big"), [1])
+
+    def test_search_issues_edited(self):
+        """Test that the index follows the changes to the issues."""
+        issue = pagure.lib.query.search_issues(
+            self.session, self.repo, issueid=2
+        )
+        pagure.lib.query.edit_issue(
+            self.session,
+            issue=issue,
+            user="pingou",
+            title="Document the widgets",
+        )
+        self.session.commit()
+        self.assertEqual(self.search(search_pattern="documentation"), [])
+        self.assertEqual(self.search(search_pattern="widget"), [3, 2, 1])
+
+        self.session.delete(issue)
+        self.session.commit()
+        self.assertEqual(self.search(search_pattern="widget"), [3, 1])
+
+    def test_search_issues_relevance(self):
+        """Test sorting the issues found by relevance."""
+        self.assertEqual(
+            self.search(search_content="widgets", order_key="relevance"),
+            [3, 1],
+        )
+        self.assertEqual(
+            self.search(
+                search_content="widgets", order_key="relevance", order="asc"
+            ),
+            [1, 3],
+        )
+
+    def test_search_pull_requests(self):
+        """Test searching the title of the pull-requests."""
+        for title in ("Fix the widgets", "Add some tests"):
+            pagure.lib.query.new_pull_request(
+                session=self.session,
+                repo_from=self.repo,
+                branch_from="feature",
+                repo_to=self.repo,
+                branch_to="master",
+                title=title,
+                user="pingou",
+            )
+        self.session.commit()
+
+        requests = pagure.lib.query.search_pull_requests(
+            self.session, project_id=1, search_pattern="widg"
+        )
+        self.assertEqual([request.id for request in requests], [4])
+        # The wildcard searches still use ILIKE
+        requests = pagure.lib.query.search_pull_requests(
+            self.session, project_id=1, search_pattern="*ests"
+        )
+        self.assertEqual([request.id for request in requests], [5])
+
+    def test_reindex(self):
+        """Test rebuilding the index."""
+        self.session.execute(sa.text("DELETE FROM search_index"))
+        self.assertEqual(self.search(search_pattern="widget"), [])
+
+        self.assertEqual(pagure.lib.search.reindex(self.session), 3)
+        self.assertEqual(self.search(search_pattern="widget"), [3, 1])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -19,6 +19,7 @@ import time
 import unittest
 
 import pygit2
+import requests
 import six
 from mock import ANY, patch, MagicMock, call
 
@@ -259,7 +260,7 @@ class PagureLibTaskServicestests(tests.Modeltests):
         self, git, up_issue, up_pr, send
     ):
         """Test the load_json_commits_to_db method."""
-        git.side_effect = [["file1"], ["file2"], ["files/image"], ["file1"]]
+        git.side_effect = [["file1", "file2", "file1"], ["{}"], ["{}"]]
 
         output = pagure.lib.tasks_services.load_json_commits_to_db(
             name="test",
@@ -284,7 +285,7 @@ class PagureLibTaskServicestests(tests.Modeltests):
         self, git, up_issue, up_pr, send, json_loads
     ):
         """Test the load_json_commits_to_db method."""
-        git.side_effect = [["file1"], ["file2"], ["files/image"], ["file1"]]
+        git.side_effect = [["file1", "file2", "file1"], ["{}"], ["{}"]]
         json_loads.return_value = "foobar"
 
         output = pagure.lib.tasks_services.load_json_commits_to_db(
@@ -331,7 +332,7 @@ class PagureLibTaskServicestests(tests.Modeltests):
         self, git, up_issue, up_pr, send, json_loads
     ):
         """Test the load_json_commits_to_db method."""
-        git.side_effect = [["file1"], ["file2"], ["files/image"], ["file1"]]
+        git.side_effect = [["file1", "file2", "file1"], ["{}"], ["{}"]]
         json_loads.return_value = "foobar"
 
         output = pagure.lib.tasks_services.load_json_commits_to_db(
@@ -389,7 +390,7 @@ class PagureLibTaskServicestests(tests.Modeltests):
         self, git, up_issue, up_pr, send, json_loads
     ):
         """Test the load_json_commits_to_db method."""
-        git.side_effect = [["file1"], ["file2"], ["files/image"], ["file1"]]
+        git.side_effect = [["file1", "file2", "file1"], ["{}"], ["{}"]]
         json_loads.return_value = "foobar"
         up_pr.side_effect = Exception("foo error")
 
@@ -431,6 +432,38 @@ class PagureLibTaskServicestests(tests.Modeltests):
         ]
         self.assertEqual(calls, send.mock_calls)
 
+    def test_get_files_to_load(self):
+        """Test the get_files_to_load method."""
+        gitrepo = os.path.join(self.path, "repos", "tickets", "test.git")
+        pygit2.init_repository(gitrepo, bare=True)
+        tests.add_content_git_repo(gitrepo)
+        tests.add_commit_git_repo(gitrepo, ncommits=3)
+        repo_obj = pygit2.Repository(gitrepo)
+        commits = [c.oid.hex for c in repo_obj.walk(repo_obj.head.target)]
+        self.assertEqual(len(commits), 5)
+
+        with patch(
+            "pagure.lib.git.read_git_lines",
+            wraps=pagure.lib.git.read_git_lines,
+        ) as git:
+            output = pagure.lib.tasks_services.get_files_to_load(
+                "test", commits, gitrepo
+            )
+        self.assertEqual(git.call_count, 1)
+        self.assertEqual(
+            sorted(output),
+            ["folder1/folder2/file", "folder1/folder2/fileŠ", "sources"],
+        )
+
+        output = pagure.lib.tasks_services.get_files_to_load(
+            "test", commits[:2], gitrepo
+        )
+        self.assertEqual(output, ["sources"])
+        self.assertEqual(
+            pagure.lib.tasks_services.get_files_to_load("test", [], gitrepo),
+            [],
+        )
+
 
 class PagureLibTaskServicesWithWebHooktests(tests.Modeltests):
     """Tests for pagure.lib.task_services"""
@@ -476,14 +509,14 @@ class PagureLibTaskServicesWithWebHooktests(tests.Modeltests):
 
     @patch("time.time", MagicMock(return_value=2))
     @patch("uuid.uuid4", MagicMock(return_value="not_so_random"))
-    @patch("datetime.datetime")
-    @patch("requests.post")
+    @patch("pagure.lib.tasks_services.datetime")
+    @patch("requests.Session.post")
     def test_webhook_notification_no_webhook(self, post, dt):
         """Test the webhook_notification method."""
-        post.return_value = False
+        post.return_value = MagicMock(ok=True, status_code=200)
         utcnow = MagicMock()
         utcnow.year = 2018
-        dt.utcnow.return_value = utcnow
+        dt.datetime.utcnow.return_value = utcnow
 
         output = pagure.lib.tasks_services.webhook_notification(
             topic="topic",
@@ -548,7 +581,88 @@ class PagureLibTaskServicesWithWebHooktests(tests.Modeltests):
 
         print(post.mock_calls)
 
-        self.assertEqual(calls, post.mock_calls)
+        # The URLs are called concurrently
+        self.assertEqual(
+            sorted(calls, key=str), sorted(post.mock_calls, key=str)
+        )
+
+        deliveries = self.session.query(
+            pagure.lib.model.WebhookDelivery
+        ).order_by(pagure.lib.model.WebhookDelivery.url)
+        self.assertEqual(
+            [(d.url, d.status_code, d.error, d.attempts) for d in deliveries],
+            [
+                ("http://bar.org/bar", 200, None, 1),
+                ("http://foo.com/api/flag", 200, None, 1),
+            ],
+        )
+
+    @patch.dict(
+        "pagure.config.config",
+        {
+            "WEBHOOK_RETRY_DELAY": 0,
+            "WEBHOOK_CIRCUIT_BREAKER_THRESHOLD": 2,
+            "WEBHOOK_DELIVERIES_KEPT": 5,
+        },
+    )
+    @patch("requests.Session.post")
+    def test_webhook_notification_failing(self, post):
+        """Test that failed deliveries are retried and that the URLs
+        failing repeatedly are not called for a while."""
+
+        def _post(url, **kwargs):
+            if url == "http://bar.org/bar":
+                raise requests.exceptions.ConnectionError("Connection refused")
+            return MagicMock(ok=False, status_code=404)
+
+        post.side_effect = _post
+
+        def _deliveries():
+            return [
+                (d.url, d.status_code, d.error, d.attempts)
+                for d in self.session.query(
+                    pagure.lib.model.WebhookDelivery
+                ).order_by(pagure.lib.model.WebhookDelivery.id)
+            ]
+
+        for _ in range(2):
+            pagure.lib.tasks_services.webhook_notification(
+                topic="topic", msg={}, namespace=None, name="test", user=None
+            )
+        # The connection errors are retried, not the client errors
+        self.assertEqual(post.call_count, 8)
+        self.assertEqual(
+            _deliveries(),
+            [
+                ("http://bar.org/bar", None, "Connection refused", 3),
+                ("http://foo.com/api/flag", 404, "Error code: 404", 1),
+            ]
+            * 2,
+        )
+
+        pagure.lib.tasks_services.webhook_notification(
+            topic="topic", msg={}, namespace=None, name="test", user=None
+        )
+        self.assertEqual(post.call_count, 8)
+        self.assertEqual(len(_deliveries()), 5)
+        self.assertEqual(
+            _deliveries()[-3:],
+            [
+                ("http://foo.com/api/flag", 404, "Error code: 404", 1),
+                (
+                    "http://bar.org/bar",
+                    None,
+                    "Endpoint failing, not called",
+                    0,
+                ),
+                (
+                    "http://foo.com/api/flag",
+                    None,
+                    "Endpoint failing, not called",
+                    0,
+                ),
+            ],
+        )
 
 
 class PagureLibTaskServicesJenkinsCItests(tests.Modeltests):
@@ -80,3 +80,100 @@ class PagureUtilsTests(tests.SimplePagureTest):
         res = pagure.utils.lookup_deploykey(project, "deploykey_test_1")
         self.assertNotEqual(res, None)
         self.assertFalse(res.pushaccess)
+
+    def test_get_authorized_project_request_cache(self):
+        """Test that the projects are looked up once per request."""
+        with self.app.application.test_request_context("/"):
+            with mock.patch(
+                "pagure.lib.query._get_project",
+                wraps=pagure.lib.query._get_project,
+            ) as get_project:
+                for name in ("test", "TEST", "test", "invalid", "invalid"):
+                    pagure.lib.query.get_authorized_project(self.session, name)
+                self.assertEqual(get_project.call_count, 3)
+
+        # New request, the project is looked up again
+        with self.app.application.test_request_context("/"):
+            with mock.patch(
+                "pagure.lib.query._get_project",
+                wraps=pagure.lib.query._get_project,
+            ) as get_project:
+                project = pagure.lib.query.get_authorized_project(
+                    self.session, "test"
+                )
+                self.assertEqual(project.fullname, "test")
+                self.assertEqual(get_project.call_count, 1)
+
+    def test_is_repo_committer_request_cache(self):
+        """Test that the access of a user is computed once per request
+        and forgotten when the ACLs of the project change."""
+        project = pagure.lib.query._get_project(self.session, "test")
+        with self.app.application.test_request_context("/"):
+            with mock.patch(
+                "pagure.lib.query.get_user", wraps=pagure.lib.query.get_user
+            ) as get_user:
+                for _ in range(3):
+                    self.assertFalse(
+                        pagure.utils.is_repo_committer(
+                            project, "foo", session=self.session
+                        )
+                    )
+                self.assertEqual(get_user.call_count, 1)
+
+            pagure.lib.query.add_user_to_project(
+                self.session, project, new_user="foo", user="pingou"
+            )
+            self.assertTrue(
+                pagure.utils.is_repo_committer(
+                    project, "foo", session=self.session
+                )
+            )
+
+        # Outside of a request, nothing is cached
+        with mock.patch(
+            "pagure.lib.query.get_user", wraps=pagure.lib.query.get_user
+        ) as get_user:
+            for _ in range(2):
+                self.assertTrue(
+                    pagure.utils.is_repo_committer(
+                        project, "foo", session=self.session
+                    )
+                )
+            self.assertEqual(get_user.call_count, 2)
+
+    @mock.patch.dict("pagure.config.config", {"ACCESS_CACHE_TTL": 60})
+    def test_is_repo_user_ttl_cache(self):
+        """Test that the access of a user is kept across requests for
+        ACCESS_CACHE_TTL seconds, unless the ACLs of the project change."""
+        project = pagure.lib.query._get_project(self.session, "test")
+        self.addCleanup(pagure.utils._ACCESS_CACHE.clear)
+
+        for _ in range(2):
+            with self.app.application.test_request_context("/"):
+                self.assertFalse(pagure.utils.is_repo_user(project, "foo"))
+        self.assertEqual(
+            list(pagure.utils._ACCESS_CACHE), [("user", project.id, "foo")]
+        )
+
+        # Not invalidated, the access is still cached
+        project_user = pagure.lib.model.ProjectUser(
+            project_id=project.id, user_id=2, access="ticket"
+        )
+        self.session.add(project_user)
+        self.session.commit()
+        with self.app.application.test_request_context("/"):
+            self.assertFalse(pagure.utils.is_repo_user(project, "foo"))
+
+        # Expired
+        with mock.patch("pagure.utils.time.time", return_value=2e10):
+            with self.app.application.test_request_context("/"):
+                self.assertTrue(pagure.utils.is_repo_user(project, "foo"))
+
+        pagure.lib.query.add_group_to_project(
+            self.session,
+            project,
+            new_group="testgrp",
+            user="pingou",
+            create=True,
+        )
+        self.assertEqual(pagure.utils._ACCESS_CACHE, {})
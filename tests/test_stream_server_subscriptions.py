@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ (c) 2026 - Copyright Red Hat Inc
+
+Tests for the shared redis subscription and the lookup cache of the Pagure
+streaming server.
+
+"""
+
+from __future__ import unicode_literals, absolute_import
+
+import asyncio
+import os
+import sys
+import unittest
+
+import mock
+import redis.asyncio
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+)
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../pagure-ev")
+)
+
+import pagure.lib.query  # noqa: E402
+import tests  # noqa: E402
+from pagure.exceptions import PagureEvException  # noqa: E402
+
+# comes from pagure-ev/
+import pagure_stream_server as pss  # noqa: E402
+
+
+class StreamingServerSubscriptionsTests(tests.Modeltests):
+    """Tests for the Subscriptions class of the streaming server."""
+
+    def test_fanout(self):
+        """Test that clients watching the same channel share a single
+        redis subscription and all get the messages sent to it."""
+        path = self.broker_client.connection_pool.connection_kwargs["path"]
+
+        async def scenario():
+            client = redis.asyncio.Redis(unix_socket_path=path)
+            subscriptions = pss.Subscriptions(client)
+            runner = asyncio.ensure_future(subscriptions.run())
+
+            queue1 = await subscriptions.subscribe("pagure.uid1")
+            queue2 = await subscriptions.subscribe("pagure.uid1")
+            queue3 = await subscriptions.subscribe("pagure.uid2")
+            self.assertEqual(
+                await client.pubsub_numsub("pagure.uid1"),
+                [(b"pagure.uid1", 1)],
+            )
+
+            await client.publish("pagure.uid1", "hello")
+            self.assertEqual(
+                await asyncio.wait_for(queue1.get(), timeout=1), "hello"
+            )
+            self.assertEqual(
+                await asyncio.wait_for(queue2.get(), timeout=1), "hello"
+            )
+            self.assertTrue(queue3.empty())
+
+            await subscriptions.unsubscribe("pagure.uid1", queue1)
+            self.assertIn("pagure.uid1", subscriptions.channels)
+            await subscriptions.unsubscribe("pagure.uid1", queue2)
+            self.assertNotIn("pagure.uid1", subscriptions.channels)
+            await subscriptions.unsubscribe("pagure.uid2", queue3)
+            self.assertEqual(subscriptions.channels, {})
+
+            runner.cancel()
+            await subscriptions.pubsub.close()
+            await client.close()
+
+        asyncio.run(scenario())
+
+    def test_dispatch_slow_client(self):
+        """Test that a client not reading its messages does not prevent
+        the others from getting theirs."""
+        subscriptions = pss.Subscriptions(redis.asyncio.Redis())
+        slow = asyncio.Queue(maxsize=1)
+        fast = asyncio.Queue()
+        subscriptions.channels["pagure.uid1"] = set([slow, fast])
+
+        for data in (b"one", b"two"):
+            subscriptions.dispatch(
+                {"channel": b"pagure.uid1", "data": data, "type": "message"}
+            )
+
+        self.assertEqual(slow.qsize(), 1)
+        self.assertEqual(slow.get_nowait(), "one")
+        self.assertEqual(fast.get_nowait(), "one")
+        self.assertEqual(fast.get_nowait(), "two")
+
+
+class StreamingServerLookupCacheTests(tests.Modeltests):
+    """Tests for the lookup cache of the streaming server."""
+
+    def setUp(self):
+        """Set up the environnment, run before every test."""
+        super(StreamingServerLookupCacheTests, self).setUp()
+        pss.SESSION = self.session
+        pss.LOOKUP_CACHE.clear()
+
+        tests.create_projects(self.session)
+        repo = pagure.lib.query._get_project(self.session, "test")
+        issue = pagure.lib.query.new_issue(
+            session=self.session,
+            repo=repo,
+            title="Test issue",
+            content="We should work on this",
+            user="pingou",
+        )
+        self.session.commit()
+        self.uid = issue.uid
+
+    def test_get_uid_from_path(self):
+        """Test that lookups are cached until the object is updated."""
+        self.assertEqual(pss.get_uid_from_path("/test/issue/1"), self.uid)
+
+        with mock.patch(
+            "pagure.lib.query.get_authorized_project",
+            side_effect=AssertionError("database queried"),
+        ):
+            self.assertEqual(pss.get_uid_from_path("/test/issue/1"), self.uid)
+
+        issue = pagure.lib.query.search_issues(
+            self.session,
+            pagure.lib.query._get_project(self.session, "test"),
+            issueid=1,
+        )
+        issue.private = True
+        self.session.add(issue)
+        self.session.commit()
+
+        # Still cached
+        self.assertEqual(pss.get_uid_from_path("/test/issue/1"), self.uid)
+
+        # The update is published, the cache entry is dropped
+        subscriptions = pss.Subscriptions(redis.asyncio.Redis())
+        subscriptions.dispatch(
+            {
+                "channel": ("pagure.%s" % self.uid).encode("utf-8"),
+                "data": b'{"issue": "private"}',
+                "type": "message",
+            }
+        )
+        self.assertEqual(pss.LOOKUP_CACHE, {})
+
+        for _ in range(2):
+            self.assertRaises(
+                PagureEvException, pss.get_uid_from_path, "/test/issue/1"
+            )
+
+    def test_get_uid_from_path_expired(self):
+        """Test that expired entries are looked up again."""
+        pss.LOOKUP_CACHE["/test/issue/1"] = (0, "expired", False)
+        pss.LOOKUP_CACHE["/test/issue/2"] = (0, "expired", False)
+
+        self.assertEqual(pss.get_uid_from_path("/test/issue/1"), self.uid)
+        self.assertEqual(list(pss.LOOKUP_CACHE), ["/test/issue/1"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
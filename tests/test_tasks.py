@@ -18,19 +18,30 @@ class MockCommit(object):
         self.commit_time = time
 
 
+class MockWalker(list):
+    def hide(self, oid):
+        self.hidden = oid
+
+
 @patch("pagure.lib.query.create_session", new=Mock())
 class TestCommitsAuthorStats(unittest.TestCase):
     def setUp(self):
-        self.search_user_patcher = patch("pagure.lib.query.search_user")
+        self.search_user_patcher = patch(
+            "pagure.lib.query.get_users_by_emails"
+        )
         mock_search_user = self.search_user_patcher.start()
-        mock_search_user.side_effect = lambda _, email: self.authors.get(email)
+        mock_search_user.side_effect = lambda _, emails: {
+            email: self.authors[email]
+            for email in emails
+            if email in self.authors
+        }
 
         self.pygit_patcher = patch("pygit2.Repository")
-        mock_repo = self.pygit_patcher.start().return_value
+        self.mock_repo = mock_repo = self.pygit_patcher.start().return_value
+        mock_repo.head.peel.return_value.oid.hex = "head"
 
         def mock_walk_impl(*args, **kwargs):
-            for commit in self.commits:
-                yield commit
+            return MockWalker(self.commits)
 
         mock_repo.walk.side_effect = mock_walk_impl
 
@@ -228,3 +239,50 @@ class TestCommitsAuthorStats(unittest.TestCase):
         self.assertEqual(
             authors, [(2, [("Alice", None, None)]), (1, [("Bob", "", None)])]
         )
+
+    def test_cached(self):
+        self.commits = [
+            MockCommit("Alice", "alice@example.com", "2018-01-01 00:00")
+        ]
+        self.authors = {}
+
+        first = tasks.commits_author_stats(self.repopath)
+        self.mock_repo.walk.side_effect = AssertionError("walked")
+        self.assertEqual(tasks.commits_author_stats(self.repopath), first)
+
+    def test_incremental(self):
+        self.commits = [
+            MockCommit("Alice", "alice@example.com"),
+            MockCommit("Bob", "bob@example.com", "2018-01-01 00:00"),
+        ]
+        self.authors = {
+            "bob@example.com": MockUser("Bobby", "bob@example.com")
+        }
+        tasks.commits_author_stats(self.repopath)
+
+        self.mock_repo.head.peel.return_value.oid.hex = "new_head"
+        self.mock_repo.descendant_of.return_value = True
+        self.commits = [
+            MockCommit("Bob", "bob@example.com", "2019-01-01 00:00"),
+        ]
+
+        (
+            num_commits,
+            authors,
+            num_authors,
+            last_time,
+        ) = tasks.commits_author_stats(self.repopath)
+
+        self.assertEqual(num_commits, 3)
+        self.assertEqual(num_authors, 2)
+        self.assertEqual(last_time, "2018-01-01 00:00")
+        self.assertEqual(
+            [(val, [a[:2] for a in people]) for val, people in authors],
+            [
+                (2, [("Bobby", "bob@example.com")]),
+                (1, [("Alice", "alice@example.com")]),
+            ],
+        )
+        self.mock_repo.descendant_of.assert_called_once_with(
+            "new_head", "head"
+        )
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# pragma: no cover
+
+"""
+Benchmark pushing a large pack over HTTP through pagure's git-http-backend
+proxy, with the request body arriving at a limited rate as it would from the
+network:
+
+- buffered, the whole body is received before git is started (what the proxy
+  used to do),
+- streamed, the body is handed to git as it arrives.
+
+The time to the first byte of the response and the overall throughput are
+reported for both.
+
+Usage: python utils/bench_git_http_push.py [--size 64] [--rate 32]
+
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import argparse
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import flask
+import pygit2
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+)
+
+import pagure.ui.clone  # noqa: E402
+from pagure.config import config as pagure_config  # noqa: E402
+
+
+class FakeProject(object):
+    """Minimal stand-in for pagure.lib.model.Project."""
+
+    def __init__(self, path):
+        self.path = path
+
+
+class ThrottledStream(io.BytesIO):
+    """Return the content of ``data`` at ``rate`` bytes per second."""
+
+    def __init__(self, data, rate):
+        super(ThrottledStream, self).__init__(data)
+        self.rate = rate
+
+    def read(self, size=-1):
+        block = super(ThrottledStream, self).read(size)
+        time.sleep(len(block) / float(self.rate))
+        return block
+
+    def readinto(self, buff):
+        block = self.read(len(buff))
+        buff[: len(block)] = block
+        return len(block)
+
+
+def prepare_push(workdir, size):
+    """Create the target repository and the body of a push request adding
+    ``size`` MB of random content to it."""
+    target = os.path.join(workdir, "target.git")
+    pygit2.init_repository(target, bare=True)
+
+    source = pygit2.init_repository(os.path.join(workdir, "source"))
+    builder = source.TreeBuilder()
+    for idx in range(size):
+        blob = source.create_blob(os.urandom(1024 * 1024))
+        builder.insert("file_%s" % idx, blob, pygit2.GIT_FILEMODE_BLOB)
+    sig = pygit2.Signature("pagure", "pagure@example.com")
+    commit = source.create_commit(
+        "refs/heads/master", sig, sig, "Big push", builder.write(), []
+    )
+
+    pack = subprocess.check_output(
+        ["git", "pack-objects", "--stdout", "--revs"],
+        input=("%s\n" % commit).encode("utf-8"),
+        cwd=source.path,
+    )
+    command = "%s %s refs/heads/master\0report-status\n" % ("0" * 40, commit)
+    body = ("%04x%s" % (len(command) + 4, command)).encode("utf-8")
+    return target, body + b"0000" + pack
+
+
+def run(app, target, body, rate, buffered):
+    stream = ThrottledStream(body, rate)
+    start = time.time()
+    if buffered:
+        stream = io.BytesIO(stream.read())
+    with app.test_request_context(
+        "/target.git/git-receive-pack",
+        method="POST",
+        input_stream=stream,
+        content_length=len(body),
+        content_type="application/x-git-receive-pack-request",
+        environ_base={"REMOTE_USER": "pagure"},
+    ):
+        response = pagure.ui.clone.proxy_raw_git(FakeProject(target))
+        first_byte = None
+        for _ in response.response:
+            if first_byte is None:
+                first_byte = time.time() - start
+        response.close()
+    return first_byte, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--size", type=int, default=64, help="Size of the push in MB"
+    )
+    parser.add_argument(
+        "--rate", type=int, default=32, help="Upload rate in MB/s"
+    )
+    args = parser.parse_args()
+
+    # Only passed to the git hooks, which the benchmark repo does not have
+    os.environ.setdefault("PAGURE_CONFIG", "/etc/pagure/pagure.cfg")
+    app = flask.Flask(__name__)
+    workdir = tempfile.mkdtemp(prefix="pagure-bench-")
+    pagure_config["GIT_FOLDER"] = workdir
+    try:
+        for buffered in (True, False):
+            target, body = prepare_push(workdir, args.size)
+            first_byte, duration = run(
+                app, target, body, args.rate * 1024 * 1024, buffered
+            )
+            print(
+                "%-9s %d MB at %d MB/s: first byte after %.3fs, "
+                "done after %.3fs (%.1f MB/s)"
+                % (
+                    "buffered" if buffered else "streamed",
+                    args.size,
+                    args.rate,
+                    first_byte,
+                    duration,
+                    len(body) / duration / 1024 / 1024,
+                )
+            )
+            shutil.rmtree(target)
+            shutil.rmtree(os.path.join(workdir, "source"))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# pragma: no cover
+
+"""
+Benchmark pagure.lib.git.log_commits_to_db, which records the commits of a
+push in the pagure_logs table, against the way it used to do it: looking up
+the author of each commit and adding the logs one by one.
+
+A git repository with the requested number of commits, spread across a few
+authors of which half are pagure users, is created in a temporary folder
+and logged into the database at the given URL (the schema is created there
+if needed, use an empty database). The throughput, in rows per second, is
+reported for both approaches.
+
+Usage: python utils/bench_log_commits.py [--db-url postgresql://...]
+    [--commits 100000] [--authors 50]
+
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import arrow
+import pygit2
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+)
+
+import pagure.exceptions  # noqa: E402
+import pagure.lib.git  # noqa: E402
+import pagure.lib.model  # noqa: E402
+import pagure.lib.query  # noqa: E402
+from pagure.lib import model  # noqa: E402
+
+
+def log_commits_one_by_one(session, project, commits, gitdir):
+    """Log the commits the way log_commits_to_db used to."""
+    repo_obj = pygit2.Repository(gitdir)
+    for commitid in commits:
+        commit = repo_obj[commitid]
+        try:
+            author_obj = pagure.lib.query.get_user(
+                session, commit.author.email
+            )
+        except pagure.exceptions.PagureException:
+            author_obj = None
+        date_created = arrow.get(commit.commit_time)
+        session.add(
+            model.PagureLog(
+                user_id=author_obj.id if author_obj else None,
+                user_email=commit.author.email if not author_obj else None,
+                project_id=project.id,
+                log_type="committed",
+                ref_id=commit.oid.hex,
+                date=date_created.date(),
+                date_created=date_created.datetime,
+            )
+        )
+
+
+def create_repo(gitdir, ncommits, nauthors):
+    """Create a git repository with ncommits empty commits."""
+    repo = pygit2.init_repository(gitdir, bare=True)
+    tree = repo.TreeBuilder().write()
+    parents = []
+    for idx in range(ncommits):
+        author = pygit2.Signature(
+            "Author %s" % (idx % nauthors),
+            "author%s@example.com" % (idx % nauthors),
+        )
+        parents = [
+            repo.create_commit(
+                "refs/heads/master",
+                author,
+                author,
+                "Commit %s" % idx,
+                tree,
+                parents,
+            )
+        ]
+    return [commit.oid.hex for commit in repo.walk(parents[0])][::-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db-url", default="sqlite:///:memory:")
+    parser.add_argument("--commits", type=int, default=100000)
+    parser.add_argument("--authors", type=int, default=50)
+    args = parser.parse_args()
+
+    session = pagure.lib.model.create_tables(args.db_url)
+    for idx in range(0, args.authors, 2):
+        user = model.User(
+            user="author%s" % idx,
+            fullname="Author %s" % idx,
+            default_email="author%s@example.com" % idx,
+        )
+        session.add(user)
+        session.flush()
+        session.add(
+            model.UserEmail(
+                user_id=user.id, email="author%s@example.com" % idx
+            )
+        )
+    project = model.Project(
+        user_id=user.id,
+        name="benchmark",
+        description="benchmark",
+        hook_token="benchmark",
+    )
+    session.add(project)
+    session.commit()
+
+    gitdir = tempfile.mkdtemp(prefix="bench-log-commits-")
+    try:
+        print("Creating %d commits..." % args.commits)
+        commits = create_repo(gitdir, args.commits, args.authors)
+        for name, function in (
+            ("one by one", log_commits_one_by_one),
+            ("batched", pagure.lib.git.log_commits_to_db),
+        ):
+            session.query(model.PagureLog).delete()
+            session.commit()
+            start = time.time()
+            function(session, project, commits, gitdir)
+            session.commit()
+            duration = time.time() - start
+            print(
+                "%-12s %d rows in %.2fs: %.0f rows/s"
+                % (name, len(commits), duration, len(commits) / duration)
+            )
+    finally:
+        shutil.rmtree(gitdir)
+
+
+if __name__ == "__main__":
+    main()
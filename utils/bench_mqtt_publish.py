@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# pragma: no cover
+
+"""
+Benchmark the two ways of publishing pagure's notifications to an MQTT
+server:
+
+- connecting (TLS handshake included) for every message, publishing it and
+  disconnecting (what mqtt_publish used to do),
+- publishing from the long-lived connection of the process (MQTTPublisher).
+
+The time spent by the caller of mqtt_publish and the time until all the
+messages are sent are reported for both.
+
+This needs paho-mqtt and an MQTT server accepting TLS connections, for
+example mosquitto with a ``listener 8883`` using a self-signed certificate.
+
+Usage: python utils/bench_mqtt_publish.py --host localhost --port 8883
+    --ca-certs ca.crt [--messages 500]
+
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import argparse
+import json
+import os
+import ssl
+import sys
+import time
+
+import paho.mqtt.client as mqtt
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+)
+
+import pagure.lib.notify  # noqa: E402
+from pagure.config import config as pagure_config  # noqa: E402
+
+MESSAGE = {"project": {"fullname": "benchmark"}, "agent": "pingou"}
+
+
+def publish_connect_each_time(topic, message):
+    """Publish the message the way mqtt_publish used to."""
+    client = mqtt.Client(os.uname()[1])
+    client.tls_set(
+        ca_certs=pagure_config["MQTT_CA_CERTS"],
+        cert_reqs=ssl.CERT_REQUIRED,
+        tls_version=ssl.PROTOCOL_TLSv1_2,
+    )
+    client.connect(pagure_config["MQTT_HOST"], pagure_config["MQTT_PORT"])
+    client.publish(topic, json.dumps(message))
+    client.disconnect()
+
+
+def run(nmessages, persistent):
+    start = time.time()
+    for idx in range(nmessages):
+        if persistent:
+            pagure.lib.notify.mqtt_publish("benchmark.%s" % idx, MESSAGE)
+        else:
+            publish_connect_each_time("benchmark.%s" % idx, MESSAGE)
+    caller = time.time() - start
+    if persistent:
+        pagure.lib.notify.mqtt_publisher.queue.join()
+    return caller, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8883)
+    parser.add_argument("--ca-certs", required=True)
+    parser.add_argument("--messages", type=int, default=500)
+    args = parser.parse_args()
+
+    pagure_config.update(
+        {
+            "MQTT_NOTIFICATIONS": True,
+            "MQTT_HOST": args.host,
+            "MQTT_PORT": args.port,
+            "MQTT_CA_CERTS": args.ca_certs,
+            "MQTT_QUEUE_SIZE": args.messages,
+        }
+    )
+    for persistent in (False, True):
+        caller, duration = run(args.messages, persistent)
+        print(
+            "%-12s %d messages: %.3fs in mqtt_publish "
+            "(%.2f ms/message), all sent after %.3fs"
+            % (
+                "persistent" if persistent else "connect+tls",
+                args.messages,
+                caller,
+                caller * 1000 / args.messages,
+                duration,
+            )
+        )
+    pagure.lib.notify.mqtt_publisher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# pragma: no cover
+
+"""
+Benchmark the two ways pagure has of storing the JSON representation of an
+issue or a pull-request in its git repository:
+
+- the historical one, cloning the repo, committing and pushing back,
+- the direct one (``GIT_UPDATE_DIRECT_WRITE``), writing the objects straight
+  into the bare repository.
+
+Usage: python utils/bench_update_git.py [--files 5000] [--updates 50]
+
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+import pygit2
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+)
+
+import pagure.lib.git  # noqa: E402
+from pagure.config import config as pagure_config  # noqa: E402
+
+
+class FakeProject(object):
+    """Minimal stand-in for pagure.lib.model.Project."""
+
+    def __init__(self, path):
+        self.path = path
+        self.fullname = "benchmark"
+
+    def repopath(self, repotype):
+        return self.path
+
+
+class FakeIssue(object):
+    """Minimal stand-in for pagure.lib.model.Issue."""
+
+    isa = "issue"
+    repotype = "tickets"
+
+    def __init__(self, uid, counter):
+        self.uid = uid
+        self.title = "Issue %s" % counter
+        self.counter = counter
+
+    def to_json(self):
+        return {"title": self.title, "uid": self.uid, "rev": self.counter}
+
+
+def prepare_repo(folder, nfiles):
+    """Create a bare repo containing ``nfiles`` JSON files."""
+    repo = pygit2.init_repository(folder, bare=True)
+    builder = repo.TreeBuilder()
+    for idx in range(nfiles):
+        blob = repo.create_blob(('{"id": %s}' % idx).encode("utf-8"))
+        builder.insert(uuid.uuid4().hex, blob, pygit2.GIT_FILEMODE_BLOB)
+    sig = pygit2.Signature("pagure", "pagure")
+    repo.create_commit(
+        "refs/heads/master", sig, sig, "Initial", builder.write(), []
+    )
+
+
+def run(folder, nupdates, direct):
+    pagure_config["GIT_UPDATE_DIRECT_WRITE"] = direct
+    project = FakeProject(folder)
+    start = time.time()
+    for idx in range(nupdates):
+        pagure.lib.git._update_git(FakeIssue(uuid.uuid4().hex, idx), project)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--updates", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pagure-bench-")
+    try:
+        for direct in (False, True):
+            folder = os.path.join(workdir, "%s.git" % direct)
+            prepare_repo(folder, args.files)
+            duration = run(folder, args.updates, direct)
+            print(
+                "%-12s %d updates on %d files: %.3fs (%.1f ms/update)"
+                % (
+                    "direct" if direct else "clone+push",
+                    args.updates,
+                    args.files,
+                    duration,
+                    duration * 1000 / args.updates,
+                )
+            )
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()